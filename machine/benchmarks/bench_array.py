@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Throughput of stepping many machines with a MachineArray.
+
+Compares firing a transition on one Machine object per entity against
+firing it on every row of a MachineArray at once.
+
+  PYTHONPATH=src:../props/src:../common/src python benchmarks/bench_array.py
+"""
+
+import timeit
+
+import numpy
+
+from sordid import machine
+
+
+COUNT = 1000000
+
+
+class Door(machine.Machine):
+  closed = machine.State()
+  opened = machine.State()
+
+  open = machine.Transition({closed: opened})
+  close = machine.Transition({opened: closed})
+
+
+def main():
+  machines = [Door() for _ in range(COUNT // 10)]
+
+  def step_objects():
+    for mach in machines:
+      mach.open()
+      mach.close()
+  seconds = timeit.timeit(step_objects, number=1) / 2
+  print('%-26s %7.2f ns/machine/step' % ('Machine objects',
+                                         seconds / len(machines) * 1e9))
+
+  doors = machine.MachineArray(Door, COUNT)
+
+  def step_array():
+    doors.fire('open')
+    doors.fire('close')
+  seconds = timeit.timeit(step_array, number=10) / 20
+  print('%-26s %7.2f ns/machine/step' % ('MachineArray by name',
+                                         seconds / COUNT * 1e9))
+
+  ids = numpy.random.randint(-1, 2, COUNT)
+  seconds = timeit.timeit(lambda: doors.fire(ids), number=10) / 10
+  print('%-26s %7.2f ns/machine/step' % ('MachineArray per row ids',
+                                         seconds / COUNT * 1e9))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Cost of creating machines as the number of transitions grows.
+
+Transitions are bound when read from a machine rather than when it is
+created, so creation should cost the same however many transitions a machine
+has.
+
+  PYTHONPATH=src:../props/src:../common/src python benchmarks/bench_construct.py
+"""
+
+import timeit
+import tracemalloc
+
+from sordid import machine
+
+
+COUNT = 1000000
+
+
+def machine_class(transition_count):
+  states = {'s%d' % index: machine.State() for index in range(8)}
+  ordered = list(states.values())
+  attributes = dict(states)
+  for index in range(transition_count):
+    attributes['T%d' % index] = machine.Transition({
+      state: ordered[(position + index + 1) % len(ordered)]
+      for position, state in enumerate(ordered)})
+  return type(machine.Machine)('Mach%d' % transition_count,
+                               (machine.Machine,), attributes)
+
+
+def main():
+  for transition_count in (1, 10, 50):
+    cls = machine_class(transition_count)
+    seconds = timeit.timeit(cls, number=COUNT)
+    tracemalloc.start()
+    machines = [cls() for _ in range(10000)]
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del machines
+    print('%2d transitions  %6.1f ns/machine  %5.0f bytes/machine  '
+          '%.2f s for %d' % (transition_count, seconds / COUNT * 1e9,
+                             size / 10000, seconds, COUNT))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Cost per event of driving a machine from a stream of events.
+
+Compares calling 'getattr(mach, name)()' per event against 'Machine.run'.
+
+  PYTHONPATH=src:../props/src:../common/src python benchmarks/bench_run.py
+"""
+
+import timeit
+
+from sordid import machine
+
+
+COUNT = 1000000
+
+
+class Door(machine.Machine):
+  closed = machine.State()
+  opened = machine.State()
+
+  open = machine.Transition({closed: opened})
+  close = machine.Transition({opened: closed})
+
+
+def main():
+  names = ['open', 'close'] * (COUNT // 2)
+  ids = [Door.transition_id(name) for name in names]
+  mach = Door()
+
+  def per_event():
+    for name in names:
+      getattr(mach, name)()
+
+  for label, run in (('getattr per event', per_event),
+                     ('run by name', lambda: mach.run(names)),
+                     ('run by id', lambda: mach.run(ids)),
+                     ('iter_run by name',
+                      lambda: [state for state in mach.iter_run(names)])):
+    seconds = timeit.timeit(run, number=1)
+    print('%-20s %7.1f ns/event' % (label, seconds / COUNT * 1e9))
+
+
+if __name__ == '__main__':
+  main()
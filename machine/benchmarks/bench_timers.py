@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Cost of arming, cancelling and expiring timeouts of many machines.
+
+Arming and cancelling should cost the same however many timers are armed.
+
+  PYTHONPATH=src:../props/src:../common/src python benchmarks/bench_timers.py
+"""
+
+import random
+import timeit
+
+from sordid import machine
+
+
+class Order(machine.Machine):
+  pending = machine.State()
+  paid = machine.State()
+  expired = machine.State()
+
+  pay = machine.Transition({pending: paid})
+  expire = machine.Transition({pending: expired})
+
+  pending_timeout = machine.Timeout(pending, 30, expire)
+
+
+class Clock:
+
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+def main():
+  for count in (10000, 100000, 1000000):
+    clock = Clock()
+    scheduler = machine.Scheduler(resolution=0.01, clock=clock)
+    orders = [Order() for _ in range(count)]
+
+    watch = timeit.timeit(lambda: [scheduler.watch(order) for order in orders],
+                          number=1)
+    paying = random.Random(0).sample(orders, count // 2)
+    pay = timeit.timeit(lambda: [order.pay() for order in paying], number=1)
+
+    def expire():
+      for _ in range(3000):
+        clock.now += 0.01
+        scheduler.advance()
+    expiry = timeit.timeit(expire, number=1)
+    print('%8d machines  watch+arm %6.0f ns  pay+cancel %6.0f ns  '
+          'expire %6.0f ns/timer' % (count, watch / count * 1e9,
+                                     pay / len(paying) * 1e9,
+                                     expiry / (count - len(paying)) * 1e9))
+
+
+if __name__ == '__main__':
+  main()
@@ -15,6 +15,17 @@
 # limitations under the License.
 #
 
+import array
+import collections
+import math
+import time
+import weakref
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
 from sordid import util, props
 
 
@@ -51,13 +62,23 @@ class State(util.SourceOrdered, props.HasProps):
     return self.__string_value
 
 
-class Transitioner(props.HasProps):
+class Transitioner:
+  """Transition bound to a machine instance.
 
-  def __init__(self, machine, transition):
-    self.machine = machine
+  Created when a transition is read from a machine instance, much as methods
+  are bound, so machines do not hold one per transition.
+  """
+
+  __slots__ = ('__machine', '__transition', '__transition_id')
+
+  def __init__(self, machine, transition, transition_id=None):
+    self.__machine = machine
     self.__transition = transition
+    self.__transition_id = transition_id
 
-  machine = props.ReadOnlyProperty()
+  @property
+  def machine(self):
+    return self.__machine
 
   @property
   def transition(self):
@@ -66,45 +87,117 @@ class Transitioner(props.HasProps):
   def __call__(self):
     next_state = self.next_state
     if next_state is None:
-      raise IllegalTransitionError(
+      machine = self.__machine
+      raise IllegalStateTransition(
         'There is no transition %s from state %s for %s' % (
-          self.transition.name, current_state, self.__transition))
-    self.machine.state = next_state
+          self.__transition.name, getattr(machine, 'state', None),
+          type(machine).__name__))
+    self.__machine.state = next_state
     return next_state
 
   @property
   def next_state(self):
-    assert self.machine is not None
-    return self.transition.get_next_state_from(self.machine.state)
+    machine = self.__machine
+    if self.__transition_id is None:
+      return self.__transition.get_next_state_from(machine.state)
+    return type(machine).next_state_from(self.__transition_id, machine.state)
 
 
 class Transition:
 
   def __init__(self, state_map):
     super(Transition, self).__init__()
+    self.name = None
+    # Classes are not kept alive by the transitions they inherit.
+    self.__transition_ids = weakref.WeakKeyDictionary()
     if isinstance(state_map, dict):
       state_iterator = state_map.items()
     else:
       state_iterator = iter(state_map)
 
     final_state_map = {}
-    seen_froms = set()
-    for froms, to in state_map.items():
+    for froms, to in state_iterator:
       if isinstance(froms, State):
         froms = [froms]
       for next_from in froms:
-        if next_from in seen_froms:
+        if next_from in final_state_map:
           raise AssertionError('State %s is already defined for transition' %
                                next_from)
         final_state_map[next_from] = to
-      self.__state_map = final_state_map
+    self.__state_map = final_state_map
+
+  def __get__(self, instance, owner):
+    if instance is None:
+      return self
+    try:
+      transition_id = self.__transition_ids[owner]
+    except KeyError:
+      transition_id = owner.transition_id(self.name)
+      if transition_id is not None and owner.lookup_transition(
+          self.name) is not self:
+        transition_id = None
+      self.__transition_ids[owner] = transition_id
+    return Transitioner(instance, self, transition_id)
 
   def get_next_state_from(self, state):
     return self.__state_map.get(state, None)
 
+  def items(self):
+    """Iterable of (from state, to state) pairs."""
+    return self.__state_map.items()
+
+
+class Timeout:
+  """Transition fired when a machine stays in a state for too long.
+
+  Declared on a machine class and run by a Scheduler watching its instances:
+
+    class Order(Machine):
+      pending = State()
+      paid = State()
+      expired = State()
+
+      pay = Transition({pending: paid})
+      expire = Transition({pending: expired})
+
+      pending_timeout = Timeout(pending, 30, expire)
+  """
+
+  def __init__(self, state, seconds, transition):
+    """Constructor.
+
+    Args:
+      state: State the timeout applies to.
+      seconds: Time a machine may stay in 'state'.
+      transition: Transition or name of transition to fire.
+    """
+    self.state = state
+    self.seconds = seconds
+    self.transition = transition
+
+
+class _StateProperty(props.ValidatedProperty):
+  """State of a machine, which tells its scheduler when it changes."""
+
+  def __set__(self, instance, value):
+    super(_StateProperty, self).__set__(instance, value)
+    scheduler = instance._Machine__scheduler
+    if scheduler is not None:
+      scheduler._entered(instance, value)
+
+  def __delete__(self, instance):
+    super(_StateProperty, self).__delete__(instance)
+    scheduler = instance._Machine__scheduler
+    if scheduler is not None:
+      scheduler._entered(instance, None)
+
 
 class Machine(props.HasProps):
 
+  # Scheduler watching machine and timers it has armed for it.
+  __scheduler = None
+  __timers = None
+
   def __init__(self):
     try:
       initial_state = self.INIT
@@ -113,14 +206,11 @@ class Machine(props.HasProps):
     else:
       self.state = initial_state
 
-    for name, transition in type(self).iter_transitions():
-      assert transition is not None
-      setattr(self, name, Transitioner(self, transition))
-
   @classmethod
   def __config_props__(cls, attrs):
     cls.__state_by_name = {}
     cls.__transition_by_name = {}
+    cls.__timeouts = dict(getattr(cls, '_Machine__timeouts', {}))
     for name, value in attrs.items():
       props.config_prop(cls, name, value)
 
@@ -134,6 +224,42 @@ class Machine(props.HasProps):
       except AttributeError:
         pass
 
+    cls.__compile_transitions()
+
+  @classmethod
+  def __compile_transitions(cls):
+    # States are numbered in source order, followed by states of other
+    # machines that transitions refer to.
+    states = list(cls.state_names)
+    state_ids = {state: index for index, state in enumerate(states)}
+    transitions = list(cls.__transition_by_name.items())
+    for name, transition in transitions:
+      for pair in transition.items():
+        for state in pair:
+          if state not in state_ids:
+            state_ids[state] = len(states)
+            states.append(state)
+
+    state_count = len(states)
+    if state_count < 0x80:
+      typecode = 'b'
+    elif state_count < 0x8000:
+      typecode = 'h'
+    else:
+      typecode = 'i'
+    table = array.array(typecode, [-1]) * (len(transitions) * state_count)
+    for transition_id, (name, transition) in enumerate(transitions):
+      row = transition_id * state_count
+      for from_state, to_state in transition.items():
+        table[row + state_ids[from_state]] = state_ids[to_state]
+
+    cls.__states = tuple(states)
+    cls.__state_count = state_count
+    cls.__state_ids = state_ids
+    cls.__transition_ids = {name: transition_id for transition_id, (name, _)
+                            in enumerate(transitions)}
+    cls.__transition_table = table
+
   @classmethod
   def __config_prop__(cls, name, value):
     if not props.config_prop_name(cls, name, value):
@@ -142,7 +268,11 @@ class Machine(props.HasProps):
         value.machine = cls
         cls.__state_by_name[name] = value
       if isinstance(value, Transition):
+        if value.name is None:
+          value.name = name
         cls.__transition_by_name[name] = value
+      if isinstance(value, Timeout):
+        cls.__timeouts[value.state] = value
 
   @classmethod
   def lookup_state(cls, name):
@@ -156,8 +286,562 @@ class Machine(props.HasProps):
   def iter_transitions(cls):
     return cls.__transition_by_name.items()
 
+  @classmethod
+  def timeout_for(cls, state):
+    """Timeout declared for state, or None."""
+    return cls.__timeouts.get(state, None)
+
+  @classmethod
+  def states(cls):
+    """Tuple of states indexed by state id."""
+    return cls.__states
+
+  @classmethod
+  def state_id(cls, state):
+    """Integer id of state, or None if no transition of machine uses it."""
+    return cls.__state_ids.get(state, None)
+
+  @classmethod
+  def transition_id(cls, name):
+    """Integer id of transition, or None if machine has no such transition."""
+    return cls.__transition_ids.get(name, None)
+
+  @classmethod
+  def transition_table(cls):
+    """Next state table compiled from transitions.
+
+    Returns:
+      Array where the id of the state that transition 't' leads to from state
+      's' is at index 't * len(cls.states()) + s', or -1 if there is none.
+    """
+    return cls.__transition_table
+
+  @classmethod
+  def next_state_from(cls, transition_id, state):
+    """State a transition leads to from a state, or None if there is none."""
+    state_id = cls.__state_ids.get(state)
+    if state_id is None:
+      return None
+    next_id = cls.__transition_table[
+      transition_id * cls.__state_count + state_id]
+    if next_id < 0:
+      return None
+    return cls.__states[next_id]
+
+  def iter_run(self, events, on_illegal='raise'):
+    """Fire many transitions in turn.
+
+    Transitions are looked up in the compiled transition table, and states
+    the table leads to are stored without validating them again.
+
+    Example:
+
+      for state in mach.iter_run(['open', 'close', 'open']):
+        print(state)
+
+    Args:
+      events: Iterable of names or ids of transitions of this machine's class.
+      on_illegal: What to do for a transition there is none of from the
+        current state.  One of:
+          'raise': Raise IllegalStateTransition.
+          'skip': Ignore the transition.
+          'stop': Stop consuming events.
+
+    Returns:
+      Iterator of the state after each transition that was fired.
+
+    Raises:
+      ValueError: When 'on_illegal' is not one of the above.
+      KeyError: When an event names a transition the class does not have.
+      IndexError: When an event is not a valid transition id.
+      IllegalStateTransition: When 'on_illegal' is 'raise'.
+    """
+    if on_illegal not in ('raise', 'skip', 'stop'):
+      raise ValueError('Unknown illegal transition policy: %r' % (on_illegal,))
+    return self.__run(events, on_illegal)
+
+  def __run(self, events, on_illegal):
+    cls = type(self)
+    transition_ids = cls.__transition_ids
+    transition_count = len(transition_ids)
+    table = cls.__transition_table
+    states = cls.__states
+    state_ids = cls.__state_ids
+    state_count = cls.__state_count
+
+    prop = Machine.__dict__['state']
+    if (cls.state is prop and type(prop) is _StateProperty and
+        cls.__setattr__ is object.__setattr__):
+      # States from the table are known to be valid.
+      set_state = object.__setattr__
+      name = prop.attribute_name
+    else:
+      set_state = setattr
+      name = 'state'
+
+    known_state = None
+    state_id = -1
+    for event in events:
+      if type(event) is str:
+        try:
+          transition_id = transition_ids[event]
+        except KeyError:
+          raise KeyError('%s has no transition %s' % (cls.__name__, event))
+      else:
+        transition_id = event
+        if not 0 <= transition_id < transition_count:
+          raise IndexError('Transition id out of range')
+
+      # The state may be changed between events.
+      state = getattr(self, name, None)
+      if state is not known_state:
+        known_state = state
+        state_id = state_ids.get(state, -1)
+
+      if state_id < 0:
+        next_id = -1
+      else:
+        next_id = table[transition_id * state_count + state_id]
+      if next_id < 0:
+        if on_illegal == 'skip':
+          continue
+        elif on_illegal == 'stop':
+          return
+        if type(event) is not str:
+          event = list(transition_ids)[transition_id]
+        raise IllegalStateTransition(
+          'There is no transition %s from state %s for %s' % (
+            event, state, cls.__name__))
+
+      state_id = next_id
+      known_state = states[next_id]
+      set_state(self, name, known_state)
+      if set_state is not setattr and self.__scheduler is not None:
+        self.__scheduler._entered(self, known_state)
+      yield known_state
+
+  def run(self, events, on_illegal='raise'):
+    """Fire many transitions in turn.
+
+    Args:
+      events, on_illegal: As for 'iter_run'.
+
+    Returns:
+      State after the last transition, or None if the machine has no state.
+    """
+    collections.deque(self.iter_run(events, on_illegal), maxlen=0)
+    return getattr(self, 'state', None)
+
   INIT = props.ReadOnlyProperty()
 
-  state = props.ValidatedProperty(props.type_validator(State))
+  state = _StateProperty(props.type_validator(State))
 
   state_names = props.ReadOnlyProperty()
+
+
+class MachineArray:
+  """States of many instances of a Machine class held in a NumPy array.
+
+  Rather than one Machine object per entity, each row holds the integer id of
+  the state of one entity, as numbered by 'Machine.states'.  Transitions are
+  applied to all rows at once by looking the next states up in the compiled
+  transition table:
+
+    class Door(Machine):
+      closed = State()
+      opened = State()
+
+      open = Transition({closed: opened})
+      close = Transition({opened: closed})
+
+    doors = MachineArray(Door, 1000000)
+    invalid = doors.fire('open')
+    invalid = doors.fire('close')  # Nothing is open, so all are invalid.
+
+  Rows start in the machine's initial state, or with no state (id -1) if it
+  has none.  Requires NumPy.
+  """
+
+  def __init__(self, machine_class, size):
+    """Constructor.
+
+    Args:
+      machine_class: Machine class whose instances are held.
+      size: Number of rows.
+    """
+    if numpy is None:
+      raise ImportError('MachineArray requires NumPy')
+    self.__machine_class = machine_class
+    self.__states = machine_class.states()
+    initial = getattr(machine_class, 'INIT', None)
+    if isinstance(initial, State):
+      initial_id = machine_class.state_id(initial)
+    else:
+      initial_id = -1
+    self.__state_ids = numpy.full(size, initial_id, dtype=numpy.int32)
+    table = machine_class.transition_table()
+    self.__table = numpy.frombuffer(table, dtype=table.typecode).astype(
+      numpy.int32)
+
+  @property
+  def machine_class(self):
+    """Class of held machines."""
+    return self.__machine_class
+
+  @property
+  def state_ids(self):
+    """Array of the state id of each row, or -1 for rows with no state.
+
+    This is the array itself rather than a copy, so rows may be assigned.
+    """
+    return self.__state_ids
+
+  def __len__(self):
+    return len(self.__state_ids)
+
+  def __getitem__(self, index):
+    state_id = self.__state_ids[index]
+    if state_id < 0:
+      return None
+    return self.__states[state_id]
+
+  def in_state(self, state):
+    """Boolean array of which rows are in a state."""
+    state_id = self.__machine_class.state_id(state)
+    if state_id is None:
+      return numpy.zeros(len(self.__state_ids), dtype=numpy.bool_)
+    return self.__state_ids == state_id
+
+  def __transition_ids(self, transition):
+    if isinstance(transition, str):
+      transition_id = self.__machine_class.transition_id(transition)
+      if transition_id is None:
+        raise KeyError('%s has no transition %s' % (
+          self.__machine_class.__name__, transition))
+      return transition_id
+    if isinstance(transition, (int, numpy.integer)):
+      transition_id = int(transition)
+      if not 0 <= transition_id < len(self.__machine_class.iter_transitions()):
+        raise IndexError('Transition id out of range')
+      return transition_id
+    transition_ids = numpy.asarray(transition, dtype=numpy.intp)
+    if transition_ids.shape != self.__state_ids.shape:
+      raise ValueError('Expected %d transition ids, got %d' % (
+        len(self.__state_ids), transition_ids.size))
+    # Negative ids skip rows, larger ones would read other rows of the table.
+    if (transition_ids >= len(self.__machine_class.iter_transitions())).any():
+      raise IndexError('Transition id out of range')
+    return transition_ids
+
+  def next_state_ids(self, transition):
+    """State ids rows would have after a transition, without changing them.
+
+    Args:
+      transition: Name or id of transition to apply to all rows, or array of
+        one transition id per row.  Rows whose transition id is negative are
+        not transitioned.
+
+    Returns:
+      Array of the id of the state each row would be in, or -1 for rows for
+      which there is no such transition, as when 'Transitioner.next_state' is
+      None.  Rows that are not transitioned keep their current state id.
+
+    Raises:
+      KeyError: When the machine has no transition of that name.
+      IndexError: When a transition id is out of range.  Negative ids are
+        only out of range when applied to all rows.
+    """
+    return self.__next_state_ids(self.__transition_ids(transition))
+
+  def __next_state_ids(self, transition_ids):
+    state_ids = self.__state_ids
+    state_count = len(self.__states)
+    if not self.__table.size:
+      if isinstance(transition_ids, int):
+        return numpy.full_like(state_ids, -1)
+      return numpy.where(transition_ids < 0, state_ids, -1).astype(
+        numpy.int32)
+    known = state_ids >= 0
+    if isinstance(transition_ids, int):
+      next_ids = self.__table[transition_ids * state_count +
+                              numpy.where(known, state_ids, 0)]
+      return numpy.where(known, next_ids, -1)
+    active = transition_ids >= 0
+    next_ids = self.__table[numpy.where(active, transition_ids, 0) *
+                            state_count + numpy.where(known, state_ids, 0)]
+    return numpy.where(active, numpy.where(known, next_ids, -1), state_ids)
+
+  def fire(self, transition):
+    """Apply transition to all rows.
+
+    Args:
+      transition: As for 'next_state_ids'.
+
+    Returns:
+      Boolean array of rows for which there is no such transition.  These rows
+      keep their current state.
+    """
+    transition_ids = self.__transition_ids(transition)
+    next_ids = self.__next_state_ids(transition_ids)
+    invalid = next_ids < 0
+    if not isinstance(transition_ids, int):
+      invalid &= transition_ids >= 0
+    numpy.copyto(self.__state_ids, next_ids, where=~invalid)
+    return invalid
+
+
+class Timer:
+  """Transition armed to fire on a machine at a later time."""
+
+  __slots__ = ('machine', 'transition', 'deadline', '_slot')
+
+  def __init__(self, machine, transition, deadline):
+    self.machine = machine
+    self.transition = transition
+    self.deadline = deadline
+    self._slot = None
+
+  @property
+  def armed(self):
+    """Whether timer has neither fired nor been cancelled."""
+    return self._slot is not None
+
+  def cancel(self):
+    """Cancel timer if armed."""
+    slot = self._slot
+    if slot is not None:
+      del slot[self]
+      self._slot = None
+      self.machine._Machine__timers.discard(self)
+
+
+def _cancel_timers(timers):
+  for timer in timers:
+    del timer._slot[timer]
+    timer._slot = None
+  timers.clear()
+
+
+# Each wheel level has 2 ** _WHEEL_BITS slots.
+_WHEEL_BITS = 6
+_WHEEL_SIZE = 1 << _WHEEL_BITS
+_WHEEL_MASK = _WHEEL_SIZE - 1
+_WHEEL_LEVELS = 4
+
+
+class Scheduler:
+  """Fires timed transitions of many machines.
+
+  Machines are watched by a scheduler, which arms a timer whenever a machine
+  enters a state that has a Timeout and cancels its timers whenever its
+  state changes:
+
+    scheduler = Scheduler()
+    order = Order()
+    scheduler.watch(order)
+
+    while True:
+      scheduler.advance()
+      ...
+
+  or as an asyncio task:
+
+    asyncio.ensure_future(scheduler.run_async())
+
+  Timers are kept in a hierarchical timing wheel.  Time is divided in to
+  ticks of 'resolution' seconds, and each level of the wheel has 64 slots
+  that each span 64 times as many ticks as a slot of the level below.  A
+  timer is armed in to the slot of the lowest level that reaches its
+  deadline, and moved down a level each time the level below wraps around,
+  so arming and cancelling a timer take constant time however many timers
+  are armed.  All timers that expire in the same tick are fired together,
+  in one props batch.  Timers further away than the wheel reaches wait in
+  an overflow slot.
+  """
+
+  def __init__(self, resolution=0.01, clock=time.monotonic):
+    """Constructor.
+
+    Args:
+      resolution: Length of a tick in seconds.  Timers fire at the end of the
+        tick their deadline falls in.
+      clock: Function returning the current time in seconds.
+    """
+    self.__resolution = resolution
+    self.__clock = clock
+    self.__origin = clock()
+    self.__tick = 0
+    self.__wheels = [[{} for _ in range(_WHEEL_SIZE)]
+                     for _ in range(_WHEEL_LEVELS)]
+    self.__overflow = {}
+    self.__running = False
+
+  @property
+  def resolution(self):
+    """Length of a tick in seconds."""
+    return self.__resolution
+
+  def __len__(self):
+    """Number of armed timers."""
+    return len(self.__overflow) + sum(len(slot) for wheel in self.__wheels
+                                      for slot in wheel)
+
+  def __ticks(self, now):
+    return math.floor((now - self.__origin) / self.__resolution)
+
+  def __insert(self, timer):
+    delta = timer.deadline - self.__tick
+    for level, wheel in enumerate(self.__wheels):
+      if delta < _WHEEL_SIZE << (level * _WHEEL_BITS):
+        slot = wheel[(timer.deadline >> (level * _WHEEL_BITS)) & _WHEEL_MASK]
+        break
+    else:
+      slot = self.__overflow
+    slot[timer] = None
+    timer._slot = slot
+
+  def watch(self, machine):
+    """Fire timeouts of machine.
+
+    If the machine is in a state with a Timeout, it is armed from now.
+    """
+    machine._Machine__scheduler = self
+    self._entered(machine, getattr(machine, 'state', None))
+
+  def unwatch(self, machine):
+    """Stop firing timeouts of machine and cancel its timers."""
+    self.cancel(machine)
+    machine._Machine__scheduler = None
+
+  def arm(self, machine, seconds, transition):
+    """Arm timer.
+
+    The timer is cancelled if the machine changes state before it fires.
+
+    Args:
+      machine: Machine to fire transition on.
+      seconds: Time from now to fire transition at.
+      transition: Transition or name of transition to fire.  Nothing happens
+        if there is no such transition from the machine's state when fired.
+
+    Returns:
+      Timer.
+    """
+    if machine._Machine__scheduler is not self:
+      machine._Machine__scheduler = self
+    deadline = max(self.__tick + 1, math.ceil(
+      (self.__clock() + seconds - self.__origin) / self.__resolution))
+    timer = Timer(machine, transition, deadline)
+    self.__insert(timer)
+    timers = machine._Machine__timers
+    if timers is None:
+      timers = machine._Machine__timers = set()
+    timers.add(timer)
+    return timer
+
+  def cancel(self, machine):
+    """Cancel all timers of machine."""
+    timers = machine._Machine__timers
+    if timers:
+      _cancel_timers(timers)
+
+  def _entered(self, machine, state):
+    timers = machine._Machine__timers
+    if timers:
+      _cancel_timers(timers)
+    if state is not None:
+      timeout = type(machine).timeout_for(state)
+      if timeout is not None:
+        self.arm(machine, timeout.seconds, timeout.transition)
+
+  def __fire(self, timer):
+    del timer._slot[timer]
+    timer._slot = None
+    machine = timer.machine
+    machine._Machine__timers.discard(timer)
+    transition = timer.transition
+    if isinstance(transition, Transition):
+      transitioner = transition.__get__(machine, type(machine))
+    else:
+      transitioner = getattr(machine, transition)
+    if transitioner.next_state is not None:
+      transitioner()
+
+  def advance(self, now=None):
+    """Fire all timers that have expired.
+
+    Args:
+      now: Current time, or None to read the clock.
+
+    Returns:
+      Number of timers fired.
+    """
+    if now is None:
+      now = self.__clock()
+    target = self.__ticks(now)
+    wheels = self.__wheels
+    fired = 0
+    with props.batch():
+      while self.__tick < target:
+        tick = self.__tick = self.__tick + 1
+        # Move timers down each level that the level below wrapped in to.
+        for level in range(1, _WHEEL_LEVELS + 1):
+          if tick & ((1 << (level * _WHEEL_BITS)) - 1):
+            break
+          if level == _WHEEL_LEVELS:
+            cascaded = self.__overflow
+            self.__overflow = {}
+          else:
+            index = (tick >> (level * _WHEEL_BITS)) & _WHEEL_MASK
+            cascaded = wheels[level][index]
+            wheels[level][index] = {}
+          for timer in cascaded:
+            self.__insert(timer)
+
+        index = tick & _WHEEL_MASK
+        expired = wheels[0][index]
+        if expired:
+          wheels[0][index] = {}
+          for timer in list(expired):
+            # Timers fired earlier in the batch may have cancelled it.
+            if timer._slot is expired:
+              self.__fire(timer)
+              fired += 1
+    return fired
+
+  def run(self, seconds=None):
+    """Advance in a loop until stopped.
+
+    Args:
+      seconds: Time to run for, or None to run until 'stop' is called.
+    """
+    deadline = None if seconds is None else self.__clock() + seconds
+    self.__running = True
+    while self.__running:
+      self.advance()
+      if deadline is not None and self.__clock() >= deadline:
+        break
+      time.sleep(self.__resolution)
+    self.__running = False
+
+  async def run_async(self, seconds=None):
+    """Advance in an asyncio task until stopped.
+
+    Args:
+      seconds: As for 'run'.
+    """
+    # Imported here, as importing asyncio is slow and most users never need it.
+    import asyncio
+    deadline = None if seconds is None else self.__clock() + seconds
+    self.__running = True
+    while self.__running:
+      self.advance()
+      if deadline is not None and self.__clock() >= deadline:
+        break
+      await asyncio.sleep(self.__resolution)
+    self.__running = False
+
+  def stop(self):
+    """Stop 'run' or 'run_async'."""
+    self.__running = False
+
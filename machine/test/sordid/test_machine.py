@@ -15,11 +15,54 @@
 # limitations under the License.
 #
 
+import asyncio
+import gc
+import os
+import random
+import subprocess
+import sys
 import unittest
+import weakref
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
 
 from machine.src.sordid import machine
 
 
+class Door(machine.Machine):
+  closed = machine.State()
+  opened = machine.State()
+  locked = machine.State()
+
+  open = machine.Transition({closed: opened})
+  close = machine.Transition({opened: closed})
+  lock = machine.Transition({closed: locked})
+
+
+class Order(machine.Machine):
+  pending = machine.State()
+  paid = machine.State()
+  expired = machine.State()
+
+  pay = machine.Transition({pending: paid})
+  expire = machine.Transition({pending: expired})
+  retry = machine.Transition({expired: pending})
+
+  pending_timeout = machine.Timeout(pending, 30, expire)
+
+
+class Clock:
+
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
 class MachineTest(unittest.TestCase):
 
   def testEmptyMachine(self):
@@ -77,7 +120,381 @@ class MachineTest(unittest.TestCase):
     self.assertEquals(Mach.a, mach.state)
     self.assertEquals(Mach.b, mach.A())
     self.assertEquals(Mach.b, mach.state)
+
+  def testTransitionTable(self):
+    class Mach(machine.Machine):
+      a = machine.State()
+      b = machine.State()
+      c = machine.State()
+
+      A = machine.Transition({
+        (a, b): c,
+      })
+      B = machine.Transition({
+        c: a,
+      })
+
+    self.assertEqual((Mach.a, Mach.b, Mach.c), Mach.states())
+    self.assertEqual(2, Mach.state_id(Mach.c))
+    self.assertEqual(0, Mach.transition_id('A'))
+    self.assertEqual(1, Mach.transition_id('B'))
+    self.assertIsNone(Mach.transition_id('C'))
+    self.assertEqual([2, 2, -1, -1, -1, 0], list(Mach.transition_table()))
+    self.assertEqual(Mach.c, Mach.next_state_from(0, Mach.b))
+    self.assertIsNone(Mach.next_state_from(1, Mach.b))
+
+    mach = Mach()
+    self.assertEqual(Mach.c, mach.A())
+    self.assertIsNone(mach.A.next_state)
+    self.assertEqual(Mach.a, mach.B())
+
+  def testTransitionToOtherMachine(self):
+    class Other(machine.Machine):
+      x = machine.State()
+
+    class Mach(machine.Machine):
+      a = machine.State()
+
+      A = machine.Transition({a: Other.x})
+
+    self.assertEqual((Mach.a, Other.x), Mach.states())
+    self.assertEqual(Other.x, Mach().A())
+    self.assertIsNone(Other.state_id(Mach.a))
+
+  def testDuplicateFromState(self):
+    a = machine.State()
+    self.assertRaises(AssertionError, machine.Transition, [(a, a), ((a,), a)])
+
+  def testTransitionsBoundLazily(self):
+    class Mach(machine.Machine):
+      a = machine.State()
+      b = machine.State()
+
+      A = machine.Transition({a: b})
+
+    mach = Mach()
+    self.assertNotIn('A', vars(mach))
+    self.assertIsInstance(Mach.A, machine.Transition)
+    self.assertEqual('A', Mach.A.name)
+    transitioner = mach.A
+    self.assertIsInstance(transitioner, machine.Transitioner)
+    self.assertIs(mach, transitioner.machine)
+    self.assertIs(Mach.A, transitioner.transition)
+    self.assertEqual(Mach.b, transitioner())
+
+  def testInheritedTransition(self):
+    class Mach(machine.Machine):
+      a = machine.State()
+      b = machine.State()
+
+      A = machine.Transition({a: b})
+
+    class SubMach(Mach):
+      pass
+
+    mach = SubMach()
+    mach.state = Mach.a
+    self.assertEqual(Mach.b, mach.A())
     
 
+  def testTransitionDoesNotKeepSubclass(self):
+    class Mach(machine.Machine):
+      a = machine.State()
+      b = machine.State()
+
+      A = machine.Transition({a: b})
+
+    class SubMach(Mach):
+      pass
+
+    mach = SubMach()
+    mach.state = Mach.a
+    mach.A()
+    subclass = weakref.ref(SubMach)
+    del mach, SubMach
+    gc.collect()
+    self.assertIsNone(subclass())
+
+  def testIllegalTransition(self):
+    mach = Door()
+    mach.state = Door.opened
+    self.assertRaises(machine.IllegalStateTransition, mach.open)
+    self.assertEqual(Door.opened, mach.state)
+
+
+class RunTest(unittest.TestCase):
+
+  def testIterRun(self):
+    mach = Door()
+    states = mach.iter_run(['open', 'close', Door.transition_id('lock')])
+    self.assertEqual(Door.closed, mach.state)
+    self.assertEqual([Door.opened, Door.closed, Door.locked], list(states))
+    self.assertEqual(Door.locked, mach.state)
+
+  def testRun(self):
+    mach = Door()
+    self.assertEqual(Door.closed, mach.run(['open', 'close']))
+    self.assertEqual(Door.closed, mach.state)
+    self.assertEqual(Door.closed, mach.run([]))
+
+  def testRaise(self):
+    mach = Door()
+    states = mach.iter_run(['open', 'lock', 'close'])
+    self.assertEqual(Door.opened, next(states))
+    self.assertRaises(machine.IllegalStateTransition, next, states)
+    self.assertEqual(Door.opened, mach.state)
+
+  def testSkip(self):
+    mach = Door()
+    self.assertEqual([Door.opened, Door.closed],
+                     list(mach.iter_run(['open', 'lock', 'close'], 'skip')))
+
+  def testStop(self):
+    mach = Door()
+    events = iter(['open', 'lock', 'close'])
+    self.assertEqual(Door.opened, mach.run(events, on_illegal='stop'))
+    self.assertEqual(['close'], list(events))
+
+  def testUnknownPolicy(self):
+    self.assertRaises(ValueError, Door().run, [], 'ignore')
+
+  def testUnknownTransition(self):
+    self.assertRaises(KeyError, Door().run, ['unknown'])
+    self.assertRaises(IndexError, Door().run, [3])
+
+  def testStateChangedBetweenEvents(self):
+    mach = Door()
+    states = mach.iter_run(['open', 'open'])
+    self.assertEqual(Door.opened, next(states))
+    mach.state = Door.closed
+    self.assertEqual(Door.opened, next(states))
+
+  def testNoState(self):
+    mach = Door()
+    del mach.state
+    self.assertRaises(machine.IllegalStateTransition, mach.run, ['open'])
+    self.assertIsNone(mach.run(['open'], 'skip'))
+
+
+@unittest.skipIf(numpy is None, 'Requires NumPy')
+class MachineArrayTest(unittest.TestCase):
+
+  def setUp(self):
+    self.doors = machine.MachineArray(Door, 4)
+
+  def testInitialState(self):
+    self.assertEqual(4, len(self.doors))
+    self.assertEqual([0, 0, 0, 0], self.doors.state_ids.tolist())
+    self.assertEqual(Door.closed, self.doors[0])
+    self.assertEqual([True] * 4, self.doors.in_state(Door.closed).tolist())
+
+    class Empty(machine.Machine):
+      pass
+
+    empty = machine.MachineArray(Empty, 2)
+    self.assertEqual([-1, -1], empty.state_ids.tolist())
+    self.assertIsNone(empty[0])
+
+  def testFireByName(self):
+    self.doors.state_ids[1] = Door.state_id(Door.opened)
+    invalid = self.doors.fire('open')
+    self.assertEqual([False, True, False, False], invalid.tolist())
+    self.assertEqual([Door.opened] * 4, [self.doors[i] for i in range(4)])
+    self.assertEqual([True] * 4, self.doors.fire('lock').tolist())
+    self.assertEqual([True] * 4, self.doors.in_state(Door.opened).tolist())
+
+  def testFireById(self):
+    self.doors.fire(Door.transition_id('lock'))
+    self.assertEqual([Door.locked] * 4, [self.doors[i] for i in range(4)])
+    self.assertRaises(IndexError, self.doors.fire, 3)
+    self.assertRaises(IndexError, self.doors.fire, -1)
+    self.assertRaises(KeyError, self.doors.fire, 'unknown')
+
+  def testFirePerRow(self):
+    open_id = Door.transition_id('open')
+    close_id = Door.transition_id('close')
+    lock_id = Door.transition_id('lock')
+    ids = numpy.array([open_id, close_id, lock_id, -1])
+    self.assertEqual([1, -1, 2, 0], self.doors.next_state_ids(ids).tolist())
+    self.assertEqual([0, 0, 0, 0], self.doors.state_ids.tolist())
+    invalid = self.doors.fire(ids)
+    self.assertEqual([False, True, False, False], invalid.tolist())
+    self.assertEqual([Door.opened, Door.closed, Door.locked, Door.closed],
+                     [self.doors[i] for i in range(4)])
+    self.assertRaises(ValueError, self.doors.fire, [open_id])
+    out_of_range = numpy.array([open_id, lock_id + 1, -1, -1])
+    self.assertRaises(IndexError, self.doors.fire, out_of_range)
+    self.assertRaises(IndexError, self.doors.next_state_ids, out_of_range)
+    self.assertEqual([Door.opened, Door.closed, Door.locked, Door.closed],
+                     [self.doors[i] for i in range(4)])
+
+  def testMatchesMachine(self):
+    names = ['open', 'lock', 'close', 'close', 'open', 'lock']
+    for index, name in enumerate(names):
+      self.doors.state_ids[:] = index % 3
+      mach = Door()
+      mach.state = Door.states()[index % 3]
+      next_state = getattr(mach, name).next_state
+      invalid = self.doors.fire(name)
+      self.assertEqual(next_state is None, invalid[0])
+      if next_state is not None:
+        self.assertEqual(next_state, self.doors[0])
+
+  def testUnsetRows(self):
+    self.doors.state_ids[2] = -1
+    invalid = self.doors.fire('open')
+    self.assertEqual([False, False, True, False], invalid.tolist())
+    self.assertEqual(-1, self.doors.state_ids[2])
+    self.assertEqual([False, False, False, False],
+                     self.doors.fire([-1] * 4).tolist())
+
+
+
+class SchedulerTest(unittest.TestCase):
+
+  def setUp(self):
+    self.clock = Clock()
+    self.scheduler = machine.Scheduler(resolution=1, clock=self.clock)
+
+  def advance(self, seconds):
+    self.clock.now += seconds
+    return self.scheduler.advance()
+
+  def testTimeoutFor(self):
+    self.assertIs(Order.pending_timeout, Order.timeout_for(Order.pending))
+    self.assertIsNone(Order.timeout_for(Order.paid))
+
+  def testTimeout(self):
+    order = Order()
+    self.scheduler.watch(order)
+    self.assertEqual(1, len(self.scheduler))
+    self.assertEqual(0, self.advance(29))
+    self.assertEqual(Order.pending, order.state)
+    self.assertEqual(1, self.advance(1))
+    self.assertEqual(Order.expired, order.state)
+    self.assertEqual(0, len(self.scheduler))
+
+  def testCancelledOnStateChange(self):
+    order = Order()
+    self.scheduler.watch(order)
+    self.advance(10)
+    order.pay()
+    self.assertEqual(0, len(self.scheduler))
+    self.assertEqual(0, self.advance(30))
+    self.assertEqual(Order.paid, order.state)
+
+  def testRearmedOnReentry(self):
+    order = Order()
+    self.scheduler.watch(order)
+    self.advance(30)
+    self.advance(10)
+    order.retry()
+    self.assertEqual(0, self.advance(29))
+    self.assertEqual(Order.pending, order.state)
+    self.advance(1)
+    self.assertEqual(Order.expired, order.state)
+
+  def testRunCancels(self):
+    order = Order()
+    self.scheduler.watch(order)
+    order.run(['pay'])
+    self.assertEqual(0, len(self.scheduler))
+
+  def testDeleteStateCancels(self):
+    order = Order()
+    self.scheduler.watch(order)
+    del order.state
+    self.assertEqual(0, len(self.scheduler))
+
+  def testUnwatch(self):
+    order = Order()
+    self.scheduler.watch(order)
+    self.scheduler.unwatch(order)
+    self.assertEqual(0, len(self.scheduler))
+    order.state = Order.pending
+    self.assertEqual(0, len(self.scheduler))
+
+  def testArm(self):
+    order = Order()
+    timer = self.scheduler.arm(order, 5, 'pay')
+    self.assertTrue(timer.armed)
+    self.assertIs(order, timer.machine)
+    self.advance(5)
+    self.assertFalse(timer.armed)
+    self.assertEqual(Order.paid, order.state)
+
+  def testCancelTimer(self):
+    order = Order()
+    timer = self.scheduler.arm(order, 5, 'pay')
+    timer.cancel()
+    timer.cancel()
+    self.assertFalse(timer.armed)
+    self.assertEqual(0, self.advance(5))
+    self.assertEqual(Order.pending, order.state)
+
+  def testIllegalTransitionIgnored(self):
+    order = Order()
+    order.pay()
+    self.scheduler.arm(order, 1, 'expire')
+    self.assertEqual(1, self.advance(1))
+    self.assertEqual(Order.paid, order.state)
+
+  def testBatchCancelsLaterTimers(self):
+    order = Order()
+    self.scheduler.arm(order, 1, 'pay')
+    self.scheduler.arm(order, 1, 'expire')
+    self.assertEqual(1, self.advance(1))
+    self.assertIn(order.state, (Order.paid, Order.expired))
+    self.assertEqual(0, len(self.scheduler))
+
+  def testManyDeadlines(self):
+    generator = random.Random(0)
+    orders = []
+    for _ in range(2000):
+      order = Order()
+      delay = generator.choice([1, 63, 64, 65, 4095, 4096, 4097,
+                                generator.randrange(1, 300000)])
+      self.scheduler.arm(order, delay, 'pay')
+      orders.append((delay, order))
+    elapsed = 0
+    for step in (1, 62, 1, 1, 1, 4030, 1, 1, 1, 100000, 195900, 10000):
+      elapsed += step
+      self.advance(step)
+      for delay, order in orders:
+        self.assertEqual(delay <= elapsed, order.state is Order.paid,
+                         (delay, elapsed))
+    self.assertEqual(0, len(self.scheduler))
+
+  def testRun(self):
+    scheduler = machine.Scheduler(resolution=0.001)
+    order = Order()
+    scheduler.arm(order, 0.005, 'pay')
+    scheduler.run(0.05)
+    self.assertEqual(Order.paid, order.state)
+
+  def testRunAsync(self):
+    scheduler = machine.Scheduler(resolution=0.001)
+    order = Order()
+    scheduler.arm(order, 0.005, 'pay')
+
+    async def main():
+      task = asyncio.ensure_future(scheduler.run_async())
+      await asyncio.sleep(0.05)
+      scheduler.stop()
+      await task
+
+    asyncio.run(main())
+    self.assertEqual(Order.paid, order.state)
+
+  def testAsyncioImportedLazily(self):
+    result = subprocess.run([sys.executable, '-c', (
+      'import sys\n'
+      'import %s\n'
+      'print("asyncio" in sys.modules)\n' % machine.__name__)],
+      env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+      check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    self.assertEqual('False', result.stdout.strip())
+
+
 if __name__ == '__main__':
   unittest.main()
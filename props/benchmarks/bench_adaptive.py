@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Validation cost of adaptively reordered operands.
+
+An expensive check that almost always passes is written before a cheap check
+that rejects most values.  Compares the written order with the order an
+adaptive validator learns and freezes.
+
+  PYTHONPATH=src python benchmarks/bench_adaptive.py
+"""
+
+import timeit
+
+from sordid import props
+
+
+NUMBER = 100000
+
+
+@props.Validator
+def check_digit(value):
+  return sum(int(digit) for digit in str(abs(value))) % 10 != 3
+
+
+def main():
+  values = list(range(-500, 500))
+  written = check_digit & (props.CMP >= 0)
+  learning = props.adaptive(written)
+  for value in values * 10:
+    learning(value)
+  validators = [
+    ('written', written.compile()),
+    ('learning', props.adaptive(written)),
+    ('frozen', learning.freeze().compile()),
+  ]
+  for name, validator in validators:
+    seconds = timeit.timeit('for value in values: validate(value)',
+                            globals={'values': values, 'validate': validator},
+                            number=NUMBER // len(values))
+    print('%-10s %8.1f ns/value' % (name, seconds / NUMBER * 1e9))
+
+
+if __name__ == '__main__':
+  main()
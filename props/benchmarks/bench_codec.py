@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Throughput of encoding and decoding HasProps instances with a Codec.
+
+Compares a reflective encoder, which walks 'prop_names' and reads each
+property through its descriptor, against the compiled Codec.
+
+  PYTHONPATH=src python benchmarks/bench_codec.py
+"""
+
+import io
+import json
+import timeit
+
+from sordid import props
+
+
+COUNT = 100000
+
+
+class Record(props.HasProps, init=True):
+  id = props.StrictProperty(int)
+  name = props.StrictProperty(str)
+  score = props.StrictProperty(float)
+  active = props.StrictProperty(bool)
+
+
+def reflect_to_dict(instance):
+  result = {}
+  for name in instance.prop_names():
+    try:
+      result[name] = getattr(instance, name)
+    except AttributeError:
+      pass
+  return result
+
+
+def reflect_from_dict(cls, data):
+  instance = cls()
+  for name, value in data.items():
+    setattr(instance, name, value)
+  return instance
+
+
+def report(label, seconds):
+  print('%-28s %7.1f ns/instance' % (label, seconds / COUNT * 1e9))
+
+
+def main():
+  records = [Record(id=index, name='name', score=0.5, active=True)
+             for index in range(COUNT)]
+  codec = props.Codec(Record)
+  unsafe = props.Codec(Record, unsafe=True)
+
+  report('reflect to_dict', timeit.timeit(
+    lambda: [reflect_to_dict(record) for record in records], number=1))
+  report('codec to_dict', timeit.timeit(
+    lambda: list(codec.iter_dicts(records)), number=1))
+
+  dicts = list(codec.iter_dicts(records))
+  report('reflect from_dict', timeit.timeit(
+    lambda: [reflect_from_dict(Record, data) for data in dicts], number=1))
+  report('codec from_dicts', timeit.timeit(
+    lambda: list(codec.from_dicts(dicts)), number=1))
+  report('unsafe codec from_dicts', timeit.timeit(
+    lambda: list(unsafe.from_dicts(dicts)), number=1))
+
+  report('reflect json dump', timeit.timeit(
+    lambda: [json.dumps(reflect_to_dict(record)) for record in records],
+    number=1))
+  text = io.StringIO()
+  report('codec dump_json', timeit.timeit(
+    lambda: codec.dump_json(records, text), number=1))
+  for label, decoder in (('codec load_json', codec),
+                         ('unsafe codec load_json', unsafe)):
+    report(label, timeit.timeit(
+      lambda: list(decoder.load_json(io.StringIO(text.getvalue()))),
+      number=1))
+
+  out = io.BytesIO()
+  report('codec dump_bytes', timeit.timeit(
+    lambda: codec.dump_bytes(records, out), number=1))
+  print('%-28s %7.1f bytes/instance' % ('binary size',
+                                        len(out.getvalue()) / COUNT))
+  for label, decoder in (('codec load_bytes', codec),
+                         ('unsafe codec load_bytes', unsafe)):
+    report(label, timeit.timeit(
+      lambda: list(decoder.load_bytes(io.BytesIO(out.getvalue()))), number=1))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Time and memory used to define many nested HasProps sub-classes.
+
+Compares chained property tables against copying the base class's table for
+every sub-class, memory before and after listing the properties of every
+sub-class, and the time to look up a property of the last sub-class.
+Time to define deeply nested classes is mostly spent by 'type' itself.
+
+  PYTHONPATH=src python benchmarks/bench_config.py [N]
+"""
+
+import collections
+import sys
+import time
+import tracemalloc
+
+from sordid import props
+
+
+class CopyingHasProps(props.HasProps):
+  """Configures properties by copying the base table, for comparison."""
+
+  @classmethod
+  def __config_props__(cls, attrs):
+    cls._HasProps__props = collections.ChainMap(dict(cls.props()))
+    for name, value in attrs.items():
+      props.config_prop(cls, name, value)
+
+
+def define_nested(base, count):
+  classes = []
+  cls = base
+  for index in range(count):
+    attrs = {
+      'own_%d' % index: props.Property(),
+      'other_%d' % index: props.StrictProperty(int),
+    }
+    cls = type(base)('Level%d' % index, (cls,), attrs)
+    classes.append(cls)
+  return classes
+
+
+def main():
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+  for base in (CopyingHasProps, props.HasProps):
+    tracemalloc.start()
+    start = time.perf_counter()
+    classes = define_nested(base, count)
+    seconds = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    for cls in classes:
+      list(cls.props())
+    used_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    leaf = classes[-1]
+    assert len(list(leaf.prop_names())) == count * 2
+    start = time.perf_counter()
+    for _ in range(1000):
+      leaf.validate_columns({'own_0': ()})
+    lookup = (time.perf_counter() - start) / 1000
+    print('%-16s %d classes %8.3f s %8.1f KiB %8.1f KiB after props() '
+          '%8.0f ns/lookup' % (base.__name__, count, seconds, size / 1024,
+                               used_size / 1024, lookup * 1e9))
+
+
+if __name__ == '__main__':
+  main()
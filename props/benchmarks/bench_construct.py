@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Cost of constructing HasProps instances.
+
+Compares setting each property through its descriptor against a generated
+__init__ and from_rows.
+
+  PYTHONPATH=src python benchmarks/bench_construct.py
+"""
+
+import timeit
+
+from sordid import props
+
+
+COUNT = 100000
+
+
+class Record(props.HasProps, init=True):
+  id = props.StrictProperty(int)
+  name = props.StrictProperty(str)
+  score = props.ValidatedProperty((props.CMP >= 0) & (props.CMP <= 100))
+
+
+def by_descriptor():
+  for index in range(COUNT):
+    record = Record.__new__(Record)
+    record.id = index
+    record.name = 'name'
+    record.score = 50
+
+
+def by_init():
+  for index in range(COUNT):
+    Record(id=index, name='name', score=50)
+
+
+def by_from_rows():
+  for _ in Record.from_rows((index, 'name', 50) for index in range(COUNT)):
+    pass
+
+
+def main():
+  for benchmark in (by_descriptor, by_init, by_from_rows):
+    seconds = timeit.timeit(benchmark, number=1)
+    print('%-14s %8.1f ns/instance' % (benchmark.__name__,
+                                        seconds / COUNT * 1e9))
+
+
+if __name__ == '__main__':
+  main()
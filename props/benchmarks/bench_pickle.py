@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Payload size and throughput of pickling HasProps instances.
+
+Compares the compact positional form HasProps instances pickle as against
+the default, which pickles the instance '__dict__' keyed by mangled storage
+attribute names.
+
+  PYTHONPATH=src python benchmarks/bench_pickle.py
+"""
+
+import copy
+import pickle
+import timeit
+
+from sordid import props
+
+
+COUNT = 100000
+
+
+class Record(props.HasProps, init=True):
+  id = props.StrictProperty(int)
+  name = props.StrictProperty(str)
+  score = props.ValidatedProperty((props.CMP >= 0) & (props.CMP <= 100))
+
+
+class DefaultRecord(props.Propertied):
+  """Record pickled and copied as other objects are."""
+
+  id = props.StrictProperty(int)
+  name = props.StrictProperty(str)
+  score = props.ValidatedProperty((props.CMP >= 0) & (props.CMP <= 100))
+
+  def __init__(self, id, name, score):
+    self.id = id
+    self.name = name
+    self.score = score
+
+
+def main():
+  for cls in (DefaultRecord, Record):
+    records = [cls(id=index, name='name', score=50) for index in range(COUNT)]
+    payload = pickle.dumps(records, pickle.HIGHEST_PROTOCOL)
+    dumps = timeit.timeit(
+      lambda: pickle.dumps(records, pickle.HIGHEST_PROTOCOL), number=1)
+    loads = timeit.timeit(lambda: pickle.loads(payload), number=1)
+    deepcopy = timeit.timeit(lambda: copy.deepcopy(records[:COUNT // 10]),
+                             number=1)
+    single = pickle.dumps(records[0], pickle.HIGHEST_PROTOCOL)
+    print('%-14s %4d bytes alone  %5.1f bytes/instance in list  '
+          'dumps %6.1f ns  loads %6.1f ns  deepcopy %6.1f ns' % (
+            cls.__name__, len(single), len(payload) / COUNT,
+            dumps / COUNT * 1e9, loads / COUNT * 1e9,
+            deepcopy / (COUNT // 10) * 1e9))
+
+
+if __name__ == '__main__':
+  main()
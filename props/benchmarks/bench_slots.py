@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Memory used per instance by dict and slots backed HasProps classes.
+
+  PYTHONPATH=src python benchmarks/bench_slots.py
+"""
+
+import timeit
+import tracemalloc
+
+from sordid import props
+
+
+COUNT = 100000
+
+
+class DictRecord(props.HasProps):
+  id = props.StrictProperty(int)
+  name = props.StrictProperty(str)
+  score = props.StrictProperty(float)
+
+
+class SlotsRecord(props.HasProps, slots=True):
+  id = props.StrictProperty(int)
+  name = props.StrictProperty(str)
+  score = props.StrictProperty(float)
+
+
+def new_records(cls):
+  records = []
+  for index in range(COUNT):
+    record = cls()
+    record.id = index
+    record.name = 'name'
+    record.score = 1.5
+    records.append(record)
+  return records
+
+
+def main():
+  for cls in (DictRecord, SlotsRecord):
+    tracemalloc.start()
+    records = new_records(cls)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    record = records[0]
+    seconds = timeit.timeit('record.score', globals={'record': record},
+                            number=COUNT * 10)
+    print('%-12s %6.1f bytes/instance %6.1f ns/get' % (
+      cls.__name__, size / COUNT, seconds / (COUNT * 10) * 1e9))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Per-assignment cost of compiled validators.
+
+Compares assigning through a ValidatedProperty whose validator tree is
+compiled against the nested closures the '&' operator used to build, where
+each operand is a further function call.
+
+  PYTHONPATH=src python benchmarks/bench_validators.py
+"""
+
+import timeit
+
+from sordid import props
+
+
+NUMBER = 200000
+
+
+def new_validator():
+  return ((props.CMP >= 0) & (props.CMP <= 100) &
+          props.type_validator(int))
+
+
+def closure_and(first, second):
+  def and_validator(value):
+    return first(value) and second(value)
+  return and_validator
+
+
+def closure_type_validator(property_type):
+  def type_validator_impl(value):
+    if not isinstance(value, property_type):
+      raise TypeError('Property must be type %s' % property_type.__name__)
+    return True
+  return type_validator_impl
+
+
+def new_closure_validator():
+  return closure_and(closure_and(lambda value: value >= 0,
+                                 lambda value: value <= 100),
+                     closure_type_validator(int))
+
+
+def main():
+  class Closures(props.Propertied):
+    value = props.ValidatedProperty(new_closure_validator())
+
+  class Compiled(props.Propertied):
+    value = props.ValidatedProperty(new_validator())
+
+  for cls in (Closures, Compiled):
+    instance = cls()
+    seconds = timeit.timeit('instance.value = 50',
+                            globals={'instance': instance},
+                            number=NUMBER)
+    print('%-12s %8.1f ns/set' % (cls.__name__, seconds / NUMBER * 1e9))
+
+  seconds = timeit.timeit(
+    'class Definition(props.Propertied):\n'
+    '  value = props.ValidatedProperty(new_validator())',
+    globals={'props': props, 'new_validator': new_validator}, number=2000)
+  print('%-12s %8.1f us/class' % ('Definition', seconds / 2000 * 1e6))
+
+
+if __name__ == '__main__':
+  main()
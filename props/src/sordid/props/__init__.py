@@ -17,6 +17,11 @@
 
 import pkg_resources
 
+from .propcodec import *
+from .propcolumns import *
+from .propcompile import *
+from .propdiff import *
+from .propshared import *
 from .proputils import *
 from .propval import *
 
@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import struct
+
+from . import propcolumns
+from . import propcompile
+from . import proputils
+
+
+__all__ = [
+  'Codec',
+]
+
+
+def _write_varint(out, number):
+  while number > 0x7f:
+    out.append((number & 0x7f) | 0x80)
+    number >>= 7
+  out.append(number)
+
+
+def _read_varint(data, offset):
+  number = 0
+  shift = 0
+  while True:
+    byte = data[offset]
+    offset += 1
+    number |= (byte & 0x7f) << shift
+    if byte < 0x80:
+      return number, offset
+    shift += 7
+
+
+_INT64 = struct.Struct('<q')
+_FLOAT64 = struct.Struct('<d')
+_BOOL = struct.Struct('<b')
+
+_FIXED_WIDTH = {'b': _BOOL, 'q': _INT64, 'd': _FLOAT64}
+
+# Fixed width int value that is followed by the tagged encoding of a value
+# that does not fit, or is a bool.
+_INT64_ESCAPE = -0x8000000000000000
+
+
+def _encode_value(out, value):
+  """Append tagged encoding of a value of any supported type."""
+  if value is None:
+    out += b'N'
+  elif value is True:
+    out += b'T'
+  elif value is False:
+    out += b'F'
+  elif type(value) is int:
+    if -0x8000000000000000 <= value <= 0x7fffffffffffffff:
+      out += b'i'
+      out += _INT64.pack(value)
+    else:
+      encoded = value.to_bytes((value.bit_length() + 8) // 8, 'little',
+                               signed=True)
+      out += b'I'
+      _write_varint(out, len(encoded))
+      out += encoded
+  elif type(value) is float:
+    out += b'd'
+    out += _FLOAT64.pack(value)
+  elif type(value) is str:
+    encoded = value.encode('utf-8')
+    out += b's'
+    _write_varint(out, len(encoded))
+    out += encoded
+  elif type(value) is bytes:
+    out += b'b'
+    _write_varint(out, len(value))
+    out += value
+  elif type(value) in (list, tuple):
+    out += b'l' if type(value) is list else b't'
+    _write_varint(out, len(value))
+    for item in value:
+      _encode_value(out, item)
+  elif type(value) is dict:
+    out += b'm'
+    _write_varint(out, len(value))
+    for key, item in value.items():
+      _encode_value(out, key)
+      _encode_value(out, item)
+  else:
+    raise TypeError('Can not encode value of type \'%s\'' %
+                    type(value).__name__)
+
+
+def _decode_value(data, offset):
+  """Decode tagged value.
+
+  Returns:
+    Tuple (value, offset after value).
+  """
+  tag = data[offset]
+  offset += 1
+  if tag == 0x4e:  # N
+    return None, offset
+  elif tag == 0x54:  # T
+    return True, offset
+  elif tag == 0x46:  # F
+    return False, offset
+  elif tag == 0x69:  # i
+    return _INT64.unpack_from(data, offset)[0], offset + 8
+  elif tag == 0x64:  # d
+    return _FLOAT64.unpack_from(data, offset)[0], offset + 8
+  elif tag in (0x49, 0x73, 0x62):  # I, s, b
+    length, offset = _read_varint(data, offset)
+    end = offset + length
+    raw = bytes(data[offset:end])
+    if tag == 0x49:
+      return int.from_bytes(raw, 'little', signed=True), end
+    elif tag == 0x73:
+      return raw.decode('utf-8'), end
+    return raw, end
+  elif tag in (0x6c, 0x74):  # l, t
+    count, offset = _read_varint(data, offset)
+    items = []
+    for _ in range(count):
+      item, offset = _decode_value(data, offset)
+      items.append(item)
+    return (items if tag == 0x6c else tuple(items)), offset
+  elif tag == 0x6d:  # m
+    count, offset = _read_varint(data, offset)
+    mapping = {}
+    for _ in range(count):
+      key, offset = _decode_value(data, offset)
+      mapping[key], offset = _decode_value(data, offset)
+    return mapping, offset
+  raise ValueError('Unknown value tag %r at offset %d' % (chr(tag),
+                                                          offset - 1))
+
+
+class Codec:
+  """Encoder and decoder of the instances of a HasProps class.
+
+  Encoding functions are compiled once from the class's property table, so
+  that properties are read straight from their storage attributes rather than
+  by reflection.  Records are encoded as dictionaries, JSON text or a compact
+  binary format, and may be streamed:
+
+    codec = Codec(Reading)
+    text = codec.to_json(reading)
+    reading = codec.from_json(text)
+
+    with open('readings.bin', 'wb') as out:
+      codec.dump_bytes(readings, out)
+
+  Only properties that are set are encoded, and computed properties are not
+  encoded.  By default decoding sets properties as 'HasProps.from_rows'
+  does, so values are validated.  A codec created with 'unsafe=True' trusts
+  its input and stores values without validation, which is faster but must
+  only be used for data the codec itself encoded.
+
+  In the binary format, each record is a bitmap of which properties are set
+  followed by their values.  StrictProperty of bool, int and float are
+  stored at fixed width, except that ints that do not fit in 64 bits and
+  bools of int properties are tagged after a marker value.  Other values are
+  tagged with their type and may be None, bool, int, float, str, bytes, or
+  lists, tuples and dictionaries of these.
+  """
+
+  def __init__(self, cls, unsafe=False):
+    """Constructor.
+
+    Args:
+      cls: HasProps class to encode and decode.
+      unsafe: When True values are not validated when decoded.
+    """
+    self.__cls = cls
+    self.__unsafe = unsafe
+    props = propcompile.init_props(cls.props())
+    self.__names = [name for name, prop in props]
+    attributes = [getattr(prop, 'attribute_name', name)
+                  for name, prop in props]
+
+    compiler = propcompile.ValidatorCompiler()
+    body = ['try:',
+            '  return {%s}' % ', '.join('%r: self.%s' % (name, attribute)
+                                        for name, attribute in
+                                        zip(self.__names, attributes)),
+            'except AttributeError:',
+            '  pass',
+            'result = {}']
+    for name, attribute in zip(self.__names, attributes):
+      body.extend(['try:',
+                   '  result[%r] = self.%s' % (name, attribute),
+                   'except AttributeError:',
+                   '  pass'])
+    body.append('return result')
+    self.__to_dict = compiler.function('to_dict', ['self'], body)
+
+    compiler = propcompile.ValidatorCompiler()
+    body = ['return (%s)' % ' '.join(
+      'getattr(self, %r, %s),' % (attribute,
+                                  compiler.constant(proputils.DELETED))
+      for attribute in attributes)]
+    self.__values = compiler.function('values', ['self'], body)
+
+    bypass_setattr = cls.__setattr__ is not object.__setattr__
+    self.__restore = propcompile.compile_restore(
+      props, proputils.DELETED, bypass_setattr)
+    # Stores values passed as keywords without validation.
+    self.__load = propcompile.compile_init(
+      props, name='load', bypass_setattr=bypass_setattr, validate=False,
+      ignore_unknown=True)
+
+    self.__structs = []
+    for name, prop in props:
+      typecode = propcolumns.column_typecode(prop)
+      if typecode is None:
+        self.__structs.append(None)
+      else:
+        self.__structs.append(_FIXED_WIDTH[typecode])
+    self.__bitmap_size = (len(props) + 7) // 8
+    # Unsafe codecs restore tuples of values, others validate rows of the
+    # values that are set.
+    self.__decode = self.__compile_decode(as_row=not unsafe)
+
+  def __compile_decode(self, as_row):
+    compiler = propcompile.ValidatorCompiler()
+    deleted = compiler.constant(proputils.DELETED)
+    decode_value = compiler.constant(_decode_value)
+    body = ['b%d = data[offset + %d]' % (index, index)
+            for index in range(self.__bitmap_size)]
+    body.append('offset += %d' % self.__bitmap_size)
+    if as_row:
+      body.append('row = {}')
+    values = []
+    for index, unpacker in enumerate(self.__structs):
+      value = 'v%d' % index
+      values.append(value)
+      body.append('if b%d & %d:' % (index >> 3, 1 << (index & 7)))
+      if unpacker is None:
+        body.append('  %s, offset = %s(data, offset)' % (value, decode_value))
+      else:
+        body.extend([
+          '  %s, = %s(data, offset)' % (
+            value, compiler.constant(unpacker.unpack_from)),
+          '  offset += %d' % unpacker.size])
+        if unpacker is _BOOL:
+          body.append('  %s = %s != 0' % (value, value))
+        elif unpacker is _INT64:
+          body.extend([
+            '  if %s == %d:' % (value, _INT64_ESCAPE),
+            '    %s, offset = %s(data, offset)' % (value, decode_value)])
+      if as_row:
+        body.append('  row[%r] = %s' % (self.__names[index], value))
+      else:
+        body.extend(['else:',
+                     '  %s = %s' % (value, deleted)])
+    if as_row:
+      body.append('return row, offset')
+    else:
+      body.append('return (%s), offset' % ' '.join(
+        value + ',' for value in values))
+    return compiler.function('decode', ['data', 'offset'], body)
+
+  @property
+  def cls(self):
+    """Class of encoded records."""
+    return self.__cls
+
+  @property
+  def unsafe(self):
+    """Whether values are decoded without validation."""
+    return self.__unsafe
+
+  def to_dict(self, instance):
+    """Dictionary of the properties of an instance that are set."""
+    return self.__to_dict(instance)
+
+  def from_dict(self, data):
+    """Create instance from dictionary of property values.
+
+    Raises:
+      TypeError: When 'data' has a key that is not a property, unless the
+        codec is unsafe in which case unknown keys are ignored.
+    """
+    if self.__unsafe:
+      cls = self.__cls
+      instance = cls.__new__(cls)
+      self.__load(instance, **data)
+      return instance
+    for instance in self.__cls.from_rows((data,)):
+      return instance
+
+  def iter_dicts(self, instances):
+    """Iterator of dictionaries of many instances."""
+    to_dict = self.__to_dict
+    for instance in instances:
+      yield to_dict(instance)
+
+  def from_dicts(self, dicts):
+    """Iterator of instances created from many dictionaries."""
+    if self.__unsafe:
+      cls = self.__cls
+      new = cls.__new__
+      load = self.__load
+      for data in dicts:
+        instance = new(cls)
+        load(instance, **data)
+        yield instance
+    else:
+      yield from self.__cls.from_rows(dicts)
+
+  def to_json(self, instance):
+    """JSON text of an instance."""
+    return json.dumps(self.__to_dict(instance))
+
+  def from_json(self, text):
+    """Create instance from JSON text."""
+    return self.from_dict(json.loads(text))
+
+  def dump_json(self, instances, file):
+    """Write instances to text file as JSON, one per line."""
+    encode = json.JSONEncoder().encode
+    to_dict = self.__to_dict
+    for instance in instances:
+      file.write(encode(to_dict(instance)))
+      file.write('\n')
+
+  def load_json(self, lines):
+    """Iterator of instances read from JSON lines.
+
+    Args:
+      lines: Iterable of lines as written by 'dump_json', such as a text file.
+        Blank lines are skipped.
+    """
+    decode = json.JSONDecoder().decode
+    return self.from_dicts(decode(line) for line in lines if line.strip())
+
+  def __encode(self, out, instance):
+    bitmap_offset = len(out)
+    out += bytes(self.__bitmap_size)
+    for index, (value, packer) in enumerate(
+        zip(self.__values(instance), self.__structs)):
+      if value is proputils.DELETED:
+        continue
+      out[bitmap_offset + (index >> 3)] |= 1 << (index & 7)
+      if packer is None:
+        _encode_value(out, value)
+      elif packer is _INT64 and (
+          type(value) is bool or
+          not _INT64_ESCAPE < value <= 0x7fffffffffffffff):
+        out += _INT64.pack(_INT64_ESCAPE)
+        _encode_value(out, value if type(value) is bool else int(value))
+      else:
+        out += packer.pack(value)
+
+  def __instance(self, decoded):
+    cls = self.__cls
+    if self.__unsafe:
+      instance = cls.__new__(cls)
+      self.__restore(instance, decoded)
+      return instance
+    for instance in cls.from_rows((decoded,)):
+      return instance
+
+  def to_bytes(self, instance):
+    """Binary encoding of an instance."""
+    out = bytearray()
+    self.__encode(out, instance)
+    return bytes(out)
+
+  def from_bytes(self, data):
+    """Create instance from binary encoding.
+
+    Raises:
+      ValueError: When 'data' has bytes left over after the record.
+    """
+    decoded, offset = self.__decode(data, 0)
+    if offset != len(data):
+      raise ValueError('Unexpected data after record')
+    return self.__instance(decoded)
+
+  def dump_bytes(self, instances, file):
+    """Write instances to binary file, each prefixed by its length."""
+    out = bytearray()
+    record = bytearray()
+    for instance in instances:
+      del record[:]
+      self.__encode(record, instance)
+      _write_varint(out, len(record))
+      out += record
+      if len(out) >= 0x10000:
+        file.write(out)
+        del out[:]
+    file.write(out)
+
+  def __records(self, file):
+    buffer = bytearray()
+    offset = 0
+    while True:
+      chunk = file.read(0x10000)
+      buffer += chunk
+      while True:
+        try:
+          length, start = _read_varint(buffer, offset)
+        except IndexError:
+          break
+        end = start + length
+        if end > len(buffer):
+          break
+        decoded, decoded_end = self.__decode(buffer, start)
+        if decoded_end != end:
+          raise ValueError('Record length does not match its contents')
+        yield decoded
+        offset = end
+      if not chunk:
+        if offset != len(buffer):
+          raise ValueError('Truncated record')
+        return
+      del buffer[:offset]
+      offset = 0
+
+  def load_bytes(self, file):
+    """Iterator of instances read from binary file written by 'dump_bytes'.
+
+    The file is read in chunks, so it may be larger than memory.
+    """
+    records = self.__records(file)
+    if self.__unsafe:
+      cls = self.__cls
+      new = cls.__new__
+      restore = self.__restore
+      for values in records:
+        instance = new(cls)
+        restore(instance, values)
+        yield instance
+    else:
+      yield from self.__cls.from_rows(records)
@@ -0,0 +1,397 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import array
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+from . import propcompile
+from . import propval
+
+
+__all__ = [
+  'column_typecode',
+  'ColumnStore',
+]
+
+
+# Array type codes for property types with a fixed width representation.
+TYPECODES = {
+  bool: 'b',
+  int: 'q',
+  float: 'd',
+}
+
+
+# Range of integers that fit in a 'q' column.
+_INT64_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+def _fits_column(typecode, value):
+  """Whether a typed column stores a value without changing it.
+
+  Bools in int columns and NumPy scalars are stored when the column holds
+  their value exactly.  They are read back as the column's Python type.
+  """
+  if typecode == 'q':
+    if type(value) is not int and type(value) is not bool:
+      if numpy is None or not isinstance(value, numpy.integer):
+        return False
+      value = int(value)
+    return value in _INT64_RANGE
+  elif typecode == 'd':
+    if type(value) is float:
+      return True
+    if numpy is None or not isinstance(value, numpy.floating):
+      return False
+    converted = float(value)
+    return converted == value or value != value
+  return True
+
+
+def column_typecode(prop):
+  """Array type code used to store a property or None if not fixed width.
+
+  Args:
+    prop: Property descriptor.
+
+  Returns:
+    Type code for 'array.array' if 'prop' is a StrictProperty of a type with a
+    fixed width representation, else None.
+  """
+  if isinstance(prop, propval.StrictProperty):
+    return TYPECODES.get(prop.property_type)
+  return None
+
+
+class _ColumnSlot:
+  """Stands in for the storage attribute of a property on row views."""
+
+  def __init__(self, index):
+    self.__index = index
+
+  def __get__(self, row, owner):
+    if row is None:
+      return self
+    return row._Row__store._get(self.__index, row._Row__index)
+
+  def __set__(self, row, value):
+    row._Row__store._set(self.__index, row._Row__index, value)
+
+  def __delete__(self, row):
+    row._Row__store._delete(self.__index, row._Row__index)
+
+
+def row_class(cls, slot_factory):
+  """Create row view class for a HasProps class.
+
+  Row views are instances of a generated sub-class of 'cls' whose property
+  storage attributes are replaced with descriptors that read and write a
+  shared store.  The property descriptors themselves are inherited, so
+  assignments to a row are validated exactly as they are for 'cls'.
+
+  Args:
+    cls: HasProps class being viewed.
+    slot_factory: Function that takes the position of a property in
+      'cls.props()' and returns the descriptor to use as its storage.
+
+  Returns:
+    View class whose instances have '_Row__store' and '_Row__index'
+    attributes that must be set before use.
+  """
+  dct = {
+    '__slots__': ('_Row__store', '_Row__index'),
+    '__module__': cls.__module__,
+    '__qualname__': '%s.Row' % cls.__qualname__,
+  }
+  for index, (name, prop) in enumerate(cls.props()):
+    dct[prop.attribute_name] = slot_factory(index)
+  return type(cls)('%sRow' % cls.__name__, (cls,), dct)
+
+
+class ColumnStore:
+  """Columnar store for many instances of a single HasProps class.
+
+  Rather than keeping one Python object per record, each property of the class
+  is kept in its own column.  Properties that are StrictProperty of bool, int
+  or float are stored in typed arrays.  All other properties are stored in
+  lists, as are typed properties once they are set to a value an array would
+  change, such as an int that does not fit in 64 bits or a float subclass.
+  Bools of int properties and NumPy scalars such as numpy.float64 are stored
+  as the column's type when it holds their value exactly.
+
+  Rows are accessed through lightweight views that are instances of a
+  generated sub-class of the stored class, so reading and writing a row goes
+  through the same property descriptors, including their validation:
+
+    class Reading(HasProps):
+      sensor = StrictProperty(str)
+      value = StrictProperty(float)
+
+    readings = ColumnStore(Reading)
+    readings.append(sensor='a', value=1.5)
+    readings.append(sensor='b', value=-2.0)
+    readings[1].value = 'x'  # Raises TypeError
+
+  Whole columns may be scanned, filtered and aggregated at array speed.  When
+  NumPy is installed typed columns are returned as NumPy arrays:
+
+    values = readings.column('value')
+    values.mean()
+    negative = readings.rows(readings.filter_array('value', lambda v: v < 0))
+  """
+
+  def __init__(self, cls):
+    """Constructor.
+
+    Args:
+      cls: HasProps class whose instances are stored.
+    """
+    self.__cls = cls
+    self.__names = []
+    self.__index_by_name = {}
+    self.__typecodes = []
+    self.__columns = []
+    self.__present = []
+    self.__length = 0
+    for index, (name, prop) in enumerate(cls.props()):
+      typecode = column_typecode(prop)
+      self.__names.append(name)
+      self.__index_by_name[name] = index
+      self.__typecodes.append(typecode)
+      if typecode is None:
+        self.__columns.append([])
+      else:
+        self.__columns.append(array.array(typecode))
+      self.__present.append(bytearray())
+    self.__row_class = row_class(cls, _ColumnSlot)
+    # Frozen classes may only be set when rows are created.
+    self.__populate = propcompile.compile_init(
+      cls.props(), name='populate', bypass_setattr=cls._PropertiedType__frozen)
+
+  @property
+  def cls(self):
+    """Class of stored records."""
+    return self.__cls
+
+  def __len__(self):
+    return self.__length
+
+  def _get(self, column, index):
+    if not self.__present[column][index]:
+      raise AttributeError(self.__names[column])
+    value = self.__columns[column][index]
+    if self.__typecodes[column] == 'b':
+      return bool(value)
+    return value
+
+  def _set(self, column, index, value):
+    typecode = self.__typecodes[column]
+    if typecode is not None and not _fits_column(typecode, value):
+      self.__store_in_list(column)
+    self.__columns[column][index] = value
+    self.__present[column][index] = 1
+
+  def __store_in_list(self, column):
+    convert = bool if self.__typecodes[column] == 'b' else None
+    self.__columns[column] = [
+      (convert(value) if convert else value) if flag else None
+      for value, flag in zip(self.__columns[column], self.__present[column])]
+    self.__typecodes[column] = None
+
+  def _delete(self, column, index):
+    if not self.__present[column][index]:
+      raise AttributeError(self.__names[column])
+    self.__present[column][index] = 0
+    if self.__typecodes[column] is None:
+      self.__columns[column][index] = None
+
+  def __row(self, index):
+    row = self.__row_class.__new__(self.__row_class)
+    # Views of frozen classes refuse assignment.
+    object.__setattr__(row, '_Row__store', self)
+    object.__setattr__(row, '_Row__index', index)
+    return row
+
+  def append(self, **values):
+    """Append new row.
+
+    Args:
+      values: Initial values of row properties.  Properties not provided are
+        left unset.
+
+    Returns:
+      View of new row.
+
+    Raises:
+      Whatever the property descriptors raise for invalid values, in which case
+      no row is added.
+    """
+    index = self.__length
+    for typecode, column, present in zip(self.__typecodes, self.__columns,
+                                         self.__present):
+      column.append(None if typecode is None else 0)
+      present.append(0)
+    self.__length += 1
+    row = self.__row(index)
+    try:
+      self.__populate(row, **values)
+    except Exception:
+      self.__truncate(index)
+      raise
+    return row
+
+  def extend(self, rows):
+    """Append many rows.
+
+    Args:
+      rows: Iterable of dictionaries of row values.
+    """
+    for values in rows:
+      self.append(**values)
+
+  def __truncate(self, length):
+    for column, present in zip(self.__columns, self.__present):
+      del column[length:]
+      del present[length:]
+    self.__length = length
+
+  def __getitem__(self, index):
+    if index < 0:
+      index += self.__length
+    if not 0 <= index < self.__length:
+      raise IndexError('Row index out of range')
+    return self.__row(index)
+
+  def __iter__(self):
+    for index in range(self.__length):
+      yield self.__row(index)
+
+  def rows(self, indexes):
+    """Views of rows.
+
+    Args:
+      indexes: Iterable of row indexes.
+
+    Returns:
+      List of row views.
+    """
+    return [self[index] for index in indexes]
+
+  def column(self, name):
+    """Copy of all values of a column.
+
+    Rows where the property is not set hold 0 in typed columns and None in
+    other columns.  Use 'present' to tell them apart.  Typed properties set
+    to values an array would change are stored in a list from then on.
+
+    Args:
+      name: Name of property.
+
+    Returns:
+      NumPy array for typed columns when NumPy is installed, else an
+      'array.array' for typed columns and a list for other columns.
+    """
+    index = self.__index_by_name[name]
+    column = self.__columns[index]
+    typecode = self.__typecodes[index]
+    if typecode is None:
+      return list(column)
+    elif numpy is not None:
+      if typecode == 'b':
+        return numpy.array(column, dtype=numpy.bool_)
+      return numpy.frombuffer(column, dtype=typecode).copy()
+    else:
+      return array.array(typecode, column)
+
+  def present(self, name):
+    """Which rows have a column set.
+
+    Args:
+      name: Name of property.
+
+    Returns:
+      NumPy boolean array when NumPy is installed, else a list of bools.
+    """
+    present = self.__present[self.__index_by_name[name]]
+    if numpy is not None:
+      return numpy.frombuffer(present, dtype=numpy.bool_).copy()
+    return [bool(flag) for flag in present]
+
+  def values(self, name):
+    """Values of a column for all rows where it is set.
+
+    Args:
+      name: Name of property.
+
+    Returns:
+      Same type as returned by 'column'.
+    """
+    index = self.__index_by_name[name]
+    if numpy is not None and self.__typecodes[index] is not None:
+      return self.column(name)[self.present(name)]
+    column = self.column(name)
+    present = self.__present[index]
+    selected = [value for value, flag in zip(column, present) if flag]
+    if isinstance(column, array.array):
+      return array.array(column.typecode, selected)
+    return selected
+
+  def filter(self, name, predicate):
+    """Indexes of rows whose value of a column satisfies a predicate.
+
+    Rows where the property is not set never match.
+
+    Args:
+      name: Name of property.
+      predicate: Function called with each value that is set.
+
+    Returns:
+      List of row indexes.
+    """
+    index = self.__index_by_name[name]
+    column = self.__columns[index]
+    if self.__typecodes[index] == 'b':
+      column = map(bool, column)
+    present = self.__present[index]
+    return [row for row, (value, flag) in enumerate(zip(column, present))
+            if flag and predicate(value)]
+
+  def filter_array(self, name, predicate):
+    """Indexes of rows whose column satisfies a vectorized predicate.
+
+    Rows where the property is not set never match.
+
+    Args:
+      name: Name of property.
+      predicate: Function called once with the whole column as returned by
+        'column' that returns a sequence of one bool per row, such as
+        'lambda v: v > 0' for typed columns when NumPy is installed.
+
+    Returns:
+      NumPy array of row indexes when NumPy is installed, else a list.
+    """
+    mask = predicate(self.column(name))
+    if numpy is not None:
+      mask = numpy.asarray(mask, dtype=numpy.bool_)
+      return numpy.flatnonzero(mask & self.present(name))
+    present = self.__present[self.__index_by_name[name]]
+    return [row for row, (match, flag) in enumerate(zip(mask, present))
+            if flag and match]
@@ -0,0 +1,450 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+__all__ = [
+  'ValidatorCompiler',
+  'compile_validator',
+  'compile_init',
+]
+
+
+class ValidatorCompiler:
+  """Compiles a validator tree in to a single Python function.
+
+  Validators built with the '&', '|' and '~' operators form a tree of nested
+  validator objects, each of which costs at least one Python call when
+  evaluated.  The compiler walks the tree once and emits the source of a single
+  function where each node is replaced by an inline expression.
+
+  Nodes participate in compilation by implementing:
+
+    def __compile_validator__(self, compiler, value):
+      return <expression source>
+
+  where 'value' is the source of the expression holding the value being
+  validated.  Any object the expression needs to refer to is bound in to
+  the generated function's namespace using 'constant'.  Callables without a
+  '__compile_validator__' method are compiled as a plain call.
+
+  A compiler that is not 'raising' builds functions used to collect errors
+  rather than to guard assignments.  Nodes that raise on invalid values, such
+  as type validators, should emit an expression that is false instead.
+  """
+
+  def __init__(self, raising=True, bypass_setattr=False, reserved=()):
+    """Constructor.
+
+    Args:
+      raising: Whether nodes may raise for invalid values.
+      bypass_setattr: Whether attributes are stored with 'object.__setattr__'
+        rather than assignment, for classes that override '__setattr__'.
+      reserved: Names used by the compiled source, such as parameter names,
+        that constants must not be bound to.
+    """
+    self.__namespace = {}
+    self.__names_by_id = {}
+    self.__reserved = frozenset(reserved)
+    self.__raising = raising
+    self.__bypass_setattr = bypass_setattr
+
+  @property
+  def raising(self):
+    """Whether nodes may raise for invalid values."""
+    return self.__raising
+
+  def constant(self, value):
+    """Bind an object in to the namespace of the compiled function.
+
+    Args:
+      value: Any object referred to by compiled source.
+
+    Returns:
+      Name the object is bound to in the compiled function.
+    """
+    try:
+      return self.__names_by_id[id(value)]
+    except KeyError:
+      name = '_c%d' % len(self.__names_by_id)
+      while name in self.__reserved:
+        name = '_' + name
+      self.__names_by_id[id(value)] = name
+      self.__namespace[name] = value
+      return name
+
+  def call(self, func, value):
+    """Source for calling a function on a value.
+
+    Args:
+      func: Function to call.
+      value: Source of the expression being passed to 'func'.
+
+    Returns:
+      Expression source.
+    """
+    return '%s(%s)' % (self.constant(func), value)
+
+  def expression(self, validator, value='value'):
+    """Source for a validator expression.
+
+    Args:
+      validator: Validator or validator function to compile.
+      value: Source of the expression being validated.
+
+    Returns:
+      Expression source.
+    """
+    try:
+      compile_validator = validator.__compile_validator__
+    except AttributeError:
+      return self.call(validator, value)
+    else:
+      return compile_validator(self, value)
+
+  def store(self, instance, name, value):
+    """Source for storing an attribute.
+
+    Args:
+      instance: Source of the expression holding the instance.
+      name: Name of attribute.
+      value: Source of the expression holding the new value.
+
+    Returns:
+      Statement source.
+    """
+    if self.__bypass_setattr:
+      return '%s(%s, %r, %s)' % (self.constant(object.__setattr__), instance,
+                                 name, value)
+    return '%s.%s = %s' % (instance, name, value)
+
+  def init_statements(self, name, prop, instance, value):
+    """Source for setting a property on a newly created instance.
+
+    Properties participate by implementing:
+
+      def __compile_init__(self, compiler, instance, value):
+        return [<statement source>, ...]
+
+    Other descriptors are compiled as a call to their '__set__' method, or as
+    a plain attribute assignment if they have none.
+
+    Args:
+      name: Name of property.
+      prop: Property descriptor.
+      instance: Source of the expression holding the new instance.
+      value: Source of the expression holding the new value.
+
+    Returns:
+      List of statement source lines.
+    """
+    try:
+      compile_init = prop.__compile_init__
+    except AttributeError:
+      if hasattr(prop, '__set__'):
+        return ['%s.__set__(%s, %s)' % (self.constant(prop), instance, value)]
+      return [self.store(instance, name, value)]
+    else:
+      return compile_init(self, instance, value)
+
+  def function(self, name, parameters, body):
+    """Build function from source.
+
+    Args:
+      name: Name of the compiled function.
+      parameters: List of parameter source.
+      body: List of statement source lines.
+
+    Returns:
+      Compiled function.
+    """
+    source = 'def %s(%s):\n%s\n' % (
+      name, ', '.join(parameters), '\n'.join('  ' + line for line in body))
+    namespace = dict(self.__namespace)
+    exec(source, namespace)
+    compiled = namespace[name]
+    compiled.__source__ = source
+    return compiled
+
+  def build(self, validator, name='compiled_validator'):
+    """Build function from validator.
+
+    Args:
+      validator: Validator or validator function to compile.
+      name: Name of the compiled function.
+
+    Returns:
+      A function of one parameter equivalent to calling 'validator'.
+    """
+    return self.function(name, ['value'],
+                         ['return %s' % self.expression(validator)])
+
+
+def compile_validator(validator, raising=True):
+  """Compile a validator tree in to a single function.
+
+  Args:
+    validator: Validator or validator function to compile.
+    raising: Whether nodes may raise for invalid values.  When False, nodes
+      that would raise return false instead.
+
+  Returns:
+    A function of one parameter equivalent to calling 'validator'.
+  """
+  return ValidatorCompiler(raising).build(validator)
+
+
+# Default for properties not passed to a compiled initializer.
+_UNSET = object()
+
+
+def init_props(props):
+  """Properties that are set by compiled initializers.
+
+  Properties whose '__compile_init__' is None, such as computed properties,
+  can not be set and are left out.
+
+  Args:
+    props: Iterable of (name, property) pairs.
+
+  Returns:
+    List of (name, property) pairs in the same order.
+  """
+  return [(name, prop) for name, prop in props
+          if getattr(prop, '__compile_init__', True) is not None]
+
+
+def compile_init(props, name='__init__', keyword_only=True,
+                 bypass_setattr=False, validate=True, ignore_unknown=False):
+  """Compile function that initializes properties of a new instance.
+
+  The compiled function takes the instance followed by one optional parameter
+  per property, except those left out by 'init_props'.  Each property that is
+  passed is set as its descriptor would set it, with validation inlined.
+  Properties that are not passed are left unset.
+
+  Args:
+    props: Iterable of (name, property) pairs.
+    name: Name of compiled function.
+    keyword_only: Whether property values must be passed as keywords.
+    bypass_setattr: Whether values are stored with 'object.__setattr__', for
+      classes that override '__setattr__', such as frozen classes.
+    validate: When False, values are stored in the storage attributes of
+      properties without validation, as 'compile_restore' stores them.
+    ignore_unknown: Whether keywords that are not properties are ignored
+      rather than raising TypeError.
+
+  Returns:
+    Compiled function.
+  """
+  props = init_props(props)
+  names = dict(props)
+  instance = 'self'
+  while instance in names:
+    instance = '_' + instance
+  unknown = 'unknown'
+  while unknown in names:
+    unknown = '_' + unknown
+  compiler = ValidatorCompiler(bypass_setattr=bypass_setattr,
+                               reserved=set(names) | {instance, unknown})
+  unset = compiler.constant(_UNSET)
+  parameters = [instance]
+  if keyword_only and props:
+    parameters.append('*')
+  body = []
+  for prop_name, prop in props:
+    parameters.append('%s=%s' % (prop_name, unset))
+    body.append('if %s is not %s:' % (prop_name, unset))
+    if validate:
+      statements = compiler.init_statements(prop_name, prop, instance,
+                                            prop_name)
+    else:
+      statements = [compiler.store(
+        instance, getattr(prop, 'attribute_name', prop_name), prop_name)]
+    body.extend('  ' + line for line in statements)
+  if ignore_unknown:
+    parameters.append('**' + unknown)
+  if not body:
+    body.append('pass')
+  return compiler.function(name, parameters, body)
+
+
+def _key_attributes(props):
+  # Values are read from storage, skipping the descriptors.
+  return [getattr(prop, 'attribute_name', name)
+          for name, prop in init_props(props)]
+
+
+def _key_source(instance, attributes):
+  return '(%s)' % ' '.join('%s.%s,' % (instance, attribute)
+                           for attribute in attributes)
+
+
+def _key_function(attributes, unset=_UNSET):
+
+  def key(instance):
+    return tuple(getattr(instance, attribute, unset)
+                 for attribute in attributes)
+  return key
+
+
+def compile_eq(props):
+  """Compile '__eq__' that compares the values of properties.
+
+  Instances are equal when they are of the same class and each property is
+  either unset on both or set to equal values.  Computed properties are not
+  compared.
+
+  Args:
+    props: Iterable of (name, property) pairs.
+
+  Returns:
+    Compiled function.
+  """
+  attributes = _key_attributes(props)
+  compiler = ValidatorCompiler()
+  key = compiler.constant(_key_function(attributes))
+  return compiler.function('__eq__', ['self', 'other'], [
+    'if other.__class__ is not self.__class__:',
+    '  return NotImplemented',
+    'try:',
+    '  return %s == %s' % (_key_source('self', attributes),
+                           _key_source('other', attributes)),
+    'except AttributeError:',
+    '  return %s(self) == %s(other)' % (key, key),
+  ])
+
+
+def compile_hash(props, cache):
+  """Compile '__hash__' consistent with 'compile_eq'.
+
+  The hash is computed once and cached, so instances must not change once
+  hashed.
+
+  Args:
+    props: Iterable of (name, property) pairs.
+    cache: Name of attribute the hash is cached in.
+
+  Returns:
+    Compiled function.
+  """
+  attributes = _key_attributes(props)
+  compiler = ValidatorCompiler(bypass_setattr=True)
+  key = compiler.constant(_key_function(attributes))
+  return compiler.function('__hash__', ['self'], [
+    'try:',
+    '  return self.%s' % cache,
+    'except AttributeError:',
+    '  pass',
+    'try:',
+    '  result = hash(%s)' % _key_source('self', attributes),
+    'except AttributeError:',
+    '  result = hash(%s(self))' % key,
+    compiler.store('self', cache, 'result'),
+    'return result',
+  ])
+
+
+def compile_state(props, unset):
+  """Compile function that reads the values of properties as a tuple.
+
+  Args:
+    props: Iterable of (name, property) pairs.
+    unset: Value used for properties that are not set.
+
+  Returns:
+    Compiled function that takes an instance and returns a tuple of its
+    property values in the order of 'init_props'.
+  """
+  attributes = _key_attributes(props)
+  compiler = ValidatorCompiler()
+  key = compiler.constant(_key_function(attributes, unset))
+  return compiler.function('state', ['self'], [
+    'try:',
+    '  return %s' % _key_source('self', attributes),
+    'except AttributeError:',
+    '  return %s(self)' % key,
+  ])
+
+
+def compile_reduce(cls, props, reconstruct, fallback, slots=(),
+                   extra_slots=()):
+  """Compile '__reduce_ex__' that pickles property values as a tuple.
+
+  Instances are pickled as 'reconstruct' called with the class, with the
+  tuple of their property values in the order of 'init_props' as their
+  state.  Instances of sub-classes, instances with properties that are not
+  set and instances with other attributes are pickled by 'fallback'.
+
+  Args:
+    cls: Class whose instances are pickled.
+    props: Iterable of (name, property) pairs.
+    reconstruct: Function that creates an instance of a class without
+      initializing it, such as 'copyreg.__newobj__'.
+    fallback: Function that takes an instance and a pickle protocol and
+      returns its pickled form.
+    slots: Names of all slots of 'cls'.
+    extra_slots: Names of slots that do not store property values.
+
+  Returns:
+    Compiled function.
+  """
+  attributes = _key_attributes(props)
+  compiler = ValidatorCompiler()
+  fallback = '  return %s(self, protocol)' % compiler.constant(fallback)
+  body = [
+    'if self.__class__ is not %s:' % compiler.constant(cls),
+    fallback,
+    'try:',
+    '  values = %s' % _key_source('self', attributes),
+    'except AttributeError:',
+    fallback,
+  ]
+  if cls.__dictoffset__:
+    # With every property set, a larger '__dict__' holds other attributes.
+    body.append('if len(self.__dict__) != %d:' % sum(
+      1 for attribute in attributes if attribute not in slots))
+    body.append(fallback)
+  for slot in extra_slots:
+    body.append('if hasattr(self, %r):' % slot)
+    body.append(fallback)
+  body.append('return %s, (%s,), values' % (compiler.constant(reconstruct),
+                                            compiler.constant(cls)))
+  return compiler.function('__reduce_ex__', ['self', 'protocol'], body)
+
+
+def compile_restore(props, unset, bypass_setattr=False):
+  """Compile function that sets properties from a tuple of values.
+
+  Values are stored without validation, as they are assumed to have been read
+  by a function compiled by 'compile_state'.
+
+  Args:
+    props: Iterable of (name, property) pairs.
+    unset: Value used for properties that are not set.
+    bypass_setattr: Whether values are stored with 'object.__setattr__'.
+
+  Returns:
+    Compiled function that takes an instance and a tuple of values.
+  """
+  attributes = _key_attributes(props)
+  compiler = ValidatorCompiler(bypass_setattr=bypass_setattr)
+  unset = compiler.constant(unset)
+  names = ['v%d' % index for index in range(len(attributes))]
+  body = ['(%s) = values' % ' '.join(name + ',' for name in names)]
+  for name, attribute in zip(names, attributes):
+    body.append('if %s is not %s:' % (name, unset))
+    body.append('  ' + compiler.store('self', attribute, name))
+  return compiler.function('restore', ['self', 'values'], body)
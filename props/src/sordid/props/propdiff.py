@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import weakref
+
+from . import propcompile
+from . import proputils
+
+
+__all__ = [
+  'diff',
+  'apply',
+]
+
+
+# Compiled diff function of each class.
+_differs = weakref.WeakKeyDictionary()
+
+
+def _compile_diff(cls):
+  props = propcompile.init_props(cls.props())
+  compiler = propcompile.ValidatorCompiler()
+  state = compiler.constant(propcompile.compile_state(props,
+                                                      proputils.DELETED))
+  old = ['a%d' % index for index in range(len(props))]
+  new = ['b%d' % index for index in range(len(props))]
+  body = []
+  if props:
+    body.extend(['(%s) = %s(old)' % (' '.join(name + ',' for name in old),
+                                     state),
+                 '(%s) = %s(new)' % (' '.join(name + ',' for name in new),
+                                     state)])
+  body.append('patch = {}')
+  for (name, prop), a, b in zip(props, old, new):
+    body.extend(['if %s is not %s and %s != %s:' % (a, b, a, b),
+                 '  patch[%r] = %s' % (name, b)])
+  body.append('return patch')
+  return compiler.function('diff', ['old', 'new'], body)
+
+
+def diff(old, new):
+  """Patch that changes the properties of one instance to match another.
+
+  Properties are compared in a function compiled once per class that reads
+  their storage attributes directly.  Computed properties are not compared.
+
+  Example:
+
+    patch = props.diff(before, after)
+    props.apply(replica, patch)
+
+  Args:
+    old: Instance to change.
+    new: Instance of the same class to match.
+
+  Returns:
+    Dictionary mapping the name of each property that differs to its value
+    on 'new', or to DELETED where it is not set on 'new'.  This is the same
+    form as 'ChangeTracking.changes', and pickles compactly.  Identical
+    instances give an empty patch.
+
+  Raises:
+    TypeError: When the instances are not of the same class.
+  """
+  cls = type(old)
+  if type(new) is not cls:
+    raise TypeError('Can not diff \'%s\' with \'%s\'' % (
+      cls.__name__, type(new).__name__))
+  try:
+    differ = _differs[cls]
+  except KeyError:
+    differ = _differs[cls] = _compile_diff(cls)
+  return differ(old, new)
+
+
+def apply(instance, patch):
+  """Apply patch to an instance.
+
+  Values are set through their descriptors, and observers are notified in one
+  batch.  Properties patched with DELETED are deleted unless they are already
+  unset.  The whole patch is checked before the instance is changed, so the
+  instance is either fully patched or not changed at all.
+
+  Args:
+    instance: Instance to change.
+    patch: Dictionary as returned by 'diff' or 'ChangeTracking.changes'.
+
+  Returns:
+    'instance'.
+
+  Raises:
+    KeyError: When the patch names a property the class does not have.
+    AttributeError: When the patch changes a computed or read-only property
+      that is set, or any property of a frozen instance.
+    Whatever the property descriptors raise for invalid values.
+  """
+  cls = type(instance)
+  props = dict(cls.props())
+  settable = dict(propcompile.init_props(props.items()))
+  for name in patch:
+    if name not in props:
+      raise KeyError('\'%s\' has no property \'%s\'' % (cls.__name__, name))
+    if name not in settable:
+      raise AttributeError('\'%s\' object attribute \'%s\' is computed' % (
+        cls.__name__, name))
+  if patch and getattr(cls, '_PropertiedType__frozen', False):
+    raise AttributeError('\'%s\' object is frozen' % cls.__name__)
+
+  deleted = proputils.DELETED
+  current = {name: getattr(instance, name, deleted) for name in patch}
+  row = {}
+  for name, value in patch.items():
+    if (isinstance(props[name], proputils.ReadOnlyProperty) and
+        current[name] is not deleted):
+      raise AttributeError('\'%s\' object attribute \'%s\' is read-only' % (
+        cls.__name__, name))
+    if value is not deleted:
+      row[name] = value
+  for failure in cls.validate_rows([row]):
+    raise failure.exception()
+
+  with proputils.batch():
+    for name, value in patch.items():
+      if value is not deleted:
+        setattr(instance, name, value)
+      elif current[name] is not deleted:
+        delattr(instance, name)
+  return instance
@@ -0,0 +1,433 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import contextlib
+import hashlib
+import os
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+from . import propcolumns
+from . import propcompile
+from . import proputils
+
+
+__all__ = [
+  'SharedStore',
+]
+
+
+# Signature of the record layout, capacity and number of published records.
+_HEADER = struct.Struct('<8sQQ')
+_LENGTH_OFFSET = 16
+_COUNT = struct.Struct('<Q')
+
+# Failed reads of a record being written before readers start yielding.
+_SPINS = 100
+
+
+def _backoff(spins):
+  """Wait before retrying a read, yielding once retries are many."""
+  if spins >= _SPINS:
+    time.sleep(0)
+  return spins + 1
+
+
+def _attach_segment(name):
+  try:
+    # Readers must not unlink the segment when they exit.
+    return shared_memory.SharedMemory(name, track=False)
+  except TypeError:
+    # Before Python 3.13 attaching always registers the segment with the
+    # resource tracker, which unlinks it when this process exits.
+    segment = shared_memory.SharedMemory(name)
+    if os.name == 'posix':
+      resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+class SharedStore:
+  """Store of many instances of a HasProps class in shared memory.
+
+  All properties of the class must be StrictProperty of bool, int or float,
+  which are stored at fixed width as they are by ColumnStore.  Setting an int
+  property to a bool or to an int that does not fit in 64 bits raises
+  TypeError or OverflowError.  Records are
+  laid out one after another in a 'multiprocessing.shared_memory' segment
+  that one writer process creates and any number of reader processes attach
+  to, so the data is held in memory once however many processes read it:
+
+    readings = SharedStore(Reading, capacity=1000000)
+    readings.extend(rows)
+
+    # In a worker, given 'readings.name' or the pickled store.
+    readings = SharedStore.attach(Reading, name)
+    total = sum(reading.value for reading in readings)
+
+  Rows are accessed through views as they are in a ColumnStore, and read the
+  segment directly without copying.  Assignments to views of a writable
+  store are validated by the property descriptors.  Views of an attached
+  store are read only.
+
+  Each record carries a sequence number that the writer makes odd while it
+  changes the record and even again once it is done.  Readers retry until
+  they read the same even number before and after reading, so they never
+  see a value that is being written, and yield to other threads while they
+  keep failing.  Each property read from a view is
+  consistent on its own; use 'snapshot' to read a whole record consistently,
+  and 'update' to change several properties of a record at once.  Only one
+  process, and one thread, may write.
+
+  Sequence numbers are read and written without memory barriers.  Within a
+  process the GIL orders them, and across processes the store relies on the
+  CPU not reordering writes, as x86 does not.  It is only meant for CPython
+  with the GIL, and is not safe on free-threaded builds or other Python
+  implementations.
+
+  Pickled stores are attached as read only when unpickled, so they may be
+  passed to worker processes.
+  """
+
+  def __init__(self, cls, capacity, name=None):
+    """Create store in a new shared memory segment.
+
+    Args:
+      cls: HasProps class whose instances are stored.
+      capacity: Maximum number of records.
+      name: Name of segment.  A unique name is chosen if None.
+
+    Raises:
+      TypeError: When 'cls' has a property that is not fixed width.
+    """
+    self.__configure(cls)
+    size = _HEADER.size + capacity * self.__record.size
+    self.__segment = shared_memory.SharedMemory(name, create=True,
+                                                size=max(size, 1))
+    self.__buffer = self.__segment.buf
+    _HEADER.pack_into(self.__buffer, 0, self.__signature, capacity, 0)
+    self.__capacity = capacity
+    self.__writable = True
+    self.__locked = None
+    self.__writer = None
+
+  @classmethod
+  def attach(cls, record_class, name):
+    """Attach to store created by another process, for reading only.
+
+    Args:
+      record_class: HasProps class whose instances are stored.  Must have the
+        same properties the store was created with.
+      name: Name of segment.
+
+    Raises:
+      ValueError: When the store was created for different properties.
+    """
+    store = cls.__new__(cls)
+    store.__configure(record_class)
+    store.__segment = _attach_segment(name)
+    store.__buffer = store.__segment.buf
+    signature, store.__capacity, length = _HEADER.unpack_from(
+      store.__buffer, 0)
+    if signature != store.__signature:
+      store.close()
+      raise ValueError('Shared store \'%s\' does not hold \'%s\'' % (
+        name, record_class.__name__))
+    store.__writable = False
+    store.__locked = None
+    store.__writer = None
+    return store
+
+  def __configure(self, cls):
+    props = list(cls.props())
+    typecodes = []
+    for name, prop in props:
+      typecode = propcolumns.column_typecode(prop)
+      if typecode is None:
+        raise TypeError('Property \'%s\' of \'%s\' is not fixed width' % (
+          name, cls.__name__))
+      typecodes.append(typecode)
+    self.__cls = cls
+    self.__names = [name for name, prop in props]
+    self.__typecodes = typecodes
+    self.__bitmap_size = (len(props) + 7) // 8
+    layout = '<Q%ds%s' % (self.__bitmap_size, ''.join(typecodes))
+    padding = -struct.calcsize(layout) % 8
+    self.__record = struct.Struct(layout + 'x' * padding)
+    self.__fields = []
+    for index, typecode in enumerate(typecodes):
+      offset = struct.calcsize(layout[:len(layout) - len(typecodes) + index])
+      self.__fields.append((struct.Struct('<' + typecode), offset))
+    self.__signature = hashlib.blake2b(
+      repr(list(zip(self.__names, typecodes))).encode('utf-8'),
+      digest_size=8).digest()
+    self.__restore = propcompile.compile_restore(
+      props, proputils.DELETED, cls.__setattr__ is not object.__setattr__)
+    # Frozen classes may only be set when records are created.
+    self.__populate = propcompile.compile_init(
+      props, name='populate', bypass_setattr=cls._PropertiedType__frozen)
+    self.__row_class = propcolumns.row_class(cls, propcolumns._ColumnSlot)
+
+  def __reduce__(self):
+    return self.attach, (self.__cls, self.__segment.name)
+
+  @property
+  def cls(self):
+    """Class of stored records."""
+    return self.__cls
+
+  @property
+  def name(self):
+    """Name of shared memory segment, for attaching to from other processes."""
+    return self.__segment.name
+
+  @property
+  def capacity(self):
+    """Maximum number of records."""
+    return self.__capacity
+
+  @property
+  def writable(self):
+    """Whether this process created and may write the store."""
+    return self.__writable
+
+  def __len__(self):
+    return _COUNT.unpack_from(self.__buffer, _LENGTH_OFFSET)[0]
+
+  def __offset(self, index):
+    return _HEADER.size + index * self.__record.size
+
+  @contextlib.contextmanager
+  def __writing(self, index):
+    if not self.__writable:
+      raise AttributeError('Shared store \'%s\' is read only' % self.name)
+    if self.__locked == index:
+      yield
+      return
+    buffer = self.__buffer
+    offset = self.__offset(index)
+    sequence, = _COUNT.unpack_from(buffer, offset)
+    record = bytes(buffer[offset:offset + self.__record.size])
+    _COUNT.pack_into(buffer, offset, sequence + 1)
+    self.__locked = index
+    self.__writer = threading.get_ident()
+    try:
+      yield
+    except BaseException:
+      # Changes are all or nothing.
+      buffer[offset + _COUNT.size:offset + len(record)] = (
+        record[_COUNT.size:])
+      raise
+    finally:
+      self.__locked = None
+      self.__writer = None
+      _COUNT.pack_into(buffer, offset, sequence + 2)
+
+  def __owns(self, index):
+    # The thread writing a record, as 'update' does while the descriptors it
+    # calls read old values, reads it without waiting for itself.
+    return self.__locked == index and self.__writer == threading.get_ident()
+
+  def _get(self, column, index):
+    buffer = self.__buffer
+    offset = self.__offset(index)
+    field, field_offset = self.__fields[column]
+    flag = offset + _COUNT.size + (column >> 3)
+    mask = 1 << (column & 7)
+    owned = self.__owns(index)
+    spins = 0
+    while True:
+      sequence, = _COUNT.unpack_from(buffer, offset)
+      if sequence & 1 and not owned:
+        spins = _backoff(spins)
+        continue
+      present = buffer[flag] & mask
+      value, = field.unpack_from(buffer, offset + field_offset)
+      if owned or _COUNT.unpack_from(buffer, offset)[0] == sequence:
+        break
+      spins = _backoff(spins)
+    if not present:
+      raise AttributeError(self.__names[column])
+    if self.__typecodes[column] == 'b':
+      return bool(value)
+    return value
+
+  def _set(self, column, index, value):
+    if self.__typecodes[column] == 'q':
+      # Checked here since StrictProperty(int) accepts any int.
+      if type(value) is bool:
+        raise TypeError('Shared store can not keep bool in int property '
+                        '\'%s\'' % self.__names[column])
+      if value not in propcolumns._INT64_RANGE:
+        raise OverflowError('Value of property \'%s\' does not fit in 64 '
+                            'bits' % self.__names[column])
+    buffer = self.__buffer
+    offset = self.__offset(index)
+    field, field_offset = self.__fields[column]
+    with self.__writing(index):
+      field.pack_into(buffer, offset + field_offset, value)
+      buffer[offset + _COUNT.size + (column >> 3)] |= 1 << (column & 7)
+
+  def _delete(self, column, index):
+    buffer = self.__buffer
+    flag = self.__offset(index) + _COUNT.size + (column >> 3)
+    mask = 1 << (column & 7)
+    with self.__writing(index):
+      if not buffer[flag] & mask:
+        raise AttributeError(self.__names[column])
+      buffer[flag] &= ~mask & 0xff
+
+  def __row(self, index):
+    row = self.__row_class.__new__(self.__row_class)
+    # Views of frozen classes refuse assignment.
+    object.__setattr__(row, '_Row__store', self)
+    object.__setattr__(row, '_Row__index', index)
+    return row
+
+  def append(self, **values):
+    """Append and publish new record.
+
+    Readers see the new record only once all its values are written.
+
+    Args:
+      values: Initial values of record properties.  Properties not provided
+        are left unset.
+
+    Returns:
+      View of new record.
+
+    Raises:
+      AttributeError: When the store is read only.
+      IndexError: When the store is full.
+      Whatever the property descriptors raise for invalid values, in which
+      case no record is added.
+    """
+    if not self.__writable:
+      raise AttributeError('Shared store \'%s\' is read only' % self.name)
+    index = len(self)
+    if index >= self.__capacity:
+      raise IndexError('Shared store \'%s\' is full' % self.name)
+    offset = self.__offset(index)
+    self.__buffer[offset:offset + self.__record.size] = bytes(
+      self.__record.size)
+    row = self.__row(index)
+    with self.__writing(index):
+      self.__populate(row, **values)
+    _COUNT.pack_into(self.__buffer, _LENGTH_OFFSET, index + 1)
+    return row
+
+  def extend(self, rows):
+    """Append many records.
+
+    Args:
+      rows: Iterable of dictionaries of record values.
+    """
+    for values in rows:
+      self.append(**values)
+
+  def update(self, index, **values):
+    """Change several properties of a record at once.
+
+    Readers see either all or none of the changes.
+
+    Args:
+      index: Index of record.
+      values: New values of record properties.
+
+    Raises:
+      AttributeError: When the store is read only.
+      Whatever the property descriptors raise for invalid values, in which
+      case the record is not changed.
+    """
+    row = self[index]
+    with self.__writing(row._Row__index):
+      for name, value in values.items():
+        setattr(row, name, value)
+
+  def __getitem__(self, index):
+    length = len(self)
+    if index < 0:
+      index += length
+    if not 0 <= index < length:
+      raise IndexError('Row index out of range')
+    return self.__row(index)
+
+  def __iter__(self):
+    for index in range(len(self)):
+      yield self.__row(index)
+
+  def snapshot(self, index):
+    """Consistent copy of a record.
+
+    Returns:
+      New instance of the stored class, independent of the store, holding
+      the values of all properties as they were at one moment.
+    """
+    buffer = self.__buffer
+    index = self[index]._Row__index
+    offset = self.__offset(index)
+    unpack = self.__record.unpack_from
+    owned = self.__owns(index)
+    spins = 0
+    while True:
+      sequence, = _COUNT.unpack_from(buffer, offset)
+      if sequence & 1 and not owned:
+        spins = _backoff(spins)
+        continue
+      record = unpack(buffer, offset)
+      if owned or _COUNT.unpack_from(buffer, offset)[0] == sequence:
+        break
+      spins = _backoff(spins)
+    bitmap = record[1]
+    deleted = proputils.DELETED
+    values = []
+    for column, (typecode, value) in enumerate(zip(self.__typecodes,
+                                                   record[2:])):
+      if not bitmap[column >> 3] & (1 << (column & 7)):
+        values.append(deleted)
+      elif typecode == 'b':
+        values.append(bool(value))
+      else:
+        values.append(value)
+    cls = self.__cls
+    instance = cls.__new__(cls)
+    self.__restore(instance, values)
+    return instance
+
+  def snapshots(self):
+    """Iterator of consistent copies of all records."""
+    for index in range(len(self)):
+      yield self.snapshot(index)
+
+  def close(self):
+    """Detach from segment.  Views must no longer be used."""
+    self.__buffer = None
+    self.__segment.close()
+
+  def unlink(self):
+    """Destroy segment once all processes have closed it."""
+    self.__segment.unlink()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+    if self.__writable:
+      self.unlink()
@@ -15,8 +15,42 @@
 # limitations under the License.
 #
 
-
-def config_props(cls, attrs=None):
+import collections
+import contextlib
+import copy
+import copyreg
+import itertools
+import os
+import threading
+import weakref
+from concurrent import futures
+
+from . import propcompile
+
+
+__all__ = [
+  'config_props',
+  'config_prop',
+  'config_prop_name',
+  'PropertiedType',
+  'Propertied',
+  'ValidationFailure',
+  'HasProps',
+  'DELETED',
+  'ChangeTracking',
+  'parallel_validate',
+  'base_property_class',
+  'Property',
+  'ReadOnlyProperty',
+  'ComputedProperty',
+  'computed',
+  'Change',
+  'flush',
+  'batch',
+]
+
+
+def config_props(cls, attrs=None, inherited=True):
   """Configure all properties found on a class instance.
 
   Attempts to configure all properties of a class.  If class has
@@ -27,9 +61,17 @@ def config_props(cls, attrs=None):
   Args:
     cls: Class with properties in need of configuration.
     attrs: Dictionary of attributes.
+    inherited: When attrs is not provided, whether to look up every
+      attribute of the class including those inherited from base classes, or
+      to only use the class's own namespace.  The latter is much faster for
+      classes whose base classes are already configured, and is what
+      PropertiedType does by passing the class namespace as attrs.
   """
   if attrs is None:
-    attrs = dict((name, getattr(cls, name)) for name in dir(cls))
+    if inherited:
+      attrs = dict((name, getattr(cls, name)) for name in dir(cls))
+    else:
+      attrs = dict(vars(cls))
 
   try:
     cls_config_props = cls.__config_props__
@@ -95,6 +137,86 @@ def config_prop_name(cls, name, value):
     return True
 
 
+def _attribute_name(class_name, name):
+  """Name of the private attribute that stores a property value.
+
+  Unlike Python's own name mangling, leading underscores of the class name are
+  kept, so the value of property 'x' declared on class '_Point' is stored as
+  '__Point__x' rather than '_Point__x'.
+
+  Args:
+    class_name: Name of class that property is declared on.
+    name: Name of property.
+
+  Returns:
+    Mangled attribute name.
+  """
+  return '_%s__%s' % (class_name, name)
+
+
+def _slot_member_name(class_name, slot):
+  """Name Python stores a slot declared on a class under.
+
+  Args:
+    class_name: Name of class that declares the slot.
+    slot: Name of slot as declared in '__slots__'.
+
+  Returns:
+    'slot' mangled the way Python mangles private names.
+  """
+  if slot.startswith('__') and not slot.endswith('__'):
+    stripped_class_name = class_name.lstrip('_')
+    if stripped_class_name:
+      return '_%s%s' % (stripped_class_name, slot)
+  return slot
+
+
+# Attribute hashes of frozen instances are cached in.
+_HASH_CACHE = '_HasProps__hash'
+
+# Attribute changes of ChangeTracking instances are recorded in.
+_CHANGES = '_ChangeTracking__changes'
+
+# Default '__getstate__', which objects only have as of Python 3.11.
+_OBJECT_GETSTATE = getattr(object, '__getstate__', None)
+
+# Functions generated as '__init__' by PropertiedType.
+_generated_inits = weakref.WeakSet()
+
+
+def _slot_names(cls):
+  """Names of the instance attributes stored in slots of a class."""
+  names = []
+  for base in cls.__mro__:
+    slots = base.__dict__.get('__slots__', ())
+    if isinstance(slots, str):
+      slots = (slots,)
+    for slot in slots:
+      if slot in ('__dict__', '__weakref__'):
+        continue
+      member_name = _slot_member_name(base.__name__, slot)
+      # Property slots are also reachable by their unmangled name.
+      if base.__dict__.get(slot) is not base.__dict__.get(member_name):
+        slot = member_name
+      names.append(slot)
+  return names
+
+
+def _pickles_itself(cls):
+  """Whether a class has its own pickling methods."""
+  return (cls.__reduce__ is not object.__reduce__ or
+          getattr(cls, '__getstate__', None) is not _OBJECT_GETSTATE or
+          cls.__setstate__ is not HasProps.__setstate__)
+
+
+def _frozen_setattr(self, name, value):
+  raise AttributeError('\'%s\' object is frozen' % type(self).__name__)
+
+
+def _frozen_delattr(self, name):
+  raise AttributeError('\'%s\' object is frozen' % type(self).__name__)
+
+
 class PropertiedType(type):
   """Meta-class that will automatically configure properties on a class.
 
@@ -130,10 +252,121 @@ class PropertiedType(type):
 
     Person.name.__config__('name')
     Person.age.__config__('age')
+
+  Classes may opt in to storing property values in generated '__slots__'
+  instead of the instance '__dict__', which makes instances considerably
+  smaller:
+
+    class Point(HasProps, slots=True):
+
+      x = StrictProperty(float)
+      y = StrictProperty(float)
+
+  HasProps classes may also have a keyword '__init__' generated that sets and
+  validates all properties without going through their descriptors:
+
+    class Point(HasProps, init=True):
+
+      x = StrictProperty(float)
+      y = StrictProperty(float)
+
+    point = Point(x=1.0, y=2.0)
+
+  Frozen HasProps classes are immutable value objects.  Properties may only be
+  set by the generated '__init__' or 'from_rows', and '__eq__' and a cached
+  '__hash__' are generated from the property values, so instances can be used
+  as dictionary keys:
+
+    class Point(HasProps, frozen=True):
+
+      x = StrictProperty(float)
+      y = StrictProperty(float)
+
+    points = {Point(x=1.0, y=2.0): 'a'}
+    points[Point(x=1.0, y=2.0)]  # 'a'
   """
 
-  def __init__(cls, name, bases, dct):
+  def __new__(mcs, name, bases, dct, slots=None, init=None, frozen=None):
+    """Create new class.
+
+    Args:
+      slots: When True, instance storage for the Property instances declared
+        on the class is generated as '__slots__' rather than living in the
+        instance '__dict__'.  Instances then have no '__dict__' as long as all
+        base classes also use slots.  When None, the setting is inherited
+        from base classes.
+      init: When True, a keyword only '__init__' is generated for HasProps
+        classes unless the class defines its own.  Each keyword sets the
+        property of the same name.  When None, the setting is inherited from
+        base classes.
+      frozen: When True, instances of HasProps classes may not be changed
+        after they are created, and '__init__', '__eq__' and '__hash__' are
+        generated unless the class defines its own.  When None, the setting is
+        inherited from base classes.
+    """
+    if frozen is None:
+      frozen = any(getattr(base, '_PropertiedType__frozen', False)
+                   for base in bases)
+    if frozen:
+      init = True
+    if slots is None:
+      slots = any(getattr(base, '_PropertiedType__slots', False)
+                  for base in bases)
+    if init is None:
+      init = any(getattr(base, '_PropertiedType__generate_init', False)
+                 for base in bases)
+    prop_slots = ()
+    if slots:
+      dct = dict(dct)
+      declared_slots = dct.get('__slots__', ())
+      if isinstance(declared_slots, str):
+        declared_slots = (declared_slots,)
+      prop_slots = tuple(_attribute_name(name, attr)
+                         for attr, value in dct.items()
+                         if isinstance(value, Property))
+      dct['__slots__'] = tuple(declared_slots) + prop_slots
+      if frozen and not any(hasattr(base, _HASH_CACHE) for base in bases):
+        dct['__slots__'] += (_HASH_CACHE,)
+    cls = super(PropertiedType, mcs).__new__(mcs, name, bases, dct)
+    for slot in prop_slots:
+      # Python mangles slots of classes whose names start with an underscore
+      # differently from property attribute names.
+      member_name = _slot_member_name(name, slot)
+      if member_name != slot:
+        setattr(cls, slot, cls.__dict__[member_name])
+    cls.__slots = slots
+    cls.__generate_init = init
+    cls.__frozen = frozen
+    return cls
+
+  def __init__(cls, name, bases, dct, slots=None, init=None, frozen=None):
     config_props(cls, dct)
+    if not cls.__generate_init:
+      return
+    try:
+      props = cls.props
+    except AttributeError:
+      raise TypeError('Generated __init__ requires HasProps')
+
+    generated = {}
+    if '__init__' not in dct:
+      generated['__init__'] = propcompile.compile_init(
+        props(), bypass_setattr=cls.__frozen)
+    if cls.__frozen:
+      if '__eq__' not in dct:
+        generated['__eq__'] = propcompile.compile_eq(props())
+      if '__hash__' not in dct:
+        generated['__hash__'] = propcompile.compile_hash(props(), _HASH_CACHE)
+    if '__init__' in generated:
+      _generated_inits.add(generated['__init__'])
+    for method_name, method in generated.items():
+      method.__qualname__ = '%s.%s' % (cls.__qualname__, method_name)
+      setattr(cls, method_name, method)
+    if cls.__frozen:
+      if '__setattr__' not in dct:
+        cls.__setattr__ = _frozen_setattr
+      if '__delattr__' not in dct:
+        cls.__delattr__ = _frozen_delattr
 
 
 class Propertied(metaclass=PropertiedType):
@@ -145,8 +378,75 @@ class Propertied(metaclass=PropertiedType):
 
       name = StrictType(unicode)
       age = StrictType(int)
+
+  The class declares no instance storage of its own, so that sub-classes
+  using slots have no '__dict__'.  Sub-classes that do not declare
+  '__slots__' still get a '__dict__' and support weak references as before.
+  A sub-class that declares '__slots__' itself no longer gets a '__dict__'
+  or weak reference support from this class, and must list '__dict__' or
+  '__weakref__' in its '__slots__' to have them.
+  """
+
+  __slots__ = ()
+
+
+class ValidationFailure:
+  """Record of a value that failed validation.
+
+  Failures are collected without raising, so the record only keeps what was
+  seen.  The responsible validator and the exception assignment would have
+  raised are worked out by the property the first time they are read.
+
+  Attributes:
+    row: Index of row the value was found in.
+    name: Name of property.
+    prop: Property descriptor.
+    value: Value that failed validation.
   """
 
+  __slots__ = ('row', 'name', 'prop', 'value', '__explanation')
+
+  def __init__(self, row, name, prop, value):
+    self.row = row
+    self.name = name
+    self.prop = prop
+    self.value = value
+    self.__explanation = None
+
+  def __explain(self):
+    if self.__explanation is None:
+      try:
+        explain = self.prop.__explain_failure__
+      except AttributeError:
+        self.__explanation = (None, None)
+      else:
+        self.__explanation = explain(self.value)
+    return self.__explanation
+
+  @property
+  def node(self):
+    """Validator node that rejected value, or None if unknown."""
+    return self.__explain()[0]
+
+  def exception(self):
+    """Exception that assigning value to property raises."""
+    return self.__explain()[1]
+
+  @property
+  def message(self):
+    """Message of exception that assigning value to property raises."""
+    return str(self.exception())
+
+  def __eq__(self, other):
+    if not isinstance(other, ValidationFailure):
+      return NotImplemented
+    return ((self.row, self.name, self.prop, self.value) ==
+            (other.row, other.name, other.prop, other.value))
+
+  def __repr__(self):
+    return '%s(row=%d, name=%r, value=%r)' % (
+      type(self).__name__, self.row, self.name, self.value)
+
 
 class HasProps(Propertied):
   """Convenient base class for properties classes that know their properties.
@@ -154,18 +454,29 @@ class HasProps(Propertied):
   Classes that inherit from this class will remember what properties it has and
   provide methods for enumerating those properties.
 
-  Properties are inherited from base classes but can be overridden.
+  Properties are inherited from base classes but can be overridden.  Like
+  Propertied, this class declares empty '__slots__'.
   """
 
+  __slots__ = ()
+
   @classmethod
   def __config_props__(cls, attrs):
-    """Configures and rememberes class properties."""
+    """Configures and rememberes class properties.
+
+    Rather than copying the properties of its base class, a class's property
+    table is a layer chained to the live table of its base class that only
+    holds the properties the class itself declares, so properties configured
+    on a base class later are seen by its sub-classes.  Looking up a
+    property by name costs one test per base class, and listing properties
+    merges the layers without keeping the result.
+    """
     try:
       props = cls.__props
     except AttributeError:
-      cls.__props = {}
+      cls.__props = collections.ChainMap()
     else:
-      cls.__props = dict(props.items())
+      cls.__props = props.new_child()
     for name, value in attrs.items():
       config_prop(cls, name, value)
 
@@ -175,6 +486,15 @@ class HasProps(Propertied):
     if config_prop_name(cls, name, value):
       cls.__props[name] = value
 
+  @classmethod
+  def __prop(cls, name):
+    # Costs one test per base class, without the KeyError that ChainMap
+    # raises and catches for each.
+    for layer in cls.__props.maps:
+      if name in layer:
+        return layer[name]
+    raise KeyError(name)
+
   @classmethod
   def prop_names(cls):
     """Iterable of all property names."""
@@ -183,7 +503,467 @@ class HasProps(Propertied):
   @classmethod
   def props(cls):
     """Iterable of all property descriptors."""
-    return cls.__props.items()
+    # Looking up each name in the chained table would cost one lookup per
+    # base class, so the layers are merged for each call instead.  Nothing
+    # is kept, so sub-classes do not hold copies of their bases' properties.
+    props = {}
+    for layer in reversed(cls.__props.maps):
+      props.update(layer)
+    return props.items()
+
+  def __init_subclass__(cls, **kwargs):
+    super(HasProps, cls).__init_subclass__(**kwargs)
+    if _pickles_itself(cls):
+      # Pickled and copied by its own methods, as other objects are.
+      for name, value in (('__reduce_ex__', object.__reduce_ex__),
+                          ('__copy__', None), ('__deepcopy__', None)):
+        if name not in cls.__dict__:
+          setattr(cls, name, value)
+      if cls.__setstate__ is HasProps.__setstate__:
+        cls.__setstate__ = _set_default_state
+
+  @classmethod
+  def __pickling(cls):
+    try:
+      return cls.__dict__['_HasProps__pickle_functions']
+    except KeyError:
+      pass
+    props = list(cls.props())
+    ignored = {_HASH_CACHE, _CHANGES}
+    ignored.update(prop.attribute_name for name, prop in props
+                   if isinstance(prop, Property))
+    slots = _slot_names(cls)
+    extra_slots = tuple(slot for slot in slots if slot not in ignored)
+    # Restoring is not a change to be frozen against or tracked.
+    bypass_setattr = cls.__setattr__ is not object.__setattr__
+    pickling = (propcompile.compile_state(props, DELETED),
+                propcompile.compile_restore(props, DELETED, bypass_setattr),
+                frozenset(ignored), extra_slots)
+    cls.__pickle_functions = pickling
+    if cls is not HasProps:
+      reduce = propcompile.compile_reduce(
+        cls, props, copyreg.__newobj__, HasProps.__reduce_ex__, slots,
+        extra_slots)
+      reduce.__qualname__ = '%s.__reduce_ex__' % cls.__qualname__
+      cls.__reduce_ex__ = reduce
+    return pickling
+
+  def __extra_state(self, ignored, slots):
+    extra = None
+    instance_dict = getattr(self, '__dict__', None)
+    if instance_dict and not instance_dict.keys() <= ignored:
+      extra = {name: value for name, value in instance_dict.items()
+               if name not in ignored}
+    slot_state = None
+    for name in slots:
+      try:
+        value = getattr(self, name)
+      except AttributeError:
+        continue
+      if slot_state is None:
+        slot_state = {}
+      slot_state[name] = value
+    return extra, slot_state
+
+  def __reduce_ex__(self, protocol):
+    """Compact pickled form of instance.
+
+    Property values are pickled as a tuple in declared order, with DELETED
+    for properties that are not set, rather than as a dictionary keyed by
+    their storage attribute names.  Values are restored without validation.
+    Other instance attributes, including those in slots the class declares
+    itself, are pickled as they are, but cached values of computed
+    properties, hashes and tracked changes are not.  Because values are
+    positional, instances must be unpickled by the same version of their
+    class.
+
+    A function compiled for each class the first time one of its instances
+    is pickled takes over from this method.  Classes that define their own
+    '__reduce__', '__getstate__' or '__setstate__' are pickled and copied by
+    those instead.
+    """
+    cls = self.__class__
+    state, restore, ignored, slots = cls.__pickling()
+    extra, slot_state = self.__extra_state(ignored, slots)
+    if extra or slot_state:
+      return _restore_props, (cls, state(self), extra, slot_state)
+    return copyreg.__newobj__, (cls,), state(self)
+
+  def __setstate__(self, values):
+    """Restore property values pickled by '__reduce_ex__'."""
+    self.__class__.__pickling()[1](self, values)
+
+  def __copy__(self):
+    """Shallow copy of instance.  Frozen instances are not copied."""
+    cls = type(self)
+    if cls._PropertiedType__frozen:
+      return self
+    state, restore, ignored, slots = cls.__pickling()
+    instance = cls.__new__(cls)
+    restore(instance, state(self))
+    _restore_attributes(instance, *self.__extra_state(ignored, slots))
+    return instance
+
+  def __deepcopy__(self, memo):
+    """Deep copy of instance."""
+    cls = type(self)
+    state, restore, ignored, slots = cls.__pickling()
+    instance = cls.__new__(cls)
+    memo[id(self)] = instance
+    restore(instance, copy.deepcopy(state(self), memo))
+    extra, slot_state = self.__extra_state(ignored, slots)
+    _restore_attributes(instance, copy.deepcopy(extra, memo),
+                        copy.deepcopy(slot_state, memo))
+    return instance
+
+  @classmethod
+  def from_rows(cls, rows):
+    """Create many instances.
+
+    Properties are set with validation inlined in a function compiled once
+    per class, rather than one descriptor call per property.
+
+    Example:
+
+      points = list(Point.from_rows([{'x': 1.0, 'y': 2.0}, (3.0, 4.0)]))
+
+    Args:
+      rows: Iterable of rows.  Each row is either a tuple or list of values in
+        'prop_names' order, leaving out computed properties, or a mapping of
+        property names to values.  Missing properties are left unset.
+
+    Returns:
+      Iterator of new instances.  Instances of classes with a generated or no
+      '__init__' are created without calling '__init__'.  Otherwise
+      '__init__' is called without arguments before properties are set, and
+      read-only properties it sets may be overwritten.
+    """
+    try:
+      populate = cls.__dict__['_HasProps__populate']
+    except KeyError:
+      populate = propcompile.compile_init(
+        cls.props(), name='populate', keyword_only=False,
+        bypass_setattr=cls._PropertiedType__frozen)
+      cls.__populate = populate
+
+    init = cls.__init__
+    # A generated __init__ does nothing populate does not already do.
+    if init is object.__init__ or init in _generated_inits:
+      new = cls.__new__
+      args = (cls,)
+    else:
+      new = cls
+      args = ()
+
+    for row in rows:
+      instance = new(*args)
+      if isinstance(row, (tuple, list)):
+        populate(instance, *row)
+      else:
+        populate(instance, **row)
+      yield instance
+
+  @classmethod
+  def validate_columns(cls, columns):
+    """Validate columns of values without raising.
+
+    Each column is validated in one pass by its property's
+    '__validate_column__' method.  Properties without such a method, such as
+    unvalidated properties, accept every value.
+
+    Example:
+
+      errors = Point.validate_columns({'x': xs, 'y': ys})
+      valid_xs = xs[~errors]
+
+    Args:
+      columns: Dictionary mapping property names to sequences of values.  All
+        sequences must be the same length.  NumPy arrays are validated using
+        array operations where possible.
+
+    Returns:
+      Error mask with a true entry for every row where any column is invalid.
+      A NumPy boolean array if any column is a NumPy array, else a list of
+      bools.
+
+    Raises:
+      KeyError: When a column does not name a property of the class.
+      ValueError: When columns have different lengths.
+    """
+    errors = None
+    length = None
+    for name, values in columns.items():
+      try:
+        prop = cls.__prop(name)
+      except KeyError:
+        raise KeyError('\'%s\' has no property \'%s\'' % (cls.__name__, name))
+      if length is None:
+        length = len(values)
+      elif len(values) != length:
+        raise ValueError('Column \'%s\' has %d values, expected %d' % (
+          name, len(values), length))
+      try:
+        validate_column = prop.__validate_column__
+      except AttributeError:
+        continue
+      column_errors = validate_column(values)
+      if errors is None:
+        errors = column_errors
+      elif isinstance(errors, list) and isinstance(column_errors, list):
+        errors = [e1 or e2 for e1, e2 in zip(errors, column_errors)]
+      else:
+        errors = errors | column_errors
+    if errors is None:
+      return [False] * (length or 0)
+    return errors
+
+  @classmethod
+  def validate_rows(cls, rows):
+    """Validate rows of values without raising.
+
+    Assigning an invalid value to a property raises an exception, which is
+    expensive to build when a large batch of rows is expected to have many
+    errors.  Instead, each value is checked by a function compiled once per
+    property by its '__compile_check__' method, and failures are collected as
+    compact records.  Messages are not formatted until they are read.
+    Properties without such a method accept every value.
+
+    Example:
+
+      for failure in Point.validate_rows(rows):
+        print(failure.row, failure.name, failure.message)
+
+    Args:
+      rows: Iterable of rows as accepted by 'from_rows'.
+
+    Returns:
+      List of ValidationFailure in row order.
+
+    Raises:
+      KeyError: When a row names a property the class does not have.
+      TypeError: When a row has more values than the class has properties.
+    """
+    checks = {}
+    for name, prop in cls.props():
+      try:
+        compile_check = prop.__compile_check__
+      except AttributeError:
+        check = None
+      else:
+        check = compile_check()
+      checks[name] = (prop, check)
+    ordered = [(name, checks[name])
+               for name, prop in propcompile.init_props(cls.props())]
+
+    failures = []
+    for index, row in enumerate(rows):
+      if isinstance(row, (tuple, list)):
+        if len(row) > len(ordered):
+          raise TypeError('\'%s\' has only %d properties' % (
+            cls.__name__, len(ordered)))
+        items = zip(ordered, row)
+      else:
+        try:
+          items = [((name, checks[name]), value)
+                   for name, value in row.items()]
+        except KeyError as error:
+          raise KeyError('\'%s\' has no property \'%s\'' % (
+            cls.__name__, error.args[0]))
+      for (name, (prop, check)), value in items:
+        if check is None:
+          continue
+        try:
+          valid = check(value)
+        except (TypeError, ValueError):
+          valid = False
+        if not valid:
+          failures.append(ValidationFailure(index, name, prop, value))
+    return failures
+
+
+class _Deleted:
+
+  def __repr__(self):
+    return 'DELETED'
+
+  def __reduce__(self):
+    return 'DELETED'
+
+
+# Value reported by 'ChangeTracking.changes' for deleted properties.
+DELETED = _Deleted()
+
+
+class ChangeTracking(HasProps):
+  """Mixin for HasProps classes that tracks which properties changed.
+
+  Every assignment or deletion of a property is recorded until 'commit' is
+  called, so that only changed properties need to be written to a store:
+
+    class Person(ChangeTracking):
+      name = Property()
+      age = Property()
+
+    person = load_person()
+    person.commit()
+    person.age = 31
+    person.changes()  # {'age': 31}
+
+  Properties set when an instance is created count as changes, so instances
+  loaded from a store should be committed before use.  Assigning the value a
+  property already has is also a change.  Copies and unpickled instances
+  start with no changes.
+
+  Changes are recorded by the property descriptors of classes that inherit
+  from this class, so assignments to other attributes and properties of
+  other classes cost nothing extra.  Properties inherited from a base class
+  that does not track changes are not tracked either, since their
+  descriptors are shared with that class.  The mixin adds one slot, so it
+  must come before any base class that declares slots of its own.
+  """
+
+  __slots__ = ('__changes',)
+
+  @classmethod
+  def __config_props__(cls, attrs):
+    """Configures properties so that they record changes."""
+    # The name ChangeTracking is not yet bound when this class is configured.
+    super().__config_props__(attrs)
+    # Only the class's own layer, as inherited descriptors are shared with
+    # classes that may not track changes.
+    for prop in cls._HasProps__props.maps[0].values():
+      if (isinstance(prop, Property) and
+          not isinstance(prop, (ComputedProperty, _TrackedProperty))):
+        _set_behavior(prop, _TrackedProperty, True)
+
+  def changes(self):
+    """Properties changed since last commit.
+
+    Returns:
+      Dictionary mapping names of changed properties to their current values,
+      in the order they were first changed.  Deleted properties map to
+      DELETED.
+    """
+    try:
+      changed = self.__changes
+    except AttributeError:
+      return {}
+    changes = {}
+    for name in changed:
+      try:
+        changes[name] = getattr(self, name)
+      except AttributeError:
+        changes[name] = DELETED
+    return changes
+
+  def commit(self):
+    """Forget changes.
+
+    Returns:
+      Changes since last commit, as returned by 'changes'.
+    """
+    changes = self.changes()
+    try:
+      self.__changes.clear()
+    except AttributeError:
+      pass
+    return changes
+
+
+def _restore_attributes(instance, extra, slot_state):
+  if extra:
+    instance.__dict__.update(extra)
+  if slot_state:
+    for name, value in slot_state.items():
+      object.__setattr__(instance, name, value)
+
+
+def _restore_props(cls, values, extra=None, slot_state=None):
+  restore = cls._HasProps__pickling()[1]
+  instance = cls.__new__(cls)
+  restore(instance, values)
+  _restore_attributes(instance, extra, slot_state)
+  return instance
+
+
+def _set_default_state(self, state):
+  """Restore state as objects without '__setstate__' are restored."""
+  if isinstance(state, tuple) and len(state) == 2:
+    state, slot_state = state
+  else:
+    slot_state = None
+  _restore_attributes(self, state, slot_state)
+
+
+def _validate_shard(cls, start, rows):
+  return [(failure.row + start, failure.name, failure.value)
+          for failure in cls.validate_rows(rows)]
+
+
+def parallel_validate(cls, rows, workers=None, chunk_size=None):
+  """Validate rows of values in many processes.
+
+  Rows are split in to chunks that are validated by 'validate_rows' in a
+  process pool and the failures are merged back in row order.  The class is
+  pickled by reference, so it must be importable by worker processes, and
+  rows and their values must be picklable.
+
+  Args:
+    cls: HasProps class to validate rows for.
+    rows: Iterable of rows as accepted by 'HasProps.from_rows'.
+    workers: Number of worker processes, defaults to the number of CPUs.
+    chunk_size: Number of rows sent to a worker at a time.  Defaults to
+      splitting rows in to four chunks per worker.
+
+  Returns:
+    List of ValidationFailure in row order, as returned by 'validate_rows'.
+  """
+  if workers is None:
+    workers = os.cpu_count() or 1
+  if chunk_size is None:
+    rows = list(rows)
+    chunk_size = max(1, -(-len(rows) // (workers * 4)))
+  rows = iter(rows)
+  props = dict(cls.props())
+
+  with futures.ProcessPoolExecutor(workers) as executor:
+    jobs = []
+    start = 0
+    while True:
+      chunk = list(itertools.islice(rows, chunk_size))
+      if not chunk:
+        break
+      jobs.append(executor.submit(_validate_shard, cls, start, chunk))
+      start += len(chunk)
+
+    failures = []
+    for job in jobs:
+      for row, name, value in job.result():
+        failures.append(ValidationFailure(row, name, props[name], value))
+  return failures
+
+
+def base_property_class(prop):
+  """Class of a property without behavior added to it at run time.
+
+  Subscribing to a property, a computed property depending on it, or a
+  ChangeTracking class having it, replaces its class with a generated
+  sub-class that adds to its '__set__'.  The class
+  is rebuilt from the original whenever behavior is added or removed.
+  Properties that compile their own '__compile_init__' should use this to
+  tell whether '__set__' was overridden, since that added behavior does not
+  apply to new instances.
+
+  Args:
+    prop: Property descriptor.
+
+  Returns:
+    Class of 'prop' before any behavior was added.
+  """
+  cls = type(prop)
+  while '_Property__base_class' in cls.__dict__:
+    cls = cls.__dict__['_Property__base_class']
+  return cls
 
 
 class Property:
@@ -220,7 +1000,7 @@ class Property:
         'Property \'%s\' is already configured on class \'%s\'' % (
           self.name, self.cls.__name__))
     self.__name = name
-    self.__attribute_name = '_%s__%s' % (cls.__name__, name)
+    self.__attribute_name = _attribute_name(cls.__name__, name)
     self.__cls = cls
 
   @property
@@ -237,9 +1017,78 @@ class Property:
       raise AttributeError('Property not configured')
     return self.__cls
 
+  @property
+  def attribute_name(self):
+    """Name of instance attribute where property value is stored."""
+    if not self.__name:
+      raise AttributeError('Property not configured')
+    return self.__attribute_name
+
+  def __reduce_ex__(self, protocol):
+    """Configured properties are pickled by reference to their class."""
+    if not self.__name:
+      return super(Property, self).__reduce_ex__(protocol)
+    return getattr, (self.__cls, self.__name)
+
+  @property
+  def observers(self):
+    """Tuple of functions subscribed to changes of property."""
+    return tuple(self.__dict__.get('_Property__observers', ()))
+
+  def subscribe(self, observer):
+    """Subscribe to changes of property.
+
+    Changes are queued and delivered in batches, see 'batch' and 'flush'.
+    Properties nobody subscribes to do not queue changes, so they cost nothing
+    to set.  Changes queued outside a batch are delivered once there are
+    proputils.MAX_PENDING of them, if 'flush' is not called before.  Only
+    changes made through the property are observed, and not values set when an
+    instance is created by a generated '__init__' or 'from_rows'.
+
+    Args:
+      observer: Function called with a list of Change for every batch in
+        which the property changed on any instance.
+    """
+    observers = self.__dict__.setdefault('_Property__observers', [])
+    observers.append(observer)
+    _set_behavior(self, _ObservedProperty, True)
+
+  def unsubscribe(self, observer):
+    """Unsubscribe from changes of property.
+
+    Once the last observer unsubscribes, queued changes of the property are
+    dropped.
+
+    Args:
+      observer: Function previously passed to 'subscribe'.
+
+    Raises:
+      ValueError: If 'observer' is not subscribed.
+    """
+    observers = self.__dict__.get('_Property__observers', [])
+    observers.remove(observer)
+    if not observers:
+      _set_behavior(self, _ObservedProperty, False)
+      _drop_changes(self)
+
   def __get_property__(self, instance):
     return getattr(instance, self.__attribute_name)
 
+  def __compile_init__(self, compiler, instance, value):
+    """Source for setting property on a newly created instance.
+
+    Args:
+      compiler: propcompile.ValidatorCompiler generating the source.
+      instance: Source of the expression holding the new instance.
+      value: Source of the expression holding the new value.
+
+    Returns:
+      List of statement source lines.
+    """
+    if base_property_class(self).__set__ is Property.__set__:
+      return [compiler.store(instance, self.attribute_name, value)]
+    return ['%s.__set__(%s, %s)' % (compiler.constant(self), instance, value)]
+
   def __get__(self, instance, owner):
     """Get value of property.
 
@@ -287,7 +1136,367 @@ class ReadOnlyProperty(Property):
         '\'%s\' object attribute \'%s\' is read-only' % (self.name,
                                                          self.cls.__name__))
 
+  def __compile_init__(self, compiler, instance, value):
+    # A newly created instance has no value to protect.
+    if base_property_class(self).__set__ is ReadOnlyProperty.__set__:
+      return [compiler.store(instance, self.attribute_name, value)]
+    return super(ReadOnlyProperty, self).__compile_init__(
+      compiler, instance, value)
+
   def __delete__(self, value):
     raise AttributeError(
       '\'%s\' object attribute \'%s\' is read-only' % (self.name,
                                                        self.cls.__name__))
+
+
+class ComputedProperty(Property):
+  """Read-only property whose value is computed from other properties.
+
+  The value is computed the first time it is read and cached in the same
+  storage as any other property, so classes with generated slots get a slot
+  for it.  Setting or deleting any property the computed property depends on
+  through its descriptor clears the cache:
+
+    class Person(HasProps):
+      first = Property()
+      last = Property()
+
+      @computed('first', 'last')
+      def full_name(self):
+        return '%s %s' % (self.first, self.last)
+
+  Dependencies may themselves be computed properties.  They are looked up
+  when the class is configured, so naming a dependency that is not a
+  property of the class raises TypeError at class creation.  Sub-classes that
+  replace a dependency are looked up again when the value is first computed
+  for one of their instances.  Deleting a computed property clears its
+  cache.  Computed properties are not parameters of generated initializers.
+  """
+
+  # Not set by generated initializers, see 'propcompile.init_props'.
+  __compile_init__ = None
+
+  def __init__(self, function, dependencies=()):
+    """Constructor.
+
+    Args:
+      function: Function that takes an instance and returns the value of the
+        property.
+      dependencies: Names of properties the value depends on.
+    """
+    self.__function = function
+    self.__dependencies = tuple(dependencies)
+    self.__dependents = []
+    # Classes whose dependencies are resolved, held weakly so that classes
+    # created at run time may be collected.
+    self.__resolved = weakref.WeakSet()
+
+  @property
+  def dependencies(self):
+    """Tuple of names of properties the value depends on."""
+    return self.__dependencies
+
+  def __config__(self, cls, name):
+    """Configure property and resolve its dependencies on the class.
+
+    Raises:
+      TypeError: When a dependency is not a property of the class.
+    """
+    super(ComputedProperty, self).__config__(cls, name)
+    self.__resolve(cls)
+
+  def __resolve(self, cls):
+    dependencies = []
+    for name in self.__dependencies:
+      prop = getattr(cls, name, None)
+      if not isinstance(prop, Property):
+        raise TypeError(
+          'Computed property \'%s\' of class \'%s\' depends on \'%s\', which '
+          'is not a property' % (self.name, cls.__name__, name))
+      dependencies.append(prop)
+    for prop in dependencies:
+      _add_dependent(prop, self)
+    self.__resolved.add(cls)
+
+  def __get_property__(self, instance):
+    attribute_name = self.attribute_name
+    try:
+      return getattr(instance, attribute_name)
+    except AttributeError:
+      pass
+    cls = type(instance)
+    if cls not in self.__resolved:
+      self.__resolve(cls)
+    value = self.__function(instance)
+    # Bypasses '__setattr__' overrides, as the cache is not a change.
+    object.__setattr__(instance, attribute_name, value)
+    return value
+
+  def __set__(self, instance, value):
+    raise AttributeError(
+      '\'%s\' object attribute \'%s\' is computed' % (
+        self.cls.__name__, self.name))
+
+  def __delete__(self, instance):
+    self.__invalidate__(instance)
+
+  def __add_dependent__(self, dependent):
+    if dependent not in self.__dependents:
+      self.__dependents.append(dependent)
+
+  def __invalidate__(self, instance):
+    """Clear cached value and the values of computed dependents."""
+    try:
+      object.__delattr__(instance, self.attribute_name)
+    except AttributeError:
+      pass
+    for dependent in self.__dependents:
+      dependent.__invalidate__(instance)
+
+
+def computed(*dependencies):
+  """Decorator for defining computed properties.
+
+  Args:
+    dependencies: Names of properties the value depends on.
+
+  Returns:
+    Decorator that takes a function of an instance and returns a
+    ComputedProperty.
+  """
+  def computed_decorator(function):
+    return ComputedProperty(function, dependencies)
+  return computed_decorator
+
+
+class _DependedProperty:
+  """Mixin for properties that clears computed properties when changed."""
+
+  def __set__(self, instance, value):
+    super(_DependedProperty, self).__set__(instance, value)
+    for dependent in self.__dependents:
+      dependent.__invalidate__(instance)
+
+  def __delete__(self, instance):
+    super(_DependedProperty, self).__delete__(instance)
+    for dependent in self.__dependents:
+      dependent.__invalidate__(instance)
+
+  def __add_dependent__(self, dependent):
+    if dependent not in self.__dependents:
+      self.__dependents.append(dependent)
+
+
+def _add_dependent(prop, dependent):
+  try:
+    add_dependent = prop.__add_dependent__
+  except AttributeError:
+    prop._DependedProperty__dependents = []
+    _set_behavior(prop, _DependedProperty, True)
+    add_dependent = prop.__add_dependent__
+  add_dependent(dependent)
+
+
+Change = collections.namedtuple('Change', ['instance', 'name', 'old', 'new'])
+
+
+class _ObservedProperty:
+  """Mixin for properties with subscribers that queues their changes."""
+
+  def __set__(self, instance, value):
+    key = _queue_key(self, instance)
+    pending = _changes.pending
+    if key in pending:
+      super(_ObservedProperty, self).__set__(instance, value)
+    else:
+      old = _current_value(self, instance)
+      super(_ObservedProperty, self).__set__(instance, value)
+      pending[key] = (self, instance, old)
+      if len(pending) >= MAX_PENDING and not _changes.depth:
+        flush()
+
+  def __delete__(self, instance):
+    key = _queue_key(self, instance)
+    pending = _changes.pending
+    if key in pending:
+      super(_ObservedProperty, self).__delete__(instance)
+    else:
+      old = _current_value(self, instance)
+      super(_ObservedProperty, self).__delete__(instance)
+      pending[key] = (self, instance, old)
+      if len(pending) >= MAX_PENDING and not _changes.depth:
+        flush()
+
+
+def _mark_changed(instance, name):
+  """Record change of property of a ChangeTracking instance."""
+  try:
+    changes = instance._ChangeTracking__changes
+  except AttributeError:
+    # Properties may be inherited from classes that do not track changes.
+    if not isinstance(instance, ChangeTracking):
+      return
+    changes = {}
+    object.__setattr__(instance, _CHANGES, changes)
+  changes[name] = None
+
+
+class _TrackedProperty:
+  """Mixin for properties of ChangeTracking classes that records changes."""
+
+  def __compile_init__(self, compiler, instance, value):
+    return super(_TrackedProperty, self).__compile_init__(
+      compiler, instance, value) + [
+        '%s(%s, %r)' % (compiler.constant(_mark_changed), instance, self.name)]
+
+  def __set__(self, instance, value):
+    super(_TrackedProperty, self).__set__(instance, value)
+    _mark_changed(instance, self.name)
+
+  def __delete__(self, instance):
+    super(_TrackedProperty, self).__delete__(instance)
+    _mark_changed(instance, self.name)
+
+
+# Mixins that add behavior to properties at run time, outermost first.
+_BEHAVIORS = (_ObservedProperty, _DependedProperty, _TrackedProperty)
+
+_BEHAVIOR_CLASSES = {}
+
+
+def _set_behavior(prop, behavior, enabled):
+  """Add or remove behavior of a property.
+
+  The class of the property is rebuilt from its original class and the
+  behaviors it has, so behaviors may be removed in any order.
+
+  Args:
+    prop: Property descriptor.
+    behavior: Mixin from _BEHAVIORS.
+    enabled: Whether property should have the behavior.
+  """
+  behaviors = tuple(mixin for mixin in _BEHAVIORS
+                    if (enabled if mixin is behavior
+                        else isinstance(prop, mixin)))
+  base_class = base_property_class(prop)
+  if not behaviors:
+    prop.__class__ = base_class
+    return
+  try:
+    prop_class = _BEHAVIOR_CLASSES[base_class, behaviors]
+  except KeyError:
+    prop_class = type(base_class.__name__, behaviors + (base_class,), {
+      '__module__': base_class.__module__,
+      '__qualname__': base_class.__qualname__,
+      '_Property__base_class': base_class,
+    })
+    _BEHAVIOR_CLASSES[base_class, behaviors] = prop_class
+  prop.__class__ = prop_class
+
+
+def _queue_key(prop, instance):
+  # Instances may define equality, so they are told apart by identity.
+  return id(prop), id(instance)
+
+
+def _current_value(prop, instance):
+  try:
+    return prop.__get__(instance, type(instance))
+  except AttributeError:
+    return DELETED
+
+
+# Number of changes queued outside a batch that are delivered without
+# waiting for 'flush'.  It is read each time a change is queued, so it is
+# tuned by assigning 'proputils.MAX_PENDING'.  It is not exported by the
+# package, since assigning a star-imported copy would have no effect.
+MAX_PENDING = 1024
+
+
+class _Pending(dict):
+  """Changes queued by one thread, keyed by '_queue_key'."""
+
+  __slots__ = ('__weakref__',)
+
+
+# Queues of all threads by id, so that changes can be dropped from each.
+_queues = weakref.WeakValueDictionary()
+_queues_lock = threading.Lock()
+
+
+def _drop_changes(prop):
+  """Drop queued changes of a property from the queues of all threads."""
+  prop_id = id(prop)
+  with _queues_lock:
+    queues = list(_queues.values())
+  for queue in queues:
+    for key in [key for key in list(queue) if key[0] == prop_id]:
+      queue.pop(key, None)
+
+
+class _Changes(threading.local):
+
+  def __init__(self):
+    self.pending = _Pending()
+    self.depth = 0
+    with _queues_lock:
+      _queues[id(self.pending)] = self.pending
+
+
+_changes = _Changes()
+
+
+def _deliver(deliveries):
+  """Call observers with their changes, even if one of them raises."""
+  for index, (observer, changes) in enumerate(deliveries):
+    try:
+      observer(changes)
+    except BaseException:
+      _deliver(deliveries[index + 1:])
+      raise
+
+
+def flush():
+  """Deliver queued changes to observers.
+
+  Changes of a property of an instance made since the last flush are
+  coalesced in to a single Change of the value before the first change to the
+  value at the time of the flush.  Each observer is called once with a list of
+  all its changes.  Changes are queued per thread.  If an observer raises,
+  the other observers still get their changes before the exception
+  propagates.
+  """
+  pending = _changes.pending
+  if not pending:
+    return
+  queued = list(pending.values())
+  pending.clear()
+  changes_by_observer = {}
+  for prop, instance, old in queued:
+    observers = prop.observers
+    if not observers:
+      continue
+    change = Change(instance, prop.name, old, _current_value(prop, instance))
+    for observer in observers:
+      changes_by_observer.setdefault(observer, []).append(change)
+  _deliver(list(changes_by_observer.items()))
+
+
+@contextlib.contextmanager
+def batch():
+  """Deliver changes made within a block in one batch.
+
+  Changes are delivered when the outermost batch exits, even if it exits with
+  an exception:
+
+    with batch():
+      for person in people:
+        person.age += 1
+  """
+  _changes.depth += 1
+  try:
+    yield
+  finally:
+    _changes.depth -= 1
+    if not _changes.depth:
+      flush()
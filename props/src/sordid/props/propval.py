@@ -15,11 +15,53 @@
 # limitations under the License.
 #
 
+import bisect
+import collections
+import functools
+import math
+import numbers
 import operator
+import threading
+import time
 
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+from . import propcompile
 from . import proputils
 
 
+__all__ = [
+  'ValidatedProperty',
+  'Validator',
+  'valid_mask',
+  'AndValidator',
+  'OrValidator',
+  'NotValidator',
+  'failing_node',
+  'validator_def',
+  'TypeValidator',
+  'type_validator',
+  'NONE',
+  'EMPTY',
+  'StrictProperty',
+  'CMPType',
+  'CMP',
+  'IsInValidator',
+  'is_in',
+  'RangeValidator',
+  'simplify',
+  'CacheInfo',
+  'MemoizedValidator',
+  'memoized',
+  'AdaptiveValidator',
+  'adaptive',
+  'validated_property_def',
+]
+
+
 class ValidatedProperty(proputils.Property):
   """Property that provides some type of validation.
 
@@ -48,6 +90,27 @@ class ValidatedProperty(proputils.Property):
         property and returns True if valid, else False.
     """
     self.__validator = validator
+    self.__validate = validator
+    self.__check = None
+
+  @property
+  def validator(self):
+    """Validator of property."""
+    return self.__validator
+
+  def __config__(self, cls, name):
+    """Configure property for use.
+
+    Validator trees are compiled in to a single function the first time a
+    value is validated rather than when the class is defined.
+    """
+    super(ValidatedProperty, self).__config__(cls, name)
+    if isinstance(self.__validator, Validator):
+      self.__validate = self.__compile_validate
+
+  def __compile_validate(self, value):
+    self.__validate = self.__validator.compile()
+    return self.__validate(value)
 
   def __set__(self, instance, value):
     """Set value of validated property.
@@ -59,12 +122,92 @@ class ValidatedProperty(proputils.Property):
     Raises:
       ValueError: If property is not correct value.
     """
-    if not self.__validator(value):
-      raise ValueError('Value \'%r\' is not valid '
-                       'for property \'%s\' on \'%s\'' % (
-                         value, self.name, self.cls.__name__))
+    if not self.__validate(value):
+      raise self.__invalid(value)
     super(ValidatedProperty, self).__set__(instance, value)
 
+  def __invalid(self, value):
+    return ValueError('Value \'%r\' is not valid '
+                      'for property \'%s\' on \'%s\'' % (
+                        value, self.name, self.cls.__name__))
+
+  def __compile_check__(self):
+    """Function that validates a value without raising.
+
+    Validator trees are compiled so that validators which raise on invalid
+    values, such as type validators, return false instead.  Validator
+    functions are returned as they are and may still raise.
+
+    Returns:
+      Function of one value that returns whether it is valid.
+    """
+    if self.__check is None:
+      if isinstance(self.__validator, Validator):
+        self.__check = self.__validator.compile(raising=False)
+      else:
+        self.__check = self.__validator
+    return self.__check
+
+  def __explain_failure__(self, value):
+    """Explain why a value is not valid.
+
+    Called only when a failure is read, so none of the work of finding the
+    failing validator or building an exception is done while collecting.
+
+    Args:
+      value: Value that failed validation.
+
+    Returns:
+      Tuple (node, exception) where 'node' is the validator that rejected
+      'value', see 'failing_node', and 'exception' is the exception assigning
+      'value' raises, or None if 'value' is valid.
+    """
+    try:
+      valid = self.__validate(value)
+    except (TypeError, ValueError) as error:
+      exception = error
+    else:
+      exception = None if valid else self.__invalid(value)
+    return failing_node(self.__validator, value), exception
+
+  def __compile_init__(self, compiler, instance, value):
+    if proputils.base_property_class(self).__set__ is not \
+        ValidatedProperty.__set__:
+      return super(ValidatedProperty, self).__compile_init__(
+        compiler, instance, value)
+    validator = self.__validator
+    if isinstance(validator, Validator):
+      validator = simplify(validator)
+    message = ('Value \'%%r\' is not valid for property \'%s\' on \'%s\'' % (
+      self.name, self.cls.__name__))
+    return [
+      'if not %s:' % compiler.expression(validator, value),
+      '  raise ValueError(%s %% (%s,))' % (compiler.constant(message), value),
+      compiler.store(instance, self.attribute_name, value),
+    ]
+
+  def __validate_column__(self, values):
+    """Validate many values at once without raising.
+
+    Args:
+      values: Sequence of values.  When it is a NumPy array the validator tree
+        is evaluated with array operations where possible.
+
+    Returns:
+      Error mask with a true entry for every invalid value.  A NumPy boolean
+      array if 'values' is a NumPy array, else a list of bools.
+    """
+    if numpy is not None and isinstance(values, numpy.ndarray):
+      return ~valid_mask(self.__validator, values)
+    validate = self.__validate
+    errors = []
+    for value in values:
+      try:
+        errors.append(not validate(value))
+      except (TypeError, ValueError):
+        errors.append(True)
+    return errors
+
 
 class Validator:
   """Base class validator class.
@@ -103,26 +246,252 @@ class Validator:
     """Allows this validator object to be used as a validator function."""
     return self.__validator_func(value)
 
+  def __compile_validator__(self, compiler, value):
+    """Compiles validator in to an expression.
+
+    Validators that only wrap a function compile to a direct call of that
+    function.  Sub-classes that override '__call__' are called as they are
+    unless they provide their own '__compile_validator__'.
+    """
+    if type(self).__call__ is Validator.__call__:
+      return compiler.call(self.__validator_func, value)
+    else:
+      return compiler.call(self, value)
+
+  def __validate_array__(self, values):
+    """Validate a NumPy array of values.
+
+    Validators that can be evaluated with array operations override this
+    method.  The default calls the validator for each value.
+
+    Args:
+      values: NumPy array of values.
+
+    Returns:
+      NumPy boolean array with a true entry for every valid value.
+    """
+    return _valid_loop(self, values)
+
+  def simplify(self):
+    """Normalized form of validator.  See 'simplify'."""
+    return simplify(self)
+
+  def compile(self, raising=True):
+    """Compile validator tree in to a single function.
+
+    The tree is simplified before it is compiled.
+
+    Args:
+      raising: Whether the compiled function may raise for invalid values.
+        When False, validators such as type validators that raise when called
+        return false instead.
+
+    Returns:
+      Function that evaluates the whole validator tree without the nested
+      calls the operators otherwise introduce.
+    """
+    return propcompile.compile_validator(simplify(self), raising)
+
   def __and__(self, other):
     """Creates a validator requires both validators to be true."""
-    @Validator
-    def and_validator(value):
-      return self(value) and other(value)
-    return and_validator
+    return AndValidator(_operands(AndValidator, self) +
+                        _operands(AndValidator, other))
 
   def __or__(self, other):
     """Creates a validator requires either validator to be true."""
-    @Validator
-    def or_validator(value):
-      return self(value) or other(value)
-    return or_validator
+    return OrValidator(_operands(OrValidator, self) +
+                       _operands(OrValidator, other))
 
   def __invert__(self):
     """Creates inverse of a validator."""
-    @Validator
-    def not_validator(value):
-      return not self(value)
-    return not_validator
+    return NotValidator(self)
+
+
+def _valid_loop(validator, values):
+  """Validate each value of an array, treating errors as invalid."""
+  valid = []
+  for value in values.tolist():
+    try:
+      valid.append(bool(validator(value)))
+    except (TypeError, ValueError):
+      valid.append(False)
+  return numpy.array(valid, dtype=numpy.bool_)
+
+
+def valid_mask(validator, values):
+  """Validate a NumPy array of values.
+
+  Validator nodes are evaluated as array operations where possible.  Nodes
+  that can not be vectorized, such as arbitrary validator functions, are
+  called for each value.  Values are converted to Python objects before being
+  passed to such nodes.
+
+  A value that causes a validator to raise TypeError or ValueError is invalid.
+
+  Args:
+    validator: Validator or validator function.
+    values: NumPy array of values.
+
+  Returns:
+    NumPy boolean array with a true entry for every valid value.
+  """
+  try:
+    validate_array = validator.__validate_array__
+  except AttributeError:
+    return _valid_loop(validator, values)
+  else:
+    return validate_array(values)
+
+
+def _operands(operator_type, validator):
+  """Operands to combine under a logical operator.
+
+  Nested operators of the same type are flattened so that 'a & b & c' results
+  in a single three operand validator.  Plain functions are wrapped as
+  Validators.
+  """
+  if isinstance(validator, operator_type):
+    return validator.operands
+  elif isinstance(validator, Validator):
+    return (validator,)
+  else:
+    return (Validator(validator),)
+
+
+class AndValidator(Validator):
+  """Validator that requires all of its operands to be true.
+
+  Operands are evaluated in order and evaluation stops at the first operand
+  that is not true.
+  """
+
+  def __init__(self, operands):
+    """Constructor.
+
+    Args:
+      operands: Sequence of validators.
+    """
+    self.__operands = tuple(operands)
+
+  @property
+  def operands(self):
+    """Tuple of validators combined by this validator."""
+    return self.__operands
+
+  def __call__(self, value):
+    result = True
+    for operand in self.__operands:
+      result = operand(value)
+      if not result:
+        break
+    return result
+
+  def __compile_validator__(self, compiler, value):
+    return '(%s)' % ' and '.join(compiler.expression(operand, value)
+                                 for operand in self.__operands)
+
+  def __validate_array__(self, values):
+    valid = numpy.ones(len(values), dtype=numpy.bool_)
+    for operand in self.__operands:
+      valid &= valid_mask(operand, values)
+      if not valid.any():
+        break
+    return valid
+
+
+class OrValidator(Validator):
+  """Validator that requires any of its operands to be true.
+
+  Operands are evaluated in order and evaluation stops at the first operand
+  that is true.
+  """
+
+  def __init__(self, operands):
+    """Constructor.
+
+    Args:
+      operands: Sequence of validators.
+    """
+    self.__operands = tuple(operands)
+
+  @property
+  def operands(self):
+    """Tuple of validators combined by this validator."""
+    return self.__operands
+
+  def __call__(self, value):
+    result = False
+    for operand in self.__operands:
+      result = operand(value)
+      if result:
+        break
+    return result
+
+  def __compile_validator__(self, compiler, value):
+    return '(%s)' % ' or '.join(compiler.expression(operand, value)
+                                for operand in self.__operands)
+
+  def __validate_array__(self, values):
+    valid = numpy.zeros(len(values), dtype=numpy.bool_)
+    for operand in self.__operands:
+      valid |= valid_mask(operand, values)
+      if valid.all():
+        break
+    return valid
+
+
+class NotValidator(Validator):
+  """Validator that inverts another validator."""
+
+  def __init__(self, operand):
+    """Constructor.
+
+    Args:
+      operand: Validator to invert.
+    """
+    self.__operand = operand
+
+  @property
+  def operand(self):
+    """Validator inverted by this validator."""
+    return self.__operand
+
+  def __call__(self, value):
+    return not self.__operand(value)
+
+  def __compile_validator__(self, compiler, value):
+    return '(not %s)' % compiler.expression(self.__operand, value)
+
+  def __validate_array__(self, values):
+    return ~valid_mask(self.__operand, values)
+
+
+def failing_node(validator, value):
+  """Find the validator in a tree responsible for rejecting a value.
+
+  Operands of 'and' validators are searched in order for the first one that
+  rejects the value.  Any other validator that rejects the value is itself
+  responsible, including 'or' validators, none of whose operands accept it.
+
+  Args:
+    validator: Validator or validator function.
+    value: Value rejected by 'validator'.
+
+  Returns:
+    Validator node within 'validator' that rejects 'value'.
+  """
+  while isinstance(validator, AndValidator):
+    for operand in validator.operands:
+      try:
+        valid = operand(value)
+      except (TypeError, ValueError):
+        valid = False
+      if not valid:
+        validator = operand
+        break
+    else:
+      break
+  return validator
 
 
 def validator_def(definition):
@@ -151,13 +520,94 @@ def validator_def(definition):
     A validator factory function that takes the same parameters as 'definition'
     and returns a Validator object that wraps 'definitions's returned validator.
   """
+  @functools.wraps(definition)
   def validator_decorator(*args, **kwargs):
-    return Validator(definition(*args, **kwargs))
-  validator_decorator.__name__ = definition.__name__
+    return _DefinedValidator(validator_decorator, args, kwargs,
+                             definition(*args, **kwargs))
   return validator_decorator
 
 
-@validator_def
+class _DefinedValidator(Validator):
+  """Validator created by a factory defined with 'validator_def'.
+
+  Validator functions returned by factories are usually closures, which can
+  not be pickled.  Instead, the factory and its arguments are pickled and the
+  validator is created again when unpickled.
+  """
+
+  def __init__(self, factory, args, kwargs, validator_func):
+    super(_DefinedValidator, self).__init__(validator_func)
+    self.__factory = factory
+    self.__args = args
+    self.__kwargs = kwargs
+
+  def __reduce__(self):
+    return _define, (self.__factory, self.__args, self.__kwargs)
+
+
+def _define(factory, args, kwargs):
+  return factory(*args, **kwargs)
+
+
+def _raise_type_error(property_type):
+  raise TypeError('Property must be type %s' % property_type.__name__)
+
+
+class TypeValidator(Validator):
+  """Validator that requires specific type.
+
+  Unlike most validators, a value of the wrong type raises TypeError rather
+  than failing validation.
+  """
+
+  def __init__(self, property_type):
+    """Constructor.
+
+    Args:
+      property_type: The type of the validator.
+    """
+    self.__property_type = property_type
+
+  @property
+  def property_type(self):
+    """Type required by validator."""
+    return self.__property_type
+
+  def __call__(self, value):
+    if not isinstance(value, self.__property_type):
+      _raise_type_error(self.__property_type)
+    return True
+
+  def __compile_validator__(self, compiler, value):
+    property_type = compiler.constant(self.__property_type)
+    if not compiler.raising:
+      return 'isinstance(%s, %s)' % (value, property_type)
+    return '(isinstance(%s, %s) or %s)' % (
+      value, property_type, compiler.call(_raise_type_error, property_type))
+
+  def __validate_array__(self, values):
+    try:
+      python_type = _PYTHON_TYPE_BY_KIND[values.dtype.kind]
+    except KeyError:
+      return super(TypeValidator, self).__validate_array__(values)
+    else:
+      return numpy.full(len(values),
+                        issubclass(python_type, self.__property_type),
+                        dtype=numpy.bool_)
+
+
+# Python type of the values of NumPy arrays of a given kind.
+_PYTHON_TYPE_BY_KIND = {
+  'b': bool,
+  'i': int,
+  'u': int,
+  'f': float,
+  'c': complex,
+  'U': str,
+  'S': bytes,
+}
+
+
 def type_validator(property_type):
   """Create validator that requires specific type.
 
@@ -167,23 +617,61 @@ def type_validator(property_type):
   Returns:
     Validator that only accepts values of a specific type.
   """
-  def type_validator_impl(value):
-    if not isinstance(value, property_type):
-      raise TypeError('Property must be type %s' % property_type.__name__)
-    return True
-  return type_validator_impl
+  return TypeValidator(property_type)
 
 
-@Validator
-def NONE(value):
+class _NoneValidator(Validator):
   """Constant validator that requires None value."""
-  return value is None
 
+  def __init__(self):
+    pass
+
+  def __reduce__(self):
+    return 'NONE'
+
+  def __call__(self, value):
+    return value is None
+
+  def __compile_validator__(self, compiler, value):
+    return '(%s is None)' % value
+
+  def __validate_array__(self, values):
+    if values.dtype.kind == 'O':
+      return numpy.array([value is None for value in values],
+                         dtype=numpy.bool_)
+    return numpy.zeros(len(values), dtype=numpy.bool_)
 
-@Validator
-def EMPTY(value):
+
+class _EmptyValidator(Validator):
   """Constant validator that requires empty values (allows None)."""
-  return not bool(value)
+
+  def __init__(self):
+    pass
+
+  def __reduce__(self):
+    return 'EMPTY'
+
+  def __call__(self, value):
+    return not bool(value)
+
+  def __compile_validator__(self, compiler, value):
+    return '(not %s)' % value
+
+  def __validate_array__(self, values):
+    kind = values.dtype.kind
+    if kind == 'b':
+      return ~values
+    elif kind in 'iufc':
+      return values == 0
+    elif kind in 'US':
+      return values == values.dtype.type()
+    else:
+      return super(_EmptyValidator, self).__validate_array__(values)
+
+
+NONE = _NoneValidator()
+
+EMPTY = _EmptyValidator()
 
 
 class StrictProperty(ValidatedProperty):
@@ -256,22 +744,882 @@ class CMP(Validator, metaclass=CMPType):
 
         Args:
             binop: A function that takes two parameters and returns boolean value.
+            constant: Value compared against as the right hand side of binop.
         """
-        def validator(value):
-            return binop(value, constant)
         self.__binop = binop
-        super(CMP, self).__init__(validator)
+        self.__constant = constant
 
     @property
     def binop(self):
         """Binop associated with this validator."""
         return self.__binop
 
+    @property
+    def constant(self):
+        """Constant compared against."""
+        return self.__constant
+
+    def __call__(self, value):
+        return self.__binop(value, self.__constant)
+
+    def __compile_validator__(self, compiler, value):
+        constant = compiler.constant(self.__constant)
+        try:
+            operator_source = _OPERATOR_SOURCE[self.__binop]
+        except KeyError:
+            return '%s(%s, %s)' % (compiler.constant(self.__binop), value, constant)
+        else:
+            return '(%s %s %s)' % (value, operator_source, constant)
+
+    def __validate_array__(self, values):
+        if values.dtype.kind != 'O' and self.__binop in _OPERATOR_SOURCE:
+            try:
+                return numpy.asarray(self.__binop(values, self.__constant),
+                                     dtype=numpy.bool_)
+            except TypeError:
+                pass
+        return super(CMP, self).__validate_array__(values)
+
+
+_OPERATOR_SOURCE = {
+    operator.lt: '<',
+    operator.le: '<=',
+    operator.gt: '>',
+    operator.ge: '>=',
+    operator.eq: '==',
+    operator.ne: '!=',
+}
+
+
+def _range_contains(index, value):
+    if type(value) is int:
+        return value in index
+    # Testing anything but an integer would compare it with every member.
+    if not isinstance(value, numbers.Number):
+        return False
+    try:
+        integer = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return integer == value and integer in index
+
+
+def _hashable_contains(index, value):
+    try:
+        return value in index
+    except TypeError:
+        # Values that can not be hashed may still equal a member.
+        return any(member == value for member in index)
+
+
+# Types whose values can always be hashed.
+_HASHABLE_TYPES = frozenset([bool, bytes, float, int, str, type(None)])
+
+
+def _bisect_contains(index, value):
+    # Only members are known to be totally ordered among themselves.
+    if type(value) is not type(index[0]):
+        return value in index
+    try:
+        position = bisect.bisect_left(index, value)
+    except TypeError:
+        return value in index
+    return position < len(index) and index[position] == value
+
+
+def _totally_ordered(members):
+    """Sorted members if they are of one type and totally ordered, else None."""
+    member_type = type(members[0])
+    if any(type(member) is not member_type for member in members):
+        return None
+    try:
+        ordered = sorted(members)
+        # Partial orders, such as that of sets, sort without error but can
+        # not be searched.
+        for lower, higher in zip(ordered, ordered[1:]):
+            if not lower < higher or higher < lower:
+                return None
+    except TypeError:
+        return None
+    return ordered
+
+
+class IsInValidator(Validator):
+    """Validator that checks whether value is in a constant set of values.
+
+    The best index for the members is built when the validator is created and
+    is reported by 'strategy':
+
+        'range': Members are a contiguous run of integers, kept as a range
+            whose membership test is a bounds check for integer values.
+            Other numbers are members if they equal an integer member, and
+            values that are not numbers never are.
+        'set': Members are hashable, kept in a frozenset.  Values that can
+            not be hashed are compared with each member in turn.
+        'sorted': Members are not hashable but are distinct values of one
+            totally ordered type, such as lists of numbers, kept in a sorted
+            list searched with bisect.
+        'scan': Anything else, including strings and other containers with
+            their own notion of membership, is used as given.
+    """
+
+    def __init__(self, constant):
+        """Constructor.
+
+        Args:
+            constant: Container of valid values.
+        """
+        self.__constant = constant
+        self.__strategy, self.__index = _index_members(constant)
+        self.__contains = _CONTAINS_BY_STRATEGY[self.__strategy]
+        self.__members_array = _members_array(constant)
+
+    def __reduce__(self):
+        return IsInValidator, (self.__constant,)
+
+    @property
+    def constant(self):
+        """Container of valid values."""
+        return self.__constant
+
+    @property
+    def strategy(self):
+        """Name of strategy used to check membership."""
+        return self.__strategy
+
+    @property
+    def index(self):
+        """Container used to check membership."""
+        return self.__index
+
+    def __call__(self, value):
+        return self.__contains(self.__index, value)
+
+    def __compile_validator__(self, compiler, value):
+        index = compiler.constant(self.__index)
+        if self.__strategy == 'range':
+            return '(%s in %s if type(%s) is int else %s(%s, %s))' % (
+                value, index, value, compiler.constant(_range_contains),
+                index, value)
+        elif self.__strategy == 'set':
+            return '(%s in %s if type(%s) in %s else %s(%s, %s))' % (
+                value, index, value, compiler.constant(_HASHABLE_TYPES),
+                compiler.constant(_hashable_contains), index, value)
+        elif self.__strategy == 'sorted':
+            return '%s(%s, %s)' % (compiler.constant(_bisect_contains), index, value)
+        else:
+            return '(%s in %s)' % (value, index)
+
+    def __validate_array__(self, values):
+        kind = values.dtype.kind
+        if self.__strategy == 'range':
+            if self.__index.step == 1 and kind in 'biuf':
+                valid = ((values >= self.__index.start) &
+                         (values < self.__index.stop))
+                if kind == 'f':
+                    valid &= values == numpy.floor(values)
+                return valid
+        elif kind != 'O' and self.__members_array is not None:
+            members = self.__members_array
+            if (_ARRAY_KIND_GROUPS.get(kind) ==
+                _ARRAY_KIND_GROUPS.get(members.dtype.kind, False)):
+                return numpy.isin(values, members)
+        return super(IsInValidator, self).__validate_array__(values)
+
+
+def _members_array(constant):
+    """Members of an is_in validator as a NumPy array of scalars, or None.
+
+    Ranges are never expanded.  Members that do not convert to a one dimensional array of a scalar type,
+    such as lists of different lengths, are checked one value at a time.
+    """
+    if (numpy is None or not isinstance(constant, _FOLDABLE_CONTAINERS) or
+        isinstance(constant, range)):
+        return None
+    try:
+        members = numpy.array(list(constant))
+    except (TypeError, ValueError):
+        return None
+    if members.ndim != 1 or members.dtype.kind == 'O':
+        return None
+    return members
+
+
+_CONTAINS_BY_STRATEGY = {
+    'range': _range_contains,
+    'set': _hashable_contains,
+    'sorted': _bisect_contains,
+    'scan': operator.contains,
+}
+
+
+def _index_members(constant):
+    """Choose strategy and build index for the members of an is_in validator.
+
+    Returns:
+        Tuple (strategy, index).
+    """
+    if not isinstance(constant, _FOLDABLE_CONTAINERS) or not constant:
+        return 'scan', constant
+    if isinstance(constant, range):
+        return 'range', constant
+
+    try:
+        members = frozenset(constant)
+    except TypeError:
+        ordered = _totally_ordered(list(constant))
+        if ordered is None:
+            return 'scan', constant
+        return 'sorted', ordered
+
+    if all(type(member) is int for member in members):
+        lowest = min(members)
+        highest = max(members)
+        if highest - lowest + 1 == len(members):
+            return 'range', range(lowest, highest + 1)
+    return 'set', members
+
+
+# Kinds of NumPy array that can be compared with each other.
+_ARRAY_KIND_GROUPS = {
+    'b': 'number',
+    'i': 'number',
+    'u': 'number',
+    'f': 'number',
+    'U': 'str',
+    'S': 'bytes',
+}
+
 
-@validator_def
 def is_in(constant):
-    """Create validator to check whether value is in a constant set of values."""
-    return lambda value: value in constant
+    """Create validator to check whether value is in a constant set of values.
+
+    See IsInValidator for how membership is checked.
+    """
+    return IsInValidator(constant)
+
+
+class RangeValidator(Validator):
+  """Validator that requires value to be within an interval.
+
+  Produced by 'simplify' when merging CMP bounds, but may also be used
+  directly.  A bound of None means the interval is unbounded on that side.
+  """
+
+  def __init__(self, lower=None, upper=None,
+               lower_inclusive=True, upper_inclusive=True):
+    """Constructor.
+
+    Args:
+      lower: Lower bound of interval or None if unbounded.
+      upper: Upper bound of interval or None if unbounded.
+      lower_inclusive: Whether the lower bound itself is valid.
+      upper_inclusive: Whether the upper bound itself is valid.
+    """
+    if lower is None and upper is None:
+      raise ValueError('Range must have at least one bound')
+    self.__lower = lower
+    self.__upper = upper
+    self.__lower_inclusive = lower_inclusive
+    self.__upper_inclusive = upper_inclusive
+
+  @property
+  def lower(self):
+    """Lower bound or None."""
+    return self.__lower
+
+  @property
+  def upper(self):
+    """Upper bound or None."""
+    return self.__upper
+
+  @property
+  def lower_inclusive(self):
+    """Whether the lower bound is valid."""
+    return self.__lower_inclusive
+
+  @property
+  def upper_inclusive(self):
+    """Whether the upper bound is valid."""
+    return self.__upper_inclusive
+
+  def __iter_comparisons(self):
+    if self.__lower is not None:
+      yield (operator.ge if self.__lower_inclusive else operator.gt,
+             self.__lower)
+    if self.__upper is not None:
+      yield (operator.le if self.__upper_inclusive else operator.lt,
+             self.__upper)
+
+  def __call__(self, value):
+    for binop, constant in self.__iter_comparisons():
+      if not binop(value, constant):
+        return False
+    return True
+
+  def __compile_validator__(self, compiler, value):
+    return '(%s)' % ' and '.join(
+      '%s %s %s' % (value, _OPERATOR_SOURCE[binop], compiler.constant(constant))
+      for binop, constant in self.__iter_comparisons())
+
+  def __validate_array__(self, values):
+    if values.dtype.kind != 'O':
+      try:
+        valid = numpy.ones(len(values), dtype=numpy.bool_)
+        for binop, constant in self.__iter_comparisons():
+          valid &= binop(values, constant)
+        return valid
+      except TypeError:
+        pass
+    return super(RangeValidator, self).__validate_array__(values)
+
+  def __repr__(self):
+    return '%s%r, %r%s' % ('[' if self.__lower_inclusive else '(',
+                           self.__lower, self.__upper,
+                           ']' if self.__upper_inclusive else ')')
+
+
+_RANGE_BY_BINOP = {
+  operator.lt: lambda constant: RangeValidator(upper=constant,
+                                               upper_inclusive=False),
+  operator.le: lambda constant: RangeValidator(upper=constant),
+  operator.gt: lambda constant: RangeValidator(lower=constant,
+                                               lower_inclusive=False),
+  operator.ge: lambda constant: RangeValidator(lower=constant),
+}
+
+
+def _as_range(validator):
+  """Range equivalent of a CMP or RangeValidator, else None."""
+  if isinstance(validator, RangeValidator):
+    return validator
+  elif isinstance(validator, CMP):
+    try:
+      new_range = _RANGE_BY_BINOP[validator.binop]
+    except (KeyError, TypeError):
+      return None
+    else:
+      if validator.constant is None:
+        return None
+      return new_range(validator.constant)
+  else:
+    return None
+
+
+def _tighter(bound1, inclusive1, bound2, inclusive2, pick):
+  if bound1 is None:
+    return bound2, inclusive2
+  if bound2 is None:
+    return bound1, inclusive1
+  if bound1 == bound2:
+    return bound1, inclusive1 and inclusive2
+  elif pick(bound1, bound2):
+    return bound1, inclusive1
+  else:
+    return bound2, inclusive2
+
+
+def _intersect_ranges(range1, range2):
+  """Intersection of two ranges or None if bounds are not comparable."""
+  try:
+    lower, lower_inclusive = _tighter(range1.lower, range1.lower_inclusive,
+                                      range2.lower, range2.lower_inclusive,
+                                      operator.gt)
+    upper, upper_inclusive = _tighter(range1.upper, range1.upper_inclusive,
+                                      range2.upper, range2.upper_inclusive,
+                                      operator.lt)
+  except TypeError:
+    return None
+  return RangeValidator(lower, upper, lower_inclusive, upper_inclusive)
+
+
+_FOLDABLE_CONTAINERS = (frozenset, set, list, tuple, range)
+
+
+def _members(validator):
+  """Members of an is_in validator as a frozenset or None if not foldable.
+
+  Ranges are not foldable, as they may be far too large to hold as a set.
+  """
+  if not isinstance(validator, IsInValidator):
+    return None
+  constant = validator.constant
+  if (not isinstance(constant, _FOLDABLE_CONTAINERS) or
+      isinstance(constant, range)):
+    return None
+  try:
+    return frozenset(constant)
+  except TypeError:
+    return None
+
+
+def _simplify_operands(operator_type, operands):
+  simplified = []
+  for operand in operands:
+    operand = simplify(operand)
+    if isinstance(operand, operator_type):
+      simplified.extend(operand.operands)
+    else:
+      simplified.append(operand)
+  return simplified
+
+
+def _merge_and(previous, operand):
+  """Single validator equivalent to 'previous & operand', else None."""
+  previous_range = _as_range(previous)
+  operand_range = _as_range(operand)
+  if previous_range is not None and operand_range is not None:
+    return _intersect_ranges(previous_range, operand_range)
+
+  previous_members = _members(previous)
+  if previous_members is not None:
+    operand_members = _members(operand)
+    if operand_members is not None:
+      return IsInValidator(previous_members & operand_members)
+    if operand_range is not None:
+      # Values that are not members fail before the range is evaluated.
+      try:
+        return IsInValidator(frozenset(
+          member for member in previous_members if operand_range(member)))
+      except TypeError:
+        return None
+
+  if previous is EMPTY and operand is NONE:
+    # None is always empty.
+    return NONE
+  return None
+
+
+def _merge_or(previous, operand):
+  """Single validator equivalent to 'previous | operand', else None."""
+  previous_members = _members(previous)
+  if previous_members is not None:
+    operand_members = _members(operand)
+    if operand_members is not None:
+      return IsInValidator(previous_members | operand_members)
+
+  if previous is NONE and operand is EMPTY:
+    # Anything None is also empty.
+    return EMPTY
+  return None
+
+
+def _simplify_and(validator):
+  operands = _simplify_operands(AndValidator, validator.operands)
+  result = []
+  for operand in operands:
+    if operand is NONE or operand is EMPTY:
+      if NONE in result or operand in result:
+        continue
+    if result:
+      merged = _merge_and(result[-1], operand)
+      if merged is not None:
+        result[-1] = merged
+        continue
+    result.append(operand)
+
+  if len(result) == 1:
+    return result[0]
+  return AndValidator(result)
+
+
+def _simplify_or(validator):
+  operands = _simplify_operands(OrValidator, validator.operands)
+  result = []
+  for operand in operands:
+    if operand is NONE or operand is EMPTY:
+      if EMPTY in result or operand in result:
+        continue
+    if result:
+      merged = _merge_or(result[-1], operand)
+      if merged is not None:
+        result[-1] = merged
+        continue
+    result.append(operand)
+
+  if len(result) == 1:
+    return result[0]
+  return OrValidator(result)
+
+
+def simplify(validator):
+  """Simplify a validator tree in to its normalized form.
+
+  Normalization merges CMP bounds combined with '&' in to a single
+  RangeValidator, folds is_in validators combined with '&' or '|' in to a
+  single set, filters is_in members by a range that follows them and removes
+  redundant NONE and EMPTY checks.  Double negation is removed.
+
+  Only neighboring operands are merged, so the simplified validator
+  evaluates operands in the same order and raises the same exceptions as the
+  original.  Only is_in validators of hashable members are folded, and
+  ranges are never expanded in to sets.  Validators that can not be
+  simplified are returned unchanged.
+
+  Args:
+    validator: Validator to simplify.
+
+  Returns:
+    Equivalent normalized validator.
+  """
+  if isinstance(validator, AndValidator):
+    return _simplify_and(validator)
+  elif isinstance(validator, OrValidator):
+    return _simplify_or(validator)
+  elif isinstance(validator, NotValidator):
+    operand = simplify(validator.operand)
+    if isinstance(operand, NotValidator):
+      return operand.operand
+    elif operand is validator.operand:
+      return validator
+    else:
+      return NotValidator(operand)
+  else:
+    return validator
+
+
+CacheInfo = collections.namedtuple('CacheInfo',
+                                   ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class MemoizedValidator(Validator):
+  """Validator that caches the results of a pure validator.
+
+  Results are cached per hashable value with least recently used eviction.
+  Values of different types are cached separately, so that for example 1 and
+  1.0 are not confused by a type validator.  Unhashable values bypass the
+  cache.  Exceptions raised by the wrapped validator are not cached.  The
+  validator may be shared by threads: the cache is locked while it is read
+  or changed, but not while the wrapped validator runs.
+  """
+
+  def __init__(self, validator, maxsize=128):
+    """Constructor.
+
+    Args:
+      validator: Validator or validator function whose result depends only
+        on the value being validated.
+      maxsize: Maximum number of cached results or None for no limit.
+    """
+    self.__validator = validator
+    if isinstance(validator, Validator):
+      self.__validate = self.__compile_validate
+    else:
+      self.__validate = validator
+    self.__maxsize = maxsize
+    self.__cache = collections.OrderedDict()
+    self.__lock = threading.Lock()
+    self.__hits = 0
+    self.__misses = 0
+
+  @property
+  def validator(self):
+    """Wrapped validator."""
+    return self.__validator
+
+  def __compile_validate(self, value):
+    self.__validate = self.__validator.compile()
+    return self.__validate(value)
+
+  def __reduce__(self):
+    # The cache is not pickled.
+    return MemoizedValidator, (self.__validator, self.__maxsize)
+
+  def __call__(self, value):
+    key = (value.__class__, value)
+    cache = self.__cache
+    with self.__lock:
+      try:
+        result = cache[key]
+      except KeyError:
+        pass
+      except TypeError:
+        key = None
+      else:
+        self.__hits += 1
+        cache.move_to_end(key)
+        return result
+    if key is None:
+      return self.__validate(value)
+
+    # Other threads may validate the same value meanwhile, the last of them
+    # to finish stores the result again.
+    result = self.__validate(value)
+    with self.__lock:
+      self.__misses += 1
+      cache[key] = result
+      if self.__maxsize is not None and len(cache) > self.__maxsize:
+        cache.popitem(last=False)
+    return result
+
+  def cache_info(self):
+    """Cache statistics.
+
+    Returns:
+      CacheInfo of hits, misses, maxsize and current size.
+    """
+    with self.__lock:
+      return CacheInfo(self.__hits, self.__misses, self.__maxsize,
+                       len(self.__cache))
+
+  def cache_clear(self):
+    """Clear cache and statistics."""
+    with self.__lock:
+      self.__cache.clear()
+      self.__hits = 0
+      self.__misses = 0
+
+
+def memoized(validator, maxsize=128):
+  """Create validator that caches the results of a pure validator.
+
+  The result may be combined with other validators like any other:
+
+    country = ValidatedProperty(NONE | memoized(is_in(COUNTRY_CODES)))
+
+  Args:
+    validator: Validator or validator function whose result depends only on
+      the value being validated.
+    maxsize: Maximum number of cached results or None for no limit.
+
+  Returns:
+    MemoizedValidator wrapping 'validator'.
+  """
+  return MemoizedValidator(validator, maxsize)
+
+
+# Validators that guard the operands that follow them.
+_GUARDS = (TypeValidator, _NoneValidator, _EmptyValidator)
+
+
+def _is_guard(validator):
+  if isinstance(validator, _GUARDS):
+    return True
+  elif isinstance(validator, (AndValidator, OrValidator)):
+    return any(_is_guard(operand) for operand in validator.operands)
+  elif isinstance(validator, NotValidator):
+    return _is_guard(validator.operand)
+  return False
+
+
+class _OperandStats:
+  """Observations of one operand of an 'and' or 'or' validator."""
+
+  __slots__ = ('elapsed', 'passes', 'raises')
+
+  def __init__(self):
+    self.elapsed = 0
+    self.passes = 0
+    self.raises = 0
+
+
+class AdaptiveValidator(Validator):
+  """Validator that learns the best order for its operands.
+
+  The operands of '&' and '|' are evaluated left to right and evaluation stops
+  at the first operand that decides the result.  When a cheap operand that
+  usually decides the result follows an expensive one, reordering the operands
+  saves time on every validation.
+
+  An adaptive validator evaluates every operand of a sample of the values it
+  validates, recording how long each takes and how often it passes.
+  Periodically, operands are sorted by expected cost per decided result, which
+  is the best order for independent operands, and the tree is recompiled.
+  Results are always those of the current order.
+
+  Operands may only be moved when no operand depends on another to reject
+  values it can not handle, as in 'type_validator(int) & (CMP >= 0)'.  Type
+  validators, NONE, EMPTY, validators containing them and any operand that
+  raised while sampled are never moved, and no operand is moved across them.
+
+  Learning is not deterministic, so once the order has settled call 'freeze'
+  to fix it:
+
+    validator = adaptive(is_in(CODES) & memoized(check_digit))
+    ... validate representative values ...
+    frozen = validator.freeze()
+  """
+
+  def __init__(self, validator, sample_interval=64, window=256):
+    """Constructor.
+
+    Args:
+      validator: Validator tree to reorder.  It is simplified first.
+      sample_interval: Sample one in every 'sample_interval' values.
+      window: Number of samples between reorderings.
+    """
+    self.__tree = simplify(validator)
+    self.__sample_interval = sample_interval
+    self.__window = window
+    self.__stats = {}
+    self.__orders = {}
+    self.__calls = 0
+    self.__samples = 0
+    self.__frozen = False
+    self.__validator = self.__tree
+    self.__validate = self.__compile_validate
+
+  @property
+  def validator(self):
+    """Validator tree in its current order."""
+    return self.__validator
+
+  def __compile_validate(self, value):
+    self.__validate = propcompile.compile_validator(self.__validator)
+    return self.__validate(value)
+
+  @property
+  def frozen(self):
+    """Whether order is frozen."""
+    return self.__frozen
+
+  def __reduce__(self):
+    # Samples are not pickled, only the order learned from them.
+    return (AdaptiveValidator,
+            (self.__validator, self.__sample_interval, self.__window),
+            self.__frozen)
+
+  def __setstate__(self, frozen):
+    if frozen:
+      self.freeze()
+
+  def __call__(self, value):
+    if self.__frozen:
+      return self.__validate(value)
+    self.__calls += 1
+    if self.__calls % self.__sample_interval:
+      return self.__validate(value)
+
+    result, error = self.__evaluate(self.__tree, value)
+    self.__samples += 1
+    if self.__samples % self.__window == 0:
+      self.__reorder()
+    if error is not None:
+      raise error
+    return result
+
+  def __compile_validator__(self, compiler, value):
+    if self.__frozen:
+      return compiler.expression(self.__validator, value)
+    return compiler.call(self, value)
+
+  def __evaluate(self, node, value):
+    if isinstance(node, NotValidator):
+      result, error = self.__evaluate(node.operand, value)
+      return not result, error
+    elif not isinstance(node, (AndValidator, OrValidator)):
+      try:
+        return node(value), None
+      except Exception as error:
+        return None, error
+
+    operands = node.operands
+    try:
+      stats = self.__stats[id(node)]
+    except KeyError:
+      stats = self.__stats[id(node)] = [_OperandStats() for _ in operands]
+    outcomes = []
+    for operand, stat in zip(operands, stats):
+      start = time.perf_counter_ns()
+      result, error = self.__evaluate(operand, value)
+      stat.elapsed += time.perf_counter_ns() - start
+      if error is not None:
+        stat.raises += 1
+      elif result:
+        stat.passes += 1
+      outcomes.append((result, error))
+
+    # The outcome is that of evaluating the operands in the current order.
+    decisive = isinstance(node, OrValidator)
+    for index in self.__orders.get(id(node), range(len(operands))):
+      result, error = outcomes[index]
+      if error is not None or bool(result) == decisive:
+        break
+    return result, error
+
+  def __order(self, node):
+    stats = self.__stats.get(id(node))
+    order = list(range(len(node.operands)))
+    if stats is None:
+      return order
+    decisive = isinstance(node, OrValidator)
+
+    def rank(index):
+      stat = stats[index]
+      decided = stat.passes if decisive else self.__samples - stat.passes
+      if decided <= 0:
+        return math.inf
+      return stat.elapsed / decided
+
+    # Operands are only sorted between the fixed ones.
+    result = []
+    run = []
+    for index in order:
+      operand = node.operands[index]
+      if _is_guard(operand) or stats[index].raises:
+        result.extend(sorted(run, key=rank))
+        result.append(index)
+        run = []
+      else:
+        run.append(index)
+    result.extend(sorted(run, key=rank))
+    return result
+
+  def __rebuild(self, node):
+    if isinstance(node, NotValidator):
+      operand = self.__rebuild(node.operand)
+      return node if operand is node.operand else NotValidator(operand)
+    elif not isinstance(node, (AndValidator, OrValidator)):
+      return node
+    order = self.__orders.get(id(node), range(len(node.operands)))
+    operands = [self.__rebuild(node.operands[index]) for index in order]
+    if all(new is old for new, old in zip(operands, node.operands)):
+      return node
+    return type(node)(operands)
+
+  def __reorder(self):
+    self.__collect_orders(self.__tree)
+    self.__validator = self.__rebuild(self.__tree)
+    self.__validate = propcompile.compile_validator(self.__validator)
+
+  def __collect_orders(self, node):
+    if isinstance(node, NotValidator):
+      self.__collect_orders(node.operand)
+    elif isinstance(node, (AndValidator, OrValidator)):
+      self.__orders[id(node)] = self.__order(node)
+      for operand in node.operands:
+        self.__collect_orders(operand)
+
+  def freeze(self):
+    """Fix operand order as learned so far.
+
+    Frozen validators no longer sample values and compile inline in to the
+    validators and properties that use them.
+
+    Returns:
+      Validator tree in its frozen order.  It has no adaptive behavior, so it
+      may be used in place of this validator to get the same order each
+      time.
+    """
+    if not self.__frozen:
+      if self.__samples:
+        self.__reorder()
+      self.__frozen = True
+    return self.__validator
+
+
+def adaptive(validator, sample_interval=64, window=256):
+  """Create validator that learns the best order for its operands.
+
+  Args:
+    validator: Validator tree to reorder.
+    sample_interval: Sample one in every 'sample_interval' values.
+    window: Number of samples between reorderings.
+
+  Returns:
+    AdaptiveValidator wrapping 'validator'.
+  """
+  return AdaptiveValidator(validator, sample_interval, window)
 
 
 def validated_property_def(validator):
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import io
+import unittest
+
+from sordid.props import propcodec
+from sordid.props import proputils
+from sordid.props import propval
+
+
+class Reading(proputils.HasProps, init=True):
+  sensor = propval.StrictProperty(str)
+  value = propval.StrictProperty(float)
+  count = propval.StrictProperty(int)
+  valid = propval.StrictProperty(bool)
+  note = proputils.Property()
+
+  @proputils.computed('value')
+  def doubled(self):
+    return self.value * 2
+
+
+class FrozenReading(proputils.HasProps, frozen=True, slots=True):
+  sensor = propval.StrictProperty(str)
+  value = propval.StrictProperty(float)
+
+
+class CodecTest(unittest.TestCase):
+
+  def setUp(self):
+    self.codec = propcodec.Codec(Reading)
+    self.unsafe = propcodec.Codec(Reading, unsafe=True)
+    self.reading = Reading(sensor='a', value=1.5, count=2, valid=True,
+                           note={'tags': ['x', None], 'big': 2 ** 70})
+    self.partial = Reading(sensor='b', count=-3)
+
+  def assertSameReading(self, expected, actual):
+    self.assertIs(type(expected), type(actual))
+    self.assertEqual(self.codec.to_dict(expected),
+                     self.codec.to_dict(actual))
+
+  def testToDict(self):
+    self.assertEqual({'sensor': 'a', 'value': 1.5, 'count': 2, 'valid': True,
+                      'note': {'tags': ['x', None], 'big': 2 ** 70}},
+                     self.codec.to_dict(self.reading))
+    self.assertEqual({'sensor': 'b', 'count': -3},
+                     self.codec.to_dict(self.partial))
+
+  def testFromDict(self):
+    for codec in (self.codec, self.unsafe):
+      reading = codec.from_dict({'sensor': 'b', 'count': -3})
+      self.assertSameReading(self.partial, reading)
+
+  def testFromDictValidates(self):
+    self.assertRaises(TypeError, self.codec.from_dict, {'count': 'x'})
+    self.assertRaises(TypeError, self.codec.from_dict, {'unknown': 1})
+    reading = self.unsafe.from_dict({'count': 'x', 'unknown': 1})
+    self.assertEqual('x', reading.count)
+
+  def testJson(self):
+    for reading in (self.reading, self.partial):
+      text = self.codec.to_json(reading)
+      self.assertSameReading(reading, self.codec.from_json(text))
+      self.assertSameReading(reading, self.unsafe.from_json(text))
+
+  def testJsonStream(self):
+    out = io.StringIO()
+    self.codec.dump_json([self.reading, self.partial], out)
+    self.assertEqual(2, out.getvalue().count('\n'))
+    lines = out.getvalue().splitlines() + ['']
+    readings = list(self.codec.load_json(lines))
+    self.assertEqual(2, len(readings))
+    self.assertSameReading(self.reading, readings[0])
+    self.assertSameReading(self.partial, readings[1])
+
+  def testBytes(self):
+    for reading in (self.reading, self.partial, Reading()):
+      data = self.codec.to_bytes(reading)
+      self.assertIsInstance(data, bytes)
+      self.assertSameReading(reading, self.codec.from_bytes(data))
+      self.assertSameReading(reading, self.unsafe.from_bytes(data))
+    self.assertIs(True, self.codec.from_bytes(
+      self.codec.to_bytes(self.reading)).valid)
+
+  def testBytesValues(self):
+    values = [None, True, False, 0, -1, 2 ** 63, -2 ** 80, 1.25, '', 'héllo',
+              b'\x00', [], [1, [2]], (1, 'a'), {'a': {1: b'b'}}]
+    for value in values:
+      reading = Reading(note=value)
+      decoded = self.codec.from_bytes(self.codec.to_bytes(reading))
+      self.assertEqual(value, decoded.note)
+      self.assertIs(type(value), type(decoded.note))
+
+  def testBytesFixedWidthEscape(self):
+    for count in (2 ** 63, 2 ** 63 - 1, -2 ** 63, -2 ** 63 + 1, -2 ** 90,
+                  True, False):
+      reading = Reading(count=count)
+      data = self.codec.to_bytes(reading)
+      for codec in (self.codec, self.unsafe):
+        decoded = codec.from_bytes(data)
+        self.assertEqual(count, decoded.count)
+        self.assertIs(type(count), type(decoded.count))
+    out = io.BytesIO()
+    self.codec.dump_bytes([Reading(count=2 ** 70, valid=True),
+                           Reading(count=1)], out)
+    out.seek(0)
+    self.assertEqual([2 ** 70, 1],
+                     [reading.count
+                      for reading in self.codec.load_bytes(out)])
+
+  def testBytesUnsupported(self):
+    self.assertRaises(TypeError, self.codec.to_bytes, Reading(note=object()))
+
+  def testBytesCorrupt(self):
+    data = self.codec.to_bytes(self.partial)
+    self.assertRaises(ValueError, self.codec.from_bytes, data + b'x')
+    self.assertRaises(Exception, self.codec.from_bytes, data[:-1])
+
+  def testBytesValidates(self):
+
+    class Strict(proputils.HasProps):
+      note = propval.StrictProperty(str)
+
+    class Loose(proputils.HasProps):
+      note = proputils.Property()
+
+    loose = Loose()
+    loose.note = 1
+    data = propcodec.Codec(Loose).to_bytes(loose)
+    self.assertRaises(TypeError, propcodec.Codec(Strict).from_bytes, data)
+    self.assertEqual(1, propcodec.Codec(Strict, unsafe=True).from_bytes(
+      data).note)
+
+  def testBytesStream(self):
+    readings = [self.reading, self.partial] * 20000
+    for codec in (self.codec, self.unsafe):
+      out = io.BytesIO()
+      codec.dump_bytes(readings, out)
+      out.seek(0)
+      loaded = list(codec.load_bytes(out))
+      self.assertEqual(len(readings), len(loaded))
+      self.assertSameReading(self.reading, loaded[-2])
+      self.assertSameReading(self.partial, loaded[-1])
+
+  def testBytesStreamTruncated(self):
+    out = io.BytesIO()
+    self.codec.dump_bytes([self.reading], out)
+    truncated = io.BytesIO(out.getvalue()[:-1])
+    self.assertRaises(ValueError, list, self.codec.load_bytes(truncated))
+
+  def testDicts(self):
+    dicts = list(self.codec.iter_dicts([self.reading, self.partial]))
+    for codec in (self.codec, self.unsafe):
+      readings = list(codec.from_dicts(dicts))
+      self.assertSameReading(self.reading, readings[0])
+      self.assertSameReading(self.partial, readings[1])
+
+  def testFrozen(self):
+    reading = FrozenReading(sensor='a', value=1.0)
+    for unsafe in (False, True):
+      codec = propcodec.Codec(FrozenReading, unsafe=unsafe)
+      self.assertEqual(reading, codec.from_bytes(codec.to_bytes(reading)))
+      self.assertEqual(reading, codec.from_json(codec.to_json(reading)))
+
+
+class ExportsTest(unittest.TestCase):
+
+  def testOnlyPublicNames(self):
+    namespace = {}
+    exec('from sordid.props.propcodec import *', namespace)
+    self.assertIs(propcodec.Codec, namespace['Codec'])
+    for name in ('json', 'struct', 'propcolumns', 'propcompile'):
+      self.assertNotIn(name, namespace)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import array
+import unittest
+
+from sordid.props import propcolumns
+from sordid.props import proputils
+from sordid.props import propval
+
+
+class Reading(proputils.HasProps):
+  sensor = propval.StrictProperty(str)
+  value = propval.StrictProperty(float)
+  count = propval.StrictProperty(int)
+  valid = propval.StrictProperty(bool)
+  note = proputils.Property()
+
+
+class SlotsReading(proputils.HasProps, slots=True):
+  value = propval.StrictProperty(float)
+  label = proputils.ReadOnlyProperty()
+
+
+class FrozenReading(proputils.HasProps, frozen=True):
+  sensor = propval.StrictProperty(str)
+  value = propval.StrictProperty(float)
+
+
+class ColumnStoreTest(unittest.TestCase):
+
+  def setUp(self):
+    self.store = propcolumns.ColumnStore(Reading)
+    self.store.append(sensor='a', value=1.5, count=1, valid=True)
+    self.store.append(sensor='b', value=-2.0, count=2, valid=False)
+    self.store.append(sensor='c', count=3)
+
+  def testTypecodes(self):
+    self.assertEqual('d', propcolumns.column_typecode(Reading.value))
+    self.assertEqual('q', propcolumns.column_typecode(Reading.count))
+    self.assertEqual('b', propcolumns.column_typecode(Reading.valid))
+    self.assertIsNone(propcolumns.column_typecode(Reading.sensor))
+    self.assertIsNone(propcolumns.column_typecode(Reading.note))
+
+  def testRows(self):
+    self.assertEqual(3, len(self.store))
+    row = self.store[0]
+    self.assertIsInstance(row, Reading)
+    self.assertEqual('a', row.sensor)
+    self.assertEqual(1.5, row.value)
+    self.assertIs(True, row.valid)
+    self.assertRaises(AttributeError, getattr, row, 'note')
+    self.assertRaises(AttributeError, getattr, self.store[2], 'value')
+    self.assertEqual(['a', 'b', 'c'], [r.sensor for r in self.store])
+    self.assertEqual('c', self.store[-1].sensor)
+    self.assertRaises(IndexError, self.store.__getitem__, 3)
+
+  def testSetAndDelete(self):
+    row = self.store[2]
+    row.value = 3.0
+    self.assertEqual(3.0, self.store[2].value)
+    del row.value
+    self.assertRaises(AttributeError, getattr, row, 'value')
+    self.assertRaises(AttributeError, delattr, row, 'value')
+    row.note = ['anything']
+    self.assertEqual(['anything'], self.store[2].note)
+
+  def testValidation(self):
+    self.assertRaises(TypeError, setattr, self.store[0], 'value', 'x')
+    self.assertEqual(1.5, self.store[0].value)
+    self.assertRaises(TypeError, self.store.append, sensor='d', count='x')
+    self.assertEqual(3, len(self.store))
+    self.assertEqual(3, len(self.store.column('count')))
+
+  def testColumn(self):
+    self.assertEqual([1.5, -2.0, 0.0], list(self.store.column('value')))
+    self.assertEqual([True, True, False], list(self.store.present('value')))
+    self.assertEqual([1.5, -2.0], list(self.store.values('value')))
+    self.assertEqual(['a', 'b', 'c'], self.store.column('sensor'))
+    self.assertEqual([True, False], list(self.store.values('valid')))
+
+  def testFilter(self):
+    self.assertEqual([1], list(self.store.filter('value', lambda v: v < 0)))
+    self.assertEqual([0, 1],
+                     list(self.store.filter('value', lambda v: v < 10)))
+    self.assertEqual([2], list(self.store.filter('sensor',
+                                                 lambda v: v == 'c')))
+    self.assertEqual(['b'], [r.sensor for r in self.store.rows(
+      self.store.filter('count', lambda v: v == 2))])
+    self.assertEqual([1], self.store.filter('valid', lambda v: v is False))
+    self.assertEqual([1], self.store.filter(
+      'value', lambda v: type(v) is float and v < 0))
+
+  def testFilterArray(self):
+    def negative(column):
+      return [value < 0 for value in column]
+    self.assertEqual([1], list(self.store.filter_array('value', negative)))
+    self.assertEqual([2], list(self.store.filter_array(
+      'sensor', lambda column: [value == 'c' for value in column])))
+    if propcolumns.numpy is not None:
+      self.assertEqual(
+        [0, 1], list(self.store.filter_array('value', lambda v: v < 10)))
+
+  def testExtend(self):
+    self.store.extend([{'count': 4}, {'count': 5}])
+    self.assertEqual([1, 2, 3, 4, 5], list(self.store.column('count')))
+
+  def testEmpty(self):
+    store = propcolumns.ColumnStore(Reading)
+    self.assertEqual(0, len(store))
+    self.assertEqual([], list(store.column('value')))
+    self.assertEqual([], list(store.filter('value', lambda v: v > 0)))
+    self.assertEqual([], list(store.filter_array('value', list)))
+
+  def testSlotsClass(self):
+    store = propcolumns.ColumnStore(SlotsReading)
+    row = store.append(value=1.0, label='x')
+    self.assertEqual(1.0, row.value)
+    self.assertRaises(AttributeError, setattr, row, 'label', 'y')
+    self.assertEqual('x', store[0].label)
+
+
+  def testFrozenClass(self):
+    store = propcolumns.ColumnStore(FrozenReading)
+    row = store.append(sensor='a', value=1.0)
+    store.extend([{'sensor': 'b'}])
+    self.assertEqual(('a', 1.0), (row.sensor, row.value))
+    self.assertEqual(['a', 'b'], store.column('sensor'))
+    self.assertRaises(AttributeError, setattr, row, 'value', 2.0)
+    self.assertRaises(AttributeError, delattr, store[1], 'sensor')
+    self.assertRaises(TypeError, store.append, sensor='c', value=1)
+    self.assertEqual(2, len(store))
+
+  def testValuesArraysWouldChange(self):
+    class Half(float):
+      pass
+
+    self.store.append(count=2 ** 70, value=Half(0.5))
+    self.store.append(count=4, valid=False)
+    self.store.append(sensor='d')
+    self.assertEqual([1, 2, 3, 2 ** 70, 4, None],
+                     self.store.column('count'))
+    self.assertEqual(2 ** 70, self.store[3].count)
+    self.assertIs(Half, type(self.store[3].value))
+    self.assertRaises(AttributeError, getattr, self.store[5], 'count')
+    self.assertEqual([2], list(self.store.filter('count', lambda v: v == 3)))
+    self.assertEqual([False, False], list(self.store.values('valid')[1:]))
+
+  def testValuesArraysHold(self):
+    self.store.append(count=True)
+    self.assertEqual(1, self.store[3].count)
+    self.assertIsNot(list, type(self.store.column('count')))
+    numpy = propcolumns.numpy
+    if numpy is None:
+      return
+    self.store.append(value=numpy.float64(0.25))
+    self.store.append(value=numpy.float64('nan'))
+    self.assertIs(float, type(self.store[4].value))
+    self.assertEqual(0.25, self.store[4].value)
+    self.assertIsInstance(self.store.column('value'), numpy.ndarray)
+
+  def testUnknownProperty(self):
+    self.assertRaises(TypeError, self.store.append, unknown=1)
+    self.assertEqual(3, len(self.store))
+
+
+class ColumnStoreWithoutNumpyTest(ColumnStoreTest):
+
+  def setUp(self):
+    self.numpy = propcolumns.numpy
+    propcolumns.numpy = None
+    super(ColumnStoreWithoutNumpyTest, self).setUp()
+
+  def tearDown(self):
+    propcolumns.numpy = self.numpy
+
+  def testArrayTypes(self):
+    self.assertIsInstance(self.store.column('value'), array.array)
+    self.assertIsInstance(self.store.values('count'), array.array)
+
+
+class ExportsTest(unittest.TestCase):
+
+  def testOnlyPublicNames(self):
+    namespace = {}
+    exec('from sordid.props.propcolumns import *', namespace)
+    self.assertIs(propcolumns.ColumnStore, namespace['ColumnStore'])
+    for name in ('TYPECODES', 'row_class', 'array', 'numpy'):
+      self.assertNotIn(name, namespace)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import unittest
+
+from sordid.props import propcompile
+from sordid.props import proputils
+from sordid.props import propval
+
+
+class ValidatorCompilerTest(unittest.TestCase):
+
+  def testConstantsShared(self):
+    compiler = propcompile.ValidatorCompiler()
+    value = object()
+    self.assertEqual(compiler.constant(value), compiler.constant(value))
+    self.assertNotEqual(compiler.constant(value), compiler.constant(object()))
+
+  def testPlainFunction(self):
+    compiled = propcompile.compile_validator(bool)
+    self.assertTrue(compiled(1))
+    self.assertFalse(compiled(0))
+
+  def testPlainValidator(self):
+    calls = []
+    def record(value):
+      calls.append(value)
+      return value == 'ok'
+    compiled = propcompile.compile_validator(propval.Validator(record))
+    self.assertTrue(compiled('ok'))
+    self.assertFalse(compiled('bad'))
+    self.assertEqual(['ok', 'bad'], calls)
+    self.assertNotIn('Validator', compiled.__source__)
+
+  def testSubclassOverridingCall(self):
+    class Odd(propval.Validator):
+      def __init__(self):
+        pass
+      def __call__(self, value):
+        return value % 2 == 1
+    compiled = propcompile.compile_validator(Odd() & (propval.CMP > 0))
+    self.assertTrue(compiled(3))
+    self.assertFalse(compiled(2))
+    self.assertFalse(compiled(-3))
+
+
+class CompiledTreeTest(unittest.TestCase):
+
+  def assertSame(self, validator, values):
+    compiled = validator.compile()
+    for value in values:
+      self.assertEqual(bool(validator(value)), bool(compiled(value)),
+                       'Mismatch for %r' % (value,))
+
+  def testRange(self):
+    validator = (propval.CMP >= 0) & (propval.CMP <= 100)
+    self.assertSame(validator, [-1, 0, 50, 100, 101])
+    source = validator.compile().__source__
+    self.assertEqual(1, source.count('def '))
+    self.assertIn('>=', source)
+    self.assertIn('<=', source)
+
+  def testNoneOrRange(self):
+    validator = propval.NONE | ((propval.CMP > 0) & (propval.CMP < 10))
+    self.assertSame(validator, [None, -1, 0, 1, 9, 10])
+
+  def testNot(self):
+    validator = ~propval.EMPTY & ~propval.is_in(['a', 'b'])
+    self.assertSame(validator, ['', 'a', 'b', 'c', None])
+
+  def testShortCircuit(self):
+    calls = []
+    def record(value):
+      calls.append(value)
+      return True
+    compiled = (propval.NONE | propval.Validator(record)).compile()
+    self.assertTrue(compiled(None))
+    self.assertEqual([], calls)
+    self.assertTrue(compiled(1))
+    self.assertEqual([1], calls)
+
+  def testTypeValidatorRaises(self):
+    compiled = ((propval.CMP >= 0) & propval.type_validator(int)).compile()
+    self.assertTrue(compiled(1))
+    self.assertFalse(compiled(-1))
+    with self.assertRaisesRegex(TypeError, 'Property must be type int'):
+      compiled(1.5)
+
+  def testUnknownBinop(self):
+    validator = propval.CMP(lambda value, constant: value % constant == 0, 3)
+    self.assertSame(validator, [0, 1, 2, 3, 4, 6])
+
+
+class CompiledPropertyTest(unittest.TestCase):
+
+  def testCompiledOnConfig(self):
+    class Percent(proputils.Propertied):
+      value = propval.ValidatedProperty(
+        (propval.CMP >= 0) & (propval.CMP <= 100) &
+        propval.type_validator(int))
+
+    percent = Percent()
+    percent.value = 10
+    self.assertEqual(10, percent.value)
+    with self.assertRaises(ValueError):
+      percent.value = 101
+    with self.assertRaises(TypeError):
+      percent.value = 10.5
+    self.assertEqual(10, percent.value)
+
+
+class CompileInitTest(unittest.TestCase):
+
+  class Point(proputils.HasProps):
+    x = propval.StrictProperty(int)
+    unknown = propval.StrictProperty(int)
+
+  def testWithoutValidation(self):
+    load = propcompile.compile_init(self.Point.props(), validate=False,
+                                    ignore_unknown=True)
+    point = self.Point.__new__(self.Point)
+    load(point, x='not int', other=1)
+    self.assertEqual('not int', point.x)
+    self.assertRaises(AttributeError, getattr, point, 'unknown')
+    load(point, unknown=2)
+    self.assertEqual(2, point.unknown)
+
+  def testUnknownRaises(self):
+    init = propcompile.compile_init(self.Point.props())
+    point = self.Point.__new__(self.Point)
+    self.assertRaises(TypeError, init, point, x='not int')
+    self.assertRaises(TypeError, init, point, other=1)
+
+
+class ExportsTest(unittest.TestCase):
+
+  def testOnlyPublicNames(self):
+    namespace = {}
+    exec('from sordid.props.propcompile import *', namespace)
+    self.assertIs(propcompile.compile_validator,
+                  namespace['compile_validator'])
+    for name in ('compile_eq', 'compile_hash', 'compile_state',
+                 'compile_reduce', 'compile_restore', 'init_props'):
+      self.assertNotIn(name, namespace)
+
+
+if __name__ == '__main__':
+  unittest.main()
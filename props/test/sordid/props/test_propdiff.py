@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import pickle
+import unittest
+
+from sordid.props import propdiff
+from sordid.props import proputils
+from sordid.props import propval
+
+
+class Person(proputils.HasProps, init=True):
+  name = propval.StrictProperty(str)
+  age = propval.StrictProperty(int)
+  nickname = proputils.Property()
+
+  @proputils.computed('name')
+  def greeting(self):
+    return 'Hello ' + self.name
+
+
+class TrackedPerson(proputils.ChangeTracking):
+  name = propval.StrictProperty(str)
+  age = propval.StrictProperty(int)
+
+
+class Empty(proputils.HasProps):
+  pass
+
+
+class DiffTest(unittest.TestCase):
+
+  def testIdentical(self):
+    self.assertEqual({}, propdiff.diff(Person(name='a', age=1),
+                                       Person(name='a', age=1)))
+    self.assertEqual({}, propdiff.diff(Person(), Person()))
+    self.assertEqual({}, propdiff.diff(Empty(), Empty()))
+
+  def testChanged(self):
+    old = Person(name='a', age=1, nickname='x')
+    new = Person(name='a', age=2)
+    self.assertEqual({'age': 2, 'nickname': proputils.DELETED},
+                     propdiff.diff(old, new))
+    self.assertEqual({'age': 1, 'nickname': 'x'}, propdiff.diff(new, old))
+
+  def testComputedNotCompared(self):
+    old = Person(name='a')
+    new = Person(name='b')
+    old.greeting
+    new.greeting
+    self.assertEqual({'name': 'b'}, propdiff.diff(old, new))
+
+  def testDifferentClasses(self):
+    self.assertRaises(TypeError, propdiff.diff, Person(), TrackedPerson())
+
+  def testPickle(self):
+    patch = propdiff.diff(Person(name='a', nickname=1), Person(age=3))
+    self.assertEqual(patch, pickle.loads(pickle.dumps(patch)))
+    self.assertIs(proputils.DELETED,
+                  pickle.loads(pickle.dumps(patch))['nickname'])
+
+
+class ApplyTest(unittest.TestCase):
+
+  def testApply(self):
+    old = Person(name='a', age=1, nickname='x')
+    new = Person(name='b', age=1)
+    self.assertIs(old, propdiff.apply(old, propdiff.diff(old, new)))
+    self.assertEqual({}, propdiff.diff(old, new))
+    self.assertFalse(hasattr(old, 'nickname'))
+    self.assertEqual('Hello b', old.greeting)
+
+  def testDeleteUnset(self):
+    person = Person(name='a')
+    propdiff.apply(person, {'age': proputils.DELETED})
+    self.assertFalse(hasattr(person, 'age'))
+
+  def testValidates(self):
+    person = Person(name='a')
+    self.assertRaises(TypeError, propdiff.apply, person, {'age': 'old'})
+    self.assertFalse(hasattr(person, 'age'))
+
+  def testValidatesBeforeChanging(self):
+    person = Person(name='a', nickname='x')
+    self.assertRaises(TypeError, propdiff.apply, person,
+                      {'name': 'b', 'nickname': proputils.DELETED,
+                       'age': 'old'})
+    self.assertEqual(('a', 'x'), (person.name, person.nickname))
+    self.assertFalse(hasattr(person, 'age'))
+
+  def testComputed(self):
+    person = Person(name='a')
+    self.assertRaises(AttributeError, propdiff.apply, person,
+                      {'name': 'b', 'greeting': 'Hi'})
+    self.assertEqual('a', person.name)
+
+  def testReadOnly(self):
+
+    class Badge(proputils.HasProps):
+      number = proputils.ReadOnlyProperty()
+      owner = proputils.Property()
+
+    badge = Badge()
+    propdiff.apply(badge, {'number': 1})
+    self.assertEqual(1, badge.number)
+    for patch in ({'owner': 'a', 'number': 2},
+                  {'owner': 'a', 'number': proputils.DELETED}):
+      self.assertRaises(AttributeError, propdiff.apply, badge, patch)
+      self.assertEqual(1, badge.number)
+      self.assertFalse(hasattr(badge, 'owner'))
+    propdiff.apply(Badge(), {'number': proputils.DELETED})
+
+  def testFrozen(self):
+
+    class Point(proputils.HasProps, frozen=True):
+      x = proputils.Property()
+
+    point = Point(x=1)
+    self.assertRaises(AttributeError, propdiff.apply, point,
+                      {'x': proputils.DELETED})
+    self.assertRaises(AttributeError, propdiff.apply, point, {'x': 2})
+    self.assertEqual(1, point.x)
+    self.assertIs(point, propdiff.apply(point, {}))
+
+  def testUnknownProperty(self):
+    person = Person(name='a')
+    self.assertRaises(KeyError, propdiff.apply, person,
+                      {'name': 'b', 'unknown': 1})
+    self.assertEqual('a', person.name)
+
+  def testChanges(self):
+    source = TrackedPerson()
+    source.name = 'a'
+    source.age = 1
+    replica = propdiff.apply(TrackedPerson(), source.changes())
+    source.commit()
+    del source.age
+    propdiff.apply(replica, source.changes())
+    self.assertEqual('a', replica.name)
+    self.assertFalse(hasattr(replica, 'age'))
+    self.assertEqual({'name': 'a', 'age': proputils.DELETED},
+                     replica.changes())
+
+  def testObserversNotified(self):
+
+    class Observed(proputils.HasProps):
+      name = proputils.Property()
+      age = proputils.Property()
+
+    changes = []
+    Observed.name.subscribe(changes.append)
+    Observed.age.subscribe(changes.append)
+    observed = Observed()
+    propdiff.apply(observed, {'name': 'a', 'age': 1})
+    self.assertEqual(
+      [[proputils.Change(observed, 'name', proputils.DELETED, 'a'),
+        proputils.Change(observed, 'age', proputils.DELETED, 1)]],
+      changes)
+
+
+class ExportsTest(unittest.TestCase):
+
+  def testOnlyPublicNames(self):
+    namespace = {}
+    exec('from sordid.props.propdiff import *', namespace)
+    self.assertIs(propdiff.apply, namespace['apply'])
+    for name in ('weakref', 'propcompile', 'proputils'):
+      self.assertNotIn(name, namespace)
+
+
+if __name__ == '__main__':
+  unittest.main()
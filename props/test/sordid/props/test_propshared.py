@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Rafe Kaplan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import concurrent.futures
+import os
+import pickle
+import subprocess
+import sys
+import unittest
+
+from sordid.props import propshared
+from sordid.props import proputils
+from sordid.props import propval
+
+
+class Reading(proputils.HasProps):
+  value = propval.StrictProperty(float)
+  count = propval.StrictProperty(int)
+  valid = propval.StrictProperty(bool)
+
+
+class FrozenReading(proputils.HasProps, frozen=True):
+  value = propval.StrictProperty(float)
+
+
+class Counter(proputils.HasProps):
+  count = propval.StrictProperty(int)
+
+
+def total_count(store):
+  with store:
+    return sum(reading.count for reading in store)
+
+
+class SharedStoreTest(unittest.TestCase):
+
+  def setUp(self):
+    self.store = propshared.SharedStore(Reading, capacity=4)
+    self.store.append(value=1.5, count=1, valid=True)
+    self.store.append(count=2, valid=False)
+    self.reader = propshared.SharedStore.attach(Reading, self.store.name)
+
+  def tearDown(self):
+    self.reader.close()
+    self.store.close()
+    self.store.unlink()
+
+  def testNotFixedWidth(self):
+
+    class Note(proputils.HasProps):
+      text = propval.StrictProperty(str)
+
+    self.assertRaises(TypeError, propshared.SharedStore, Note, 1)
+
+  def testRows(self):
+    for store in (self.store, self.reader):
+      self.assertEqual(2, len(store))
+      self.assertEqual(4, store.capacity)
+      row = store[0]
+      self.assertIsInstance(row, Reading)
+      self.assertEqual(1.5, row.value)
+      self.assertEqual(1, row.count)
+      self.assertIs(True, row.valid)
+      self.assertIs(False, store[-1].valid)
+      self.assertFalse(hasattr(store[1], 'value'))
+      self.assertEqual([1, 2], [row.count for row in store])
+      self.assertRaises(IndexError, store.__getitem__, 2)
+
+  def testReaderSeesWrites(self):
+    self.store[1].value = 3.0
+    self.store.append(count=3)
+    del self.store[0].count
+    self.assertEqual(3.0, self.reader[1].value)
+    self.assertEqual(3, len(self.reader))
+    self.assertFalse(hasattr(self.reader[0], 'count'))
+    self.assertRaises(AttributeError, delattr, self.store[0], 'count')
+
+  def testValidates(self):
+    self.assertRaises(TypeError, setattr, self.store[0], 'count', 'x')
+    self.assertEqual(1, self.store[0].count)
+    self.assertRaises(TypeError, self.store.append, count=3, value='x')
+    self.assertEqual(2, len(self.store))
+    self.assertFalse(hasattr(self.store.append(), 'count'))
+
+  def testReadOnly(self):
+    self.assertTrue(self.store.writable)
+    self.assertFalse(self.reader.writable)
+    self.assertRaises(AttributeError, setattr, self.reader[0], 'count', 5)
+    self.assertRaises(AttributeError, delattr, self.reader[0], 'count')
+    self.assertRaises(AttributeError, self.reader.append)
+    self.assertRaises(AttributeError, self.reader.update, 0, count=5)
+    self.assertEqual(1, self.store[0].count)
+
+  def testFull(self):
+    self.store.extend([{}, {}])
+    self.assertRaises(IndexError, self.store.append)
+
+  def testUpdate(self):
+    self.store.update(0, value=2.5, count=7)
+    self.assertEqual((2.5, 7), (self.reader[0].value, self.reader[0].count))
+    self.assertRaises(TypeError, self.store.update, 0, value=3.5, count='x')
+    self.assertEqual((2.5, 7), (self.reader[0].value, self.reader[0].count))
+
+  def testUpdateObserved(self):
+    changes = []
+    Reading.count.subscribe(changes.append)
+    try:
+      self.store.update(0, count=5, value=2.5)
+      proputils.flush()
+    finally:
+      Reading.count.unsubscribe(changes.append)
+    self.assertEqual(5, self.reader[0].count)
+    self.assertEqual([(1, 5)], [(change.old, change.new)
+                                for change in changes[0]])
+
+  def testIntOutOfRange(self):
+    self.assertRaises(OverflowError, setattr, self.store[0], 'count', 2 ** 63)
+    self.assertRaises(OverflowError, self.store.update, 0, value=2.0,
+                      count=-2 ** 63 - 1)
+    self.assertRaises(OverflowError, self.store.append, count=2 ** 64)
+    self.assertRaises(TypeError, setattr, self.store[0], 'count', True)
+    self.assertEqual(2, len(self.store))
+    self.assertEqual((1.5, 1), (self.reader[0].value, self.reader[0].count))
+    self.store[0].count = 2 ** 63 - 1
+    self.assertEqual(2 ** 63 - 1, self.reader[0].count)
+
+  def testSnapshot(self):
+    snapshot = self.reader.snapshot(1)
+    self.assertIs(Reading, type(snapshot))
+    self.assertEqual(2, snapshot.count)
+    self.assertIs(False, snapshot.valid)
+    self.assertFalse(hasattr(snapshot, 'value'))
+    self.store[1].count = 5
+    self.assertEqual(2, snapshot.count)
+    self.assertEqual([1, 5], [reading.count
+                              for reading in self.reader.snapshots()])
+
+  def testWrongClass(self):
+    self.assertRaises(ValueError, propshared.SharedStore.attach, Counter,
+                      self.store.name)
+
+  def testPickle(self):
+    reader = pickle.loads(pickle.dumps(self.store))
+    try:
+      self.assertFalse(reader.writable)
+      self.assertEqual(1, reader[0].count)
+    finally:
+      reader.close()
+
+  def testOtherProcess(self):
+    with concurrent.futures.ProcessPoolExecutor(1) as executor:
+      self.assertEqual(3, executor.submit(total_count, self.store).result())
+
+  def testReaderExitKeepsSegment(self):
+    subprocess.run([sys.executable, '-c', (
+      'from sordid.props import propshared\n'
+      'from test_propshared import Reading\n'
+      'propshared.SharedStore.attach(Reading, %r).close()\n' % (
+        self.store.name))],
+      env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+      cwd=os.path.dirname(os.path.abspath(__file__)),
+      check=True, stderr=subprocess.PIPE)
+    reader = propshared.SharedStore.attach(Reading, self.store.name)
+    reader.close()
+
+  def testFrozen(self):
+    with propshared.SharedStore(FrozenReading, capacity=1) as store:
+      row = store.append(value=1.0)
+      self.assertEqual(1.0, row.value)
+      self.assertRaises(AttributeError, setattr, row, 'value', 2.0)
+      self.assertEqual(FrozenReading(value=1.0), store.snapshot(0))
+
+
+class ExportsTest(unittest.TestCase):
+
+  def testOnlyPublicNames(self):
+    namespace = {}
+    exec('from sordid.props.propshared import *', namespace)
+    self.assertIs(propshared.SharedStore, namespace['SharedStore'])
+    for name in ('hashlib', 'os', 'struct', 'threading', 'shared_memory'):
+      self.assertNotIn(name, namespace)
+
+
+if __name__ == '__main__':
+  unittest.main()
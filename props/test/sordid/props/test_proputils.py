@@ -15,12 +15,19 @@
 # limitations under the License.
 #
 
+import copy
+import gc
+import pickle
 import unittest
+import weakref
 
 from mox3 import mox
 
+from sordid import props
 from sordid.props import prop_testutils
+from sordid.props import propcompile
 from sordid.props import proputils
+from sordid.props import propval
 
 
 class ConfigPropNameTest(mox.MoxTestBase):
@@ -183,6 +190,24 @@ class ConfigPropsTest(mox.MoxTestBase):
     proputils.config_props(TargetClass)
 
 
+class ConfigOwnPropsTest(unittest.TestCase):
+
+  def testOnlyOwnNamespace(self):
+    base_prop = PropDesc()
+    own_prop = PropDesc()
+
+    class Base(object):
+      a = base_prop
+
+    class Sub(Base):
+      b = own_prop
+
+    proputils.config_props(Sub, inherited=False)
+    self.assertIsNone(base_prop.cls)
+    self.assertEqual(Sub, own_prop.cls)
+    self.assertEqual('b', own_prop.name)
+
+
 class PropertiedTypeTest(mox.MoxTestBase):
 
   def testMetaClass(self):
@@ -314,6 +339,76 @@ class HasPropsTest(mox.MoxTestBase):
     self.assertEquals(2, hp.b)
     self.assertEquals(3, hp.c)
 
+  def testPropertyOrder(self):
+
+    class MyHasProps(proputils.HasProps):
+      a = PropDesc()
+      b = PropDesc()
+
+    class MyHasPropsSub(MyHasProps):
+      c = PropDesc()
+      b = PropDesc()
+
+    self.assertEqual(['a', 'b', 'c'], list(MyHasPropsSub.prop_names()))
+    self.assertIs(MyHasPropsSub.b, dict(MyHasPropsSub.props())['b'])
+
+  def testTableWithoutOwnProperties(self):
+
+    class MyHasProps(proputils.HasProps):
+      a = PropDesc()
+
+    class MyHasPropsSub(MyHasProps):
+      not_a_prop = 1
+
+    self.assertEqual(['a'], list(MyHasPropsSub.prop_names()))
+
+    # Configuring later must not change the base class.
+    b = PropDesc()
+    proputils.config_prop(MyHasPropsSub, 'b', b)
+    self.assertEqual(['a', 'b'], list(MyHasPropsSub.prop_names()))
+    self.assertEqual(['a'], list(MyHasProps.prop_names()))
+
+  def testListingKeepsNoCopy(self):
+
+    class MyHasProps(proputils.HasProps):
+      a = PropDesc()
+
+    class MyHasPropsSub(MyHasProps):
+      b = PropDesc()
+
+    names = set(vars(MyHasPropsSub))
+    self.assertEqual(['a', 'b'], [name for name, _ in MyHasPropsSub.props()])
+    self.assertEqual(names, set(vars(MyHasPropsSub)))
+
+  def testParentWithoutOwnPropertiesChangesVisible(self):
+
+    class MyHasProps(proputils.HasProps):
+      a = PropDesc()
+
+    class MyHasPropsSub(MyHasProps):
+      pass
+
+    class MyHasPropsSubSub(MyHasPropsSub):
+      c = PropDesc()
+
+    self.assertEqual(['a', 'c'], list(MyHasPropsSubSub.prop_names()))
+    x = PropDesc()
+    proputils.config_prop(MyHasPropsSub, 'x', x)
+    self.assertEqual(['a', 'x', 'c'], list(MyHasPropsSubSub.prop_names()))
+    self.assertIs(x, dict(MyHasPropsSubSub.props())['x'])
+    self.assertEqual(['a'], list(MyHasProps.prop_names()))
+
+  def testParentChangesVisible(self):
+
+    class MyHasProps(proputils.HasProps):
+      a = PropDesc()
+
+    class MyHasPropsSub(MyHasProps):
+      b = PropDesc()
+
+    proputils.config_prop(MyHasProps, 'c', PropDesc())
+    self.assertEqual(set(['a', 'b', 'c']), set(MyHasPropsSub.prop_names()))
+
   def testNoStrangeInternalState(self):
 
     class BadDict(object):
@@ -330,6 +425,1029 @@ class HasPropsTest(mox.MoxTestBase):
     self.assertRaises(AttributeError, new_subclass)
 
 
+class ColumnDesc(PropDesc):
+
+  def __init__(self, invalid):
+    self.invalid = invalid
+
+  def __validate_column__(self, values):
+    return [value == self.invalid for value in values]
+
+
+class ValidateColumnsTest(unittest.TestCase):
+
+  class Record(proputils.HasProps):
+    a = ColumnDesc(1)
+    b = ColumnDesc(2)
+    c = PropDesc()
+
+  def testValidateColumns(self):
+    errors = self.Record.validate_columns({'a': [0, 1, 0, 0],
+                                           'b': [0, 0, 2, 0],
+                                           'c': [1, 2, 3, 4]})
+    self.assertEqual([False, True, True, False], errors)
+
+  def testUnvalidated(self):
+    self.assertEqual([False, False],
+                     self.Record.validate_columns({'c': [1, 2]}))
+    self.assertEqual([], self.Record.validate_columns({}))
+
+  def testUnknownProperty(self):
+    self.assertRaises(KeyError, self.Record.validate_columns, {'d': [1]})
+
+  def testDifferentLengths(self):
+    self.assertRaises(ValueError, self.Record.validate_columns,
+                      {'a': [1], 'b': [1, 2]})
+
+
+class CheckDesc(PropDesc):
+
+  def __init__(self, invalid):
+    self.invalid = invalid
+
+  def __compile_check__(self):
+    return lambda value: value != self.invalid
+
+
+class ValidateRowsTest(unittest.TestCase):
+
+  class Record(proputils.HasProps):
+    a = CheckDesc(1)
+    b = CheckDesc(2)
+    c = PropDesc()
+
+  def testValidateRows(self):
+    failures = self.Record.validate_rows([
+      (0, 0, 1),
+      {'a': 1, 'c': 2},
+      (1, 2),
+    ])
+    self.assertEqual([(1, 'a', 1), (2, 'a', 1), (2, 'b', 2)],
+                     [(f.row, f.name, f.value) for f in failures])
+    self.assertIs(self.Record.a, failures[0].prop)
+
+  def testUnexplained(self):
+    failure, = self.Record.validate_rows([(1,)])
+    self.assertIsNone(failure.node)
+    self.assertIsNone(failure.exception())
+
+  def testUnknownProperty(self):
+    self.assertRaises(KeyError, self.Record.validate_rows, [{'d': 1}])
+
+  def testTooManyValues(self):
+    self.assertRaises(TypeError, self.Record.validate_rows, [(0, 0, 0, 0)])
+
+
+class ShardedRecord(proputils.HasProps):
+  a = CheckDesc(1)
+  b = PropDesc()
+
+
+class ParallelValidateTest(unittest.TestCase):
+
+  def testParallelValidate(self):
+    rows = [(value % 3, value) for value in range(20)]
+    failures = proputils.parallel_validate(ShardedRecord, rows, workers=2,
+                                           chunk_size=3)
+    self.assertEqual(ShardedRecord.validate_rows(rows), failures)
+    self.assertEqual([1, 4, 7, 10, 13, 16, 19], [f.row for f in failures])
+    self.assertIs(ShardedRecord.a, failures[0].prop)
+
+  def testNoRows(self):
+    self.assertEqual([], proputils.parallel_validate(ShardedRecord, [],
+                                                     workers=1))
+
+
+class SlotsTest(unittest.TestCase):
+
+  def testSlots(self):
+
+    class Point(proputils.HasProps, slots=True):
+      x = proputils.Property()
+      y = proputils.ReadOnlyProperty()
+
+    self.assertEqual(('_Point__x', '_Point__y'), Point.__slots__)
+    point = Point()
+    self.assertFalse(hasattr(point, '__dict__'))
+    self.assertRaises(AttributeError, getattr, point, 'x')
+
+    point.x = 1
+    point.y = 2
+    self.assertEqual(1, point.x)
+    self.assertEqual(2, point.y)
+    self.assertRaises(AttributeError, setattr, point, 'y', 3)
+
+    del point.x
+    self.assertRaises(AttributeError, getattr, point, 'x')
+    self.assertRaises(AttributeError, setattr, point, 'other', 1)
+
+  def testDeclaredSlots(self):
+
+    class Point(proputils.HasProps, slots=True):
+      __slots__ = 'extra'
+      x = proputils.Property()
+
+    point = Point()
+    point.extra = 1
+    point.x = 2
+    self.assertEqual(1, point.extra)
+    self.assertEqual(2, point.x)
+
+  def testInherited(self):
+
+    class Point(proputils.HasProps, slots=True):
+      x = proputils.Property()
+
+    class Point3D(Point):
+      z = proputils.Property()
+
+    point = Point3D()
+    self.assertFalse(hasattr(point, '__dict__'))
+    point.x = 1
+    point.z = 3
+    self.assertEqual(1, point.x)
+    self.assertEqual(3, point.z)
+    self.assertEqual(set(['x', 'z']), set(Point3D.prop_names()))
+
+  def testInheritedOptOut(self):
+
+    class Point(proputils.HasProps, slots=True):
+      x = proputils.Property()
+
+    class Point3D(Point, slots=False):
+      z = proputils.Property()
+
+    point = Point3D()
+    point.other = 1
+    point.x = 1
+    point.z = 3
+    self.assertEqual({'other': 1, '_Point3D__z': 3}, point.__dict__)
+
+  def testDictByDefault(self):
+
+    class Point(proputils.HasProps):
+      x = proputils.Property()
+
+    point = Point()
+    point.x = 1
+    self.assertEqual({'_Point__x': 1}, point.__dict__)
+
+  def testDeclaredSlotsWithoutOption(self):
+
+    class Point(proputils.HasProps):
+      x = proputils.Property()
+
+    class Point3D(proputils.HasProps):
+      __slots__ = ('_Point3D__z',)
+      z = proputils.Property()
+
+    point = Point()
+    self.assertIs(point, weakref.ref(point)())
+    point3d = Point3D()
+    point3d.z = 3
+    self.assertEqual(3, point3d.z)
+    self.assertFalse(hasattr(point3d, '__dict__'))
+    self.assertRaises(TypeError, weakref.ref, point3d)
+
+  def testUnderscoreClassName(self):
+
+    class _Point(proputils.HasProps, slots=True):
+      x = proputils.Property()
+
+    self.assertEqual('__Point__x', _Point.x.attribute_name)
+    self.assertEqual(('__Point__x',), _Point.__slots__)
+    point = _Point()
+    point.x = 1
+    self.assertEqual(1, point.x)
+    self.assertFalse(hasattr(point, '__dict__'))
+    copied = copy.deepcopy(point)
+    self.assertEqual(1, copied.x)
+    del copied.x
+    self.assertRaises(AttributeError, getattr, copied, 'x')
+
+  def testUnderscoreClassNameDict(self):
+
+    class _Point(proputils.HasProps):
+      x = proputils.Property()
+
+    point = _Point()
+    point.x = 1
+    self.assertEqual({'__Point__x': 1}, point.__dict__)
+
+
+class ChangeTrackingTest(unittest.TestCase):
+
+  class Person(proputils.ChangeTracking, init=True):
+    name = proputils.Property()
+    age = proputils.Property()
+
+  class Employee(Person):
+    title = proputils.ReadOnlyProperty()
+
+  def testNoChanges(self):
+    self.assertEqual({}, self.Person().changes())
+    self.assertEqual({}, self.Person().commit())
+
+  def testChanges(self):
+    person = self.Person()
+    person.age = 30
+    person.name = 'Bob'
+    person.age = 31
+    person.other = 1
+    self.assertEqual({'age': 31, 'name': 'Bob'}, person.changes())
+    self.assertEqual(['age', 'name'], list(person.changes()))
+
+  def testCommit(self):
+    person = self.Person(name='Bob', age=30)
+    self.assertEqual({'name': 'Bob', 'age': 30}, person.commit())
+    self.assertEqual({}, person.changes())
+    person.age = 31
+    self.assertEqual({'age': 31}, person.changes())
+
+  def testDelete(self):
+    person = self.Person(name='Bob')
+    person.commit()
+    del person.name
+    self.assertEqual({'name': proputils.DELETED}, person.changes())
+    self.assertEqual('DELETED', repr(proputils.DELETED))
+
+  def testSubclass(self):
+    employee = self.Employee(name='Ann', title='CEO')
+    self.assertEqual({'name': 'Ann', 'title': 'CEO'}, employee.commit())
+    employee.age = 40
+    self.assertEqual({'age': 40}, employee.changes())
+
+  def testSlots(self):
+    class Point(proputils.ChangeTracking, slots=True):
+      x = proputils.Property()
+
+    point = Point()
+    point.x = 1
+    self.assertFalse(hasattr(point, '__dict__'))
+    self.assertEqual({'x': 1}, point.changes())
+
+  def testFromRows(self):
+    person, = self.Person.from_rows([('Bob', 30)])
+    self.assertEqual({'name': 'Bob', 'age': 30}, person.changes())
+
+  def testOnlyProperties(self):
+    self.assertIs(object.__setattr__, self.Person.__setattr__)
+    person = self.Person()
+    person.other = 1
+    self.assertEqual({}, person.changes())
+
+  def testUntrackedBaseClass(self):
+    class Point(proputils.HasProps):
+      x = proputils.Property()
+
+    class TrackedPoint(Point, proputils.ChangeTracking):
+      y = proputils.Property()
+
+    self.assertIs(proputils.Property, type(Point.x))
+    point = Point()
+    point.x = 1
+    self.assertEqual(1, point.x)
+    tracked = TrackedPoint()
+    tracked.x = 1
+    tracked.y = 2
+    self.assertEqual({'y': 2}, tracked.changes())
+
+  def testTrackedBaseClass(self):
+    class Point(proputils.ChangeTracking):
+      x = proputils.Property()
+
+    class Point3D(Point):
+      z = proputils.Property()
+
+    point = Point3D()
+    point.x = 1
+    point.z = 3
+    self.assertEqual({'x': 1, 'z': 3}, point.changes())
+
+  def testCopy(self):
+    person = self.Person(name='Bob')
+    self.assertEqual({}, copy.copy(person).changes())
+    self.assertEqual({}, copy.deepcopy(person).changes())
+    self.assertEqual({'name': 'Bob'}, person.changes())
+
+
+class ObserverTest(unittest.TestCase):
+
+  def setUp(self):
+    class Person(proputils.HasProps):
+      name = proputils.Property()
+      age = proputils.Property()
+
+    self.Person = Person
+    self.changes = []
+    Person.age.subscribe(self.changes.append)
+
+  def tearDown(self):
+    proputils.flush()
+
+  def testUnsubscribedNotChanged(self):
+    self.assertIs(proputils.Property, type(self.Person.name))
+    self.assertIsInstance(self.Person.age, proputils.Property)
+
+  def testBatch(self):
+    person = self.Person()
+    with proputils.batch():
+      person.age = 30
+      person.name = 'Bob'
+      self.assertEqual([], self.changes)
+    self.assertEqual(
+      [[proputils.Change(person, 'age', proputils.DELETED, 30)]],
+      self.changes)
+
+  def testCoalesce(self):
+    person = self.Person()
+    other = self.Person()
+    person.age = 30
+    person.age = 31
+    other.age = 40
+    del other.age
+    self.assertEqual([], self.changes)
+    proputils.flush()
+    self.assertEqual(
+      [[proputils.Change(person, 'age', proputils.DELETED, 31),
+        proputils.Change(other, 'age', proputils.DELETED,
+                         proputils.DELETED)]],
+      self.changes)
+
+  def testNestedBatch(self):
+    person = self.Person()
+    with proputils.batch():
+      with proputils.batch():
+        person.age = 30
+      self.assertEqual([], self.changes)
+    self.assertEqual(1, len(self.changes))
+
+  def testBatchError(self):
+    person = self.Person()
+    with self.assertRaises(ValueError):
+      with proputils.batch():
+        person.age = 30
+        raise ValueError()
+    self.assertEqual(1, len(self.changes))
+
+  def testFailedSetNotQueued(self):
+    class ReadOnly(proputils.HasProps):
+      value = proputils.ReadOnlyProperty()
+
+    ReadOnly.value.subscribe(self.changes.append)
+    instance = ReadOnly()
+    instance.value = 1
+    proputils.flush()
+    self.assertRaises(AttributeError, setattr, instance, 'value', 2)
+    proputils.flush()
+    self.assertEqual(1, len(self.changes))
+
+  def testMultipleObservers(self):
+    other_changes = []
+    self.Person.age.subscribe(other_changes.append)
+    self.assertEqual((self.changes.append, other_changes.append),
+                     self.Person.age.observers)
+    person = self.Person()
+    person.age = 30
+    proputils.flush()
+    self.assertEqual(self.changes, other_changes)
+
+  def testUnsubscribe(self):
+    person = self.Person()
+    person.age = 30
+    self.Person.age.unsubscribe(self.changes.append)
+    self.assertIs(proputils.Property, type(self.Person.age))
+    proputils.flush()
+    self.assertEqual([], self.changes)
+    self.assertRaises(ValueError, self.Person.age.unsubscribe,
+                      self.changes.append)
+
+  def testUnsubscribeDropsChanges(self):
+    person = self.Person()
+    person.age = 30
+    self.Person.age.unsubscribe(self.changes.append)
+    self.assertEqual({}, dict(proputils._changes.pending))
+    person.age = 31
+    self.assertEqual({}, dict(proputils._changes.pending))
+
+  def testUnsubscribeComputedDependency(self):
+    Person = self.Person
+
+    class Named(Person):
+      @proputils.computed('age')
+      def older(self):
+        return self.age + 1
+
+    person = Named()
+    person.age = 30
+    self.assertEqual(31, person.older)
+    Person.age.unsubscribe(self.changes.append)
+    self.assertIsNot(proputils.Property, type(Person.age))
+    self.assertIs(proputils.Property, proputils.base_property_class(
+      Person.age))
+    person.age = 40
+    self.assertEqual(41, person.older)
+    self.assertEqual({}, dict(proputils._changes.pending))
+    Person.age.subscribe(self.changes.append)
+    person.age = 50
+    proputils.flush()
+    self.assertEqual(
+      [[proputils.Change(person, 'age', 40, 50)]], self.changes)
+
+  def testObserverError(self):
+    def fail(changes):
+      raise RuntimeError('fail')
+    other_changes = []
+    self.Person.age.subscribe(fail)
+    self.Person.age.subscribe(other_changes.append)
+    person = self.Person()
+    person.age = 30
+    self.assertRaises(RuntimeError, proputils.flush)
+    self.assertEqual(1, len(self.changes))
+    self.assertEqual(self.changes, other_changes)
+
+  def testMaxPending(self):
+    people = [self.Person() for index in range(proputils.MAX_PENDING)]
+    for person in people[:-1]:
+      person.age = 1
+    self.assertEqual([], self.changes)
+    people[-1].age = 1
+    self.assertEqual(proputils.MAX_PENDING, len(self.changes[0]))
+    with proputils.batch():
+      for person in people:
+        person.age = 2
+      self.assertEqual(1, len(self.changes))
+    self.assertEqual(2, len(self.changes))
+
+  def testTuneMaxPending(self):
+    self.assertFalse(hasattr(props, 'MAX_PENDING'))
+    original = proputils.MAX_PENDING
+    proputils.MAX_PENDING = 2
+    try:
+      first, second = self.Person(), self.Person()
+      first.age = 1
+      self.assertEqual([], self.changes)
+      second.age = 1
+      self.assertEqual(1, len(self.changes))
+      self.assertEqual(2, len(self.changes[0]))
+    finally:
+      proputils.MAX_PENDING = original
+
+
+class ComputedPropertyTest(unittest.TestCase):
+
+  def setUp(self):
+    self.calls = []
+    calls = self.calls
+
+    class Person(proputils.HasProps, init=True):
+      first = proputils.Property()
+      last = proputils.Property()
+
+      @proputils.computed('first', 'last')
+      def full_name(self):
+        calls.append('full_name')
+        return '%s %s' % (self.first, self.last)
+
+      @proputils.computed('full_name')
+      def initials(self):
+        return ''.join(part[0] for part in self.full_name.split())
+
+    self.Person = Person
+
+  def testCached(self):
+    person = self.Person(first='Ada', last='Lovelace')
+    self.assertEqual('Ada Lovelace', person.full_name)
+    self.assertEqual('Ada Lovelace', person.full_name)
+    self.assertEqual(['full_name'], self.calls)
+    self.assertEqual(('first', 'last'), self.Person.full_name.dependencies)
+
+  def testInvalidatedOnSet(self):
+    person = self.Person(first='Ada', last='Lovelace')
+    self.assertEqual('AL', person.initials)
+    person.first = 'Augusta'
+    self.assertEqual('Augusta Lovelace', person.full_name)
+    self.assertEqual('AL', person.initials)
+    person.last = 'King'
+    self.assertEqual('AK', person.initials)
+
+  def testInvalidatedOnDelete(self):
+    person = self.Person(first='Ada', last='Lovelace')
+    person.full_name
+    del person.last
+    self.assertRaises(AttributeError, getattr, person, 'full_name')
+
+  def testPerInstance(self):
+    ada = self.Person(first='Ada', last='Lovelace')
+    alan = self.Person(first='Alan', last='Turing')
+    self.assertEqual('Ada Lovelace', ada.full_name)
+    alan.first = 'A.'
+    self.assertEqual('A. Turing', alan.full_name)
+    self.assertEqual(['full_name', 'full_name'], self.calls)
+
+  def testReadOnly(self):
+    person = self.Person(first='Ada', last='Lovelace')
+    self.assertRaises(AttributeError, setattr, person, 'full_name', 'x')
+    person.full_name
+    del person.full_name
+    person.full_name
+    self.assertEqual(['full_name', 'full_name'], self.calls)
+
+  def testNotInitialized(self):
+    self.assertRaises(TypeError, self.Person, full_name='x')
+    person, = self.Person.from_rows([('Ada', 'Lovelace')])
+    self.assertEqual('Ada Lovelace', person.full_name)
+
+  def testSlots(self):
+    class Point(proputils.HasProps, slots=True):
+      x = proputils.Property()
+
+      @proputils.computed('x')
+      def double(self):
+        return self.x * 2
+
+    self.assertEqual(('_Point__x', '_Point__double'), Point.__slots__)
+    point = Point()
+    point.x = 2
+    self.assertEqual(4, point.double)
+    point.x = 3
+    self.assertEqual(6, point.double)
+
+  def testNotAChange(self):
+    class Tracked(proputils.ChangeTracking):
+      x = proputils.Property()
+
+      @proputils.computed('x')
+      def double(self):
+        return self.x * 2
+
+    tracked = Tracked()
+    tracked.x = 1
+    tracked.commit()
+    self.assertEqual(2, tracked.double)
+    self.assertEqual({}, tracked.changes())
+
+  def testUnknownDependency(self):
+    def define():
+      class Person(proputils.HasProps):
+        first = proputils.Property()
+
+        @proputils.computed('frist')
+        def greeting(self):
+          return 'Hello ' + self.first
+
+    with self.assertRaisesRegex(TypeError, "'greeting'.*'Person'.*'frist'"):
+      define()
+
+  def testDependencyNotProperty(self):
+    def define():
+      class Person(proputils.HasProps):
+        def first(self):
+          return 'Ada'
+
+        @proputils.computed('first')
+        def greeting(self):
+          return 'Hello ' + self.first()
+
+    self.assertRaises(TypeError, define)
+
+  def testSubclassReplacesDependency(self):
+    class Employee(self.Person):
+      first = proputils.Property()
+
+    employee = Employee(first='Ada', last='Lovelace')
+    self.assertEqual('Ada Lovelace', employee.full_name)
+    employee.first = 'Augusta'
+    self.assertEqual('Augusta Lovelace', employee.full_name)
+
+  def testSubclassCollected(self):
+    class Employee(self.Person):
+      pass
+
+    employee = Employee(first='Ada', last='Lovelace')
+    self.assertEqual('Ada Lovelace', employee.full_name)
+    subclass = weakref.ref(Employee)
+    del employee, Employee
+    gc.collect()
+    self.assertIsNone(subclass())
+
+
+class FrozenTest(unittest.TestCase):
+
+  class Point(proputils.HasProps, frozen=True):
+    x = proputils.Property()
+    y = proputils.ReadOnlyProperty()
+
+  def testConstruct(self):
+    point = self.Point(x=1, y=2)
+    self.assertEqual(1, point.x)
+    self.assertEqual(2, point.y)
+
+  def testImmutable(self):
+    point = self.Point(x=1)
+    self.assertRaises(AttributeError, setattr, point, 'x', 2)
+    self.assertRaises(AttributeError, setattr, point, 'y', 2)
+    self.assertRaises(AttributeError, setattr, point, 'z', 2)
+    self.assertRaises(AttributeError, delattr, point, 'x')
+    self.assertEqual(1, point.x)
+
+  def testEquality(self):
+    self.assertEqual(self.Point(x=1, y=2), self.Point(x=1, y=2))
+    self.assertNotEqual(self.Point(x=1, y=2), self.Point(x=1, y=3))
+    self.assertNotEqual(self.Point(x=1), self.Point(x=1, y=None))
+    self.assertEqual(self.Point(x=1), self.Point(x=1))
+    self.assertNotEqual(self.Point(x=1), (1,))
+
+  def testHash(self):
+    points = {self.Point(x=1, y=2), self.Point(x=1, y=2), self.Point(x=1)}
+    self.assertEqual(2, len(points))
+    self.assertIn(self.Point(x=1), points)
+
+  def testHashCached(self):
+    point = self.Point(x=1, y=2)
+    self.assertEqual(hash(point), hash(point))
+    self.assertEqual(hash(point), point._HasProps__hash)
+
+  def testFromRows(self):
+    point, = self.Point.from_rows([(1, 2)])
+    self.assertEqual(self.Point(x=1, y=2), point)
+    self.assertRaises(AttributeError, setattr, point, 'x', 2)
+
+  def testSlots(self):
+    class Point(proputils.HasProps, frozen=True, slots=True):
+      x = proputils.Property()
+
+    class Point3(Point):
+      z = proputils.Property()
+
+    self.assertEqual(('_Point__x', '_HasProps__hash'), Point.__slots__)
+    self.assertEqual(('_Point3__z',), Point3.__slots__)
+    point = Point3(x=1, z=3)
+    self.assertFalse(hasattr(point, '__dict__'))
+    self.assertEqual(Point3(x=1, z=3), point)
+    self.assertNotEqual(Point3(x=1, z=4), point)
+    self.assertNotEqual(Point(x=1), point)
+    self.assertEqual(hash(Point3(x=1, z=3)), hash(point))
+
+  def testComputed(self):
+    class Point(proputils.HasProps, frozen=True):
+      x = proputils.Property()
+
+      @proputils.computed('x')
+      def double(self):
+        return self.x * 2
+
+    point = Point(x=1)
+    self.assertEqual(2, point.double)
+    self.assertEqual(Point(x=1), point)
+    self.assertEqual(Point(x=1), next(Point.from_rows([(1,)])))
+
+  def testOwnMethods(self):
+    class Point(proputils.HasProps, frozen=True):
+      x = proputils.Property()
+
+      def __eq__(self, other):
+        return True
+
+      __hash__ = None
+
+    self.assertEqual(Point(x=1), Point(x=2))
+    self.assertRaises(TypeError, hash, Point(x=1))
+
+  def testRequiresHasProps(self):
+    with self.assertRaises(TypeError):
+      class NotHasProps(proputils.Propertied, frozen=True):
+        pass
+
+
+class PickledPoint(proputils.HasProps):
+  x = proputils.Property()
+  y = proputils.ReadOnlyProperty()
+
+  @proputils.computed('x')
+  def double(self):
+    return self.x * 2
+
+
+class PickledSlotsPoint(PickledPoint, slots=True):
+  z = proputils.Property()
+
+
+class PickledFrozenPoint(proputils.HasProps, frozen=True):
+  x = proputils.Property()
+
+
+class PickledTrackedPoint(proputils.ChangeTracking):
+  x = proputils.Property()
+
+
+class PickledExtraSlotsPoint(proputils.HasProps, slots=True):
+  __slots__ = ('extra', '__private')
+  x = proputils.Property()
+
+
+class PickledFrozenSlotsPoint(proputils.HasProps, slots=True, frozen=True):
+  __slots__ = ('extra',)
+  x = proputils.Property()
+
+
+class PickledStatePoint(proputils.HasProps):
+  x = proputils.Property()
+
+  def __getstate__(self):
+    return {'x': self.x}
+
+  def __setstate__(self, state):
+    self.x = state['x']
+    self.restored = True
+
+
+class PickledGetStatePoint(proputils.HasProps, slots=True):
+  __slots__ = ('extra',)
+  x = proputils.Property()
+
+  def __getstate__(self):
+    return None, {'_PickledGetStatePoint__x': self.x, 'extra': 'state'}
+
+
+class PickledSubPoint(PickledPoint):
+  w = proputils.Property()
+
+
+class PickleTest(unittest.TestCase):
+
+  def roundtrip(self, instance):
+    return pickle.loads(pickle.dumps(instance))
+
+  def testPickle(self):
+    point = PickledPoint()
+    point.x = 1
+    point.y = [2]
+    self.assertEqual(2, point.double)
+    copy = self.roundtrip(point)
+    self.assertEqual(1, copy.x)
+    self.assertEqual([2], copy.y)
+    self.assertNotIn('_PickledPoint__double', vars(copy))
+
+  def testCompact(self):
+    point = PickledPoint()
+    point.x = 1
+    self.assertNotIn(b'_PickledPoint__x', pickle.dumps(point))
+    reduced = point.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+    self.assertEqual((PickledPoint,), reduced[1])
+    self.assertEqual((1, proputils.DELETED), reduced[2])
+    point.y = 2
+    reduced = point.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+    self.assertEqual('PickledPoint.__reduce_ex__',
+                     type(point).__reduce_ex__.__qualname__)
+    self.assertEqual((1, 2), reduced[2])
+
+  def testUnset(self):
+    copy = self.roundtrip(PickledPoint())
+    self.assertRaises(AttributeError, getattr, copy, 'x')
+    self.assertIs(proputils.DELETED, self.roundtrip(proputils.DELETED))
+
+  def testExtraAttributes(self):
+    point = PickledPoint()
+    point.other = 'other'
+    self.assertEqual('other', self.roundtrip(point).other)
+
+  def testSlots(self):
+    point = PickledSlotsPoint()
+    point.x = 1
+    point.z = 3
+    copy = self.roundtrip(point)
+    self.assertEqual((1, 3), (copy.x, copy.z))
+    self.assertRaises(AttributeError, getattr, copy, 'y')
+
+  def testExtraSlots(self):
+    point = PickledExtraSlotsPoint()
+    point.x = 1
+    point.extra = 'extra'
+    point._PickledExtraSlotsPoint__private = 'private'
+    for copied in (self.roundtrip(point), copy.copy(point),
+                   copy.deepcopy(point)):
+      self.assertEqual((1, 'extra', 'private'),
+                       (copied.x, copied.extra,
+                        copied._PickledExtraSlotsPoint__private))
+    point = PickledExtraSlotsPoint()
+    point.x = 1
+    self.assertRaises(AttributeError, getattr, self.roundtrip(point), 'extra')
+
+  def testFrozenExtraSlots(self):
+    point = PickledFrozenSlotsPoint(x=1)
+    object.__setattr__(point, 'extra', 'extra')
+    for copied in (self.roundtrip(point), copy.deepcopy(point)):
+      self.assertEqual((1, 'extra'), (copied.x, copied.extra))
+
+  def testOwnState(self):
+    point = PickledStatePoint()
+    point.x = 1
+    for copied in (self.roundtrip(point), copy.copy(point),
+                   copy.deepcopy(point)):
+      self.assertEqual(1, copied.x)
+      self.assertTrue(copied.restored)
+
+  def testOwnGetState(self):
+    point = PickledGetStatePoint()
+    point.x = 1
+    for copied in (self.roundtrip(point), copy.copy(point),
+                   copy.deepcopy(point)):
+      self.assertEqual((1, 'state'), (copied.x, copied.extra))
+
+  def testSubClass(self):
+    point = PickledPoint()
+    point.x = 1
+    sub_point = PickledSubPoint()
+    sub_point.x = 2
+    sub_point.w = 3
+    point, sub_point = self.roundtrip([point, sub_point])
+    self.assertEqual(PickledPoint, type(point))
+    self.assertEqual(1, point.x)
+    self.assertEqual(PickledSubPoint, type(sub_point))
+    self.assertEqual((2, 3), (sub_point.x, sub_point.w))
+
+  def testFrozen(self):
+    point = PickledFrozenPoint(x=1)
+    hash(point)
+    copy = self.roundtrip(point)
+    self.assertEqual(point, copy)
+    self.assertNotIn('_HasProps__hash', vars(copy))
+
+  def testNotTracked(self):
+    point = PickledTrackedPoint()
+    point.x = 1
+    self.assertEqual({}, self.roundtrip(point).changes())
+
+  def testCopy(self):
+    point = PickledPoint()
+    point.x = 1
+    point.y = [2]
+    point.other = 'other'
+    shallow = copy.copy(point)
+    self.assertEqual((1, 'other'), (shallow.x, shallow.other))
+    self.assertIs(point.y, shallow.y)
+    deep = copy.deepcopy(point)
+    self.assertEqual([2], deep.y)
+    self.assertIsNot(point.y, deep.y)
+
+  def testDeepCopyCycle(self):
+    point = PickledPoint()
+    point.x = point
+    deep = copy.deepcopy(point)
+    self.assertIs(deep, deep.x)
+
+  def testCopyFrozen(self):
+    point = PickledFrozenPoint(x=[1])
+    self.assertIs(point, copy.copy(point))
+    deep = copy.deepcopy(point)
+    self.assertEqual(point, deep)
+    self.assertIsNot(point.x, deep.x)
+
+
+class GeneratedInitTest(unittest.TestCase):
+
+  def testInit(self):
+
+    class Point(proputils.HasProps, init=True):
+      x = proputils.Property()
+      y = proputils.ReadOnlyProperty()
+      z = PropDesc()
+
+    point = Point(x=1, y=2, z=3)
+    self.assertEqual(1, point.x)
+    self.assertEqual(2, point.y)
+    self.assertEqual(3, point.__dict__['z'])
+    self.assertRaises(AttributeError, setattr, point, 'y', 3)
+    self.assertTrue(Point.__init__.__qualname__.endswith('Point.__init__'))
+
+    point = Point(x=1)
+    self.assertRaises(AttributeError, getattr, point, 'y')
+
+    self.assertRaises(TypeError, Point, 1)
+    self.assertRaises(TypeError, Point, w=1)
+
+  def testSlots(self):
+
+    class Point(proputils.HasProps, init=True, slots=True):
+      x = proputils.Property()
+
+    self.assertEqual(1, Point(x=1).x)
+
+  def testInherited(self):
+
+    class Point(proputils.HasProps, init=True):
+      x = proputils.Property()
+
+    class Point3D(Point):
+      z = proputils.Property()
+
+    point = Point3D(x=1, z=3)
+    self.assertEqual(1, point.x)
+    self.assertEqual(3, point.z)
+
+  def testOwnInit(self):
+
+    class Point(proputils.HasProps, init=True):
+      x = proputils.Property()
+
+      def __init__(self):
+        self.x = 'own'
+
+    self.assertEqual('own', Point().x)
+
+  def testOverriddenSet(self):
+    sets = []
+
+    class RecordingProperty(proputils.Property):
+      def __set__(self, instance, value):
+        sets.append(value)
+        super(RecordingProperty, self).__set__(instance, value)
+
+    class Point(proputils.HasProps, init=True):
+      x = RecordingProperty()
+
+    self.assertEqual(1, Point(x=1).x)
+    self.assertEqual([1], sets)
+
+  def testPropertyNamedSelf(self):
+
+    class Odd(proputils.HasProps, init=True):
+      self = proputils.Property()
+
+    self.assertEqual(1, Odd(self=1).self)
+
+  def testPropertiesNamedLikeConstants(self):
+
+    class Odd(proputils.HasProps, init=True):
+      _c0 = proputils.Property()
+      __c0 = proputils.Property()
+      _c1 = propval.StrictProperty(int)
+
+    odd = Odd(_c0=1, _Odd__c0=2, _c1=3)
+    self.assertEqual((1, 2, 3), (odd._c0, odd._Odd__c0, odd._c1))
+    self.assertRaises(TypeError, Odd, _c1='3')
+    self.assertRaises(AttributeError, getattr, Odd(), '_c0')
+
+  def testRequiresHasProps(self):
+    def new_class():
+      class Point(proputils.Propertied, init=True):
+        x = proputils.Property()
+    self.assertRaises(TypeError, new_class)
+
+
+class FromRowsTest(unittest.TestCase):
+
+  def testFromRows(self):
+
+    class Point(proputils.HasProps):
+      x = proputils.Property()
+      y = proputils.ReadOnlyProperty()
+
+    points = list(Point.from_rows([{'x': 1, 'y': 2}, (3, 4), {'y': 5}]))
+    self.assertEqual([(1, 2), (3, 4)], [(p.x, p.y) for p in points[:2]])
+    self.assertRaises(AttributeError, getattr, points[2], 'x')
+    self.assertEqual(5, points[2].y)
+
+  def testCallsOwnInit(self):
+
+    class Point(proputils.HasProps):
+      x = proputils.Property()
+      y = proputils.Property()
+
+      def __init__(self):
+        self.y = 'default'
+
+    point, = Point.from_rows([{'x': 1}])
+    self.assertEqual(1, point.x)
+    self.assertEqual('default', point.y)
+
+  def testCallsOwnCompiledInit(self):
+
+    class Point(proputils.HasProps):
+      x = proputils.Property()
+      y = proputils.Property()
+
+    compiler = propcompile.ValidatorCompiler()
+    Point.__init__ = compiler.function(
+      '__init__', ['self'], ['self.y = %s' % compiler.constant('default')])
+
+    point, = Point.from_rows([{'x': 1}])
+    self.assertEqual('default', point.y)
+
+  def testSubclassHasOwnPopulate(self):
+
+    class Point(proputils.HasProps, init=True):
+      x = proputils.Property()
+
+    class Point3D(Point):
+      z = proputils.Property()
+
+    list(Point.from_rows([(1,)]))
+    point, = Point3D.from_rows([(1, 3)])
+    self.assertEqual(3, point.z)
+
+
 class PropertyTest(prop_testutils.PropertyTestMixin, unittest.TestCase):
 
   def new_class(self):
@@ -362,6 +1480,14 @@ class PropertyTest(prop_testutils.PropertyTestMixin, unittest.TestCase):
     with self.assertRaisesRegex(AttributeError, 'Property not configured'):
       prop.cls
 
+  def testAttributeName(self):
+    class Owner(proputils.Propertied):
+      prop1 = proputils.Property()
+
+    self.assertEqual('_Owner__prop1', Owner.prop1.attribute_name)
+    with self.assertRaisesRegex(AttributeError, 'Property not configured'):
+      proputils.Property().attribute_name
+
   def testConfigTwice(self):
     class Owner(proputils.Propertied):
       prop1 = proputils.Property()
@@ -15,12 +15,17 @@
 # limitations under the License.
 #
 
+import decimal
+import fractions
 import operator
+import pickle
+import threading
 import unittest
 
 from mox3 import mox
 
 from sordid.props import prop_testutils
+from sordid.props import propcompile
 from sordid.props import proputils
 from sordid.props import propval
 
@@ -120,6 +125,26 @@ class ValidatorTest(mox.MoxTestBase):
     self.assertTrue(or_val(2))
     self.assertTrue(or_val(3))
 
+  def testFlattenOperands(self):
+    val1 = propval.Validator(bool)
+    val2 = propval.Validator(bool)
+    val3 = propval.Validator(bool)
+
+    and_val = val1 & val2 & val3
+    self.assertIsInstance(and_val, propval.AndValidator)
+    self.assertEqual((val1, val2, val3), and_val.operands)
+
+    or_val = val1 | (val2 | val3)
+    self.assertIsInstance(or_val, propval.OrValidator)
+    self.assertEqual((val1, val2, val3), or_val.operands)
+
+    mixed = (val1 & val2) | val3
+    self.assertEqual(2, len(mixed.operands))
+
+    not_val = ~val1
+    self.assertIsInstance(not_val, propval.NotValidator)
+    self.assertIs(val1, not_val.operand)
+
 
 class ConstantsTest(unittest.TestCase):
 
@@ -184,6 +209,24 @@ class ValidatedPropertyTest(prop_testutils.PropertyTestMixin,
     proputils.config_props(self.C)
     self.assertRaises(ValueError, setattr, c, 'p', False)
 
+  def testCompilesOnFirstSet(self):
+    compiled = []
+
+    class CountingValidator(propval.Validator):
+      def compile(self, raising=True):
+        compiled.append(raising)
+        return super(CountingValidator, self).compile(raising)
+
+    class C(proputils.Propertied):
+      p = propval.ValidatedProperty(CountingValidator(bool))
+
+    self.assertEqual([], compiled)
+    c = C()
+    c.p = 1
+    c.p = 2
+    self.assertEqual([True], compiled)
+    self.assertRaises(ValueError, setattr, c, 'p', 0)
+
 
 class StrictPropertyTest(prop_testutils.PropertyTestMixin,
                          unittest.TestCase):
@@ -260,6 +303,10 @@ class CmpTest(unittest.TestCase):
         validator = propval.CMP(operator.gt, 10)
         self.assertEqual(operator.gt, validator.binop)
 
+    def testConstant(self):
+        validator = propval.CMP(operator.gt, 10)
+        self.assertEqual(10, validator.constant)
+
     def testLt(self):
         validator = propval.CMP < 10
         self.assertFalse(validator(10))
@@ -292,6 +339,622 @@ class IsInTest(unittest.TestCase):
         self.assertFalse(validator(31))
         self.assertTrue(validator(30))
 
+    def assertStrategy(self, strategy, constant, valid, invalid):
+        validator = propval.is_in(constant)
+        self.assertEqual(strategy, validator.strategy)
+        compiled = validator.compile()
+        for value in valid:
+            self.assertTrue(validator(value), value)
+            self.assertTrue(compiled(value), value)
+        for value in invalid:
+            self.assertFalse(validator(value), value)
+            self.assertFalse(compiled(value), value)
+
+    def testRange(self):
+        self.assertStrategy('range', [3, 1, 2, 2], [1, 2, 3, 2.0, True],
+                            [0, 4, 1.5, 'a', None, [1]])
+        self.assertEqual(range(1, 4), propval.is_in((3, 2, 1)).index)
+        self.assertStrategy('range', range(0, 10, 2), [0, 8], [1, 10])
+
+    def testSet(self):
+        self.assertStrategy('set', [10, 20, 30], [10, 20.0], [11, [10], {}])
+        self.assertStrategy('set', ('a', 'b'), ['a'], ['c', ['a']])
+        self.assertStrategy('set', [True, 2], [1, True, 2], [0, 3])
+        self.assertEqual(frozenset([1, 5]), propval.is_in([1, 5]).index)
+
+    def testSetUnhashableValues(self):
+        self.assertStrategy('set', [(1, 2), 'a'], [(1, 2)],
+                            [([1],), (1, [2]), ['a']])
+
+    def testRangeNonIntegers(self):
+        huge = range(10 ** 12)
+        self.assertStrategy('range', huge,
+                            [5, 5.0, fractions.Fraction(4, 2),
+                             decimal.Decimal(7)],
+                            [5.5, -1.0, float('inf'), float('nan'), 'a', None,
+                             fractions.Fraction(1, 2), 1j])
+
+    def testSorted(self):
+        self.assertStrategy('sorted', [[3], [1], [2]], [[1], [3]],
+                            [[4], [], 'a', None])
+
+    def testSortedOnlyTotallyOrdered(self):
+        self.assertStrategy('scan', [{1}, {2}], [{1}, {2}, frozenset([2])],
+                            [{3}, set(), {1, 2}])
+        self.assertStrategy('scan', [{2}, frozenset([1])],
+                            [{1}, frozenset([2])], [{3}, set()])
+        self.assertStrategy('scan', [[{1}], [{2}]], [[{2}]], [[{3}]])
+        self.assertStrategy('scan', [[1], [1]], [[1]], [[2]])
+        self.assertStrategy('scan', [[1], (2,)], [[1], (2,)], [[2], (1,)])
+        self.assertStrategy('sorted', [[2], [1]], [[1], [2]],
+                            [(1,), {1}, [{1}]])
+
+    def testScan(self):
+        self.assertStrategy('scan', 'abc', ['a', 'bc'], ['d', 'ac'])
+        self.assertStrategy('scan', [[1], {2}], [[1], {2}], [[2], {1}])
+        self.assertStrategy('scan', [], [], [1])
+
+
+class RangeTest(unittest.TestCase):
+
+  def testInclusive(self):
+    validator = propval.RangeValidator(0, 10)
+    self.assertFalse(validator(-1))
+    self.assertTrue(validator(0))
+    self.assertTrue(validator(10))
+    self.assertFalse(validator(11))
+
+  def testExclusive(self):
+    validator = propval.RangeValidator(0, 10, False, False)
+    self.assertFalse(validator(0))
+    self.assertTrue(validator(1))
+    self.assertTrue(validator(9))
+    self.assertFalse(validator(10))
+
+  def testUnbounded(self):
+    validator = propval.RangeValidator(upper=10)
+    self.assertTrue(validator(-1000))
+    self.assertFalse(validator(11))
+    self.assertTrue(validator.compile()(-1000))
+    self.assertFalse(validator.compile()(11))
+
+  def testNoBounds(self):
+    self.assertRaises(ValueError, propval.RangeValidator)
+
+
+class SimplifyTest(unittest.TestCase):
+
+  def testMergeBounds(self):
+    validator = (propval.CMP >= 0) & (propval.CMP <= 100) & (propval.CMP > 5)
+    simplified = validator.simplify()
+    self.assertIsInstance(simplified, propval.RangeValidator)
+    self.assertEqual(5, simplified.lower)
+    self.assertFalse(simplified.lower_inclusive)
+    self.assertEqual(100, simplified.upper)
+    self.assertTrue(simplified.upper_inclusive)
+
+  def testMergeEqualBounds(self):
+    simplified = ((propval.CMP <= 10) & (propval.CMP < 10)).simplify()
+    self.assertEqual(10, simplified.upper)
+    self.assertFalse(simplified.upper_inclusive)
+
+  def testMergeKeepsPosition(self):
+    is_int = propval.type_validator(int)
+    validator = is_int & (propval.CMP >= 0) & (propval.CMP < 10) & bool
+    simplified = validator.simplify()
+    self.assertIsInstance(simplified, propval.AndValidator)
+    self.assertEqual(3, len(simplified.operands))
+    self.assertIs(is_int, simplified.operands[0])
+    self.assertIsInstance(simplified.operands[1], propval.RangeValidator)
+
+  def testMergeOnlyNeighbors(self):
+    is_int = propval.type_validator(int)
+    validator = (propval.CMP >= 0) & is_int & (propval.CMP < 10)
+    simplified = validator.simplify()
+    self.assertEqual(3, len(simplified.operands))
+    # The type check still comes before the upper bound.
+    self.assertRaises(TypeError, validator.compile(), 10.5)
+
+  def testIncomparableBounds(self):
+    validator = (propval.CMP >= 0) & (propval.CMP >= 'a')
+    simplified = validator.simplify()
+    self.assertEqual(2, len(simplified.operands))
+
+  def testFoldIsInAnd(self):
+    validator = propval.is_in([1, 2, 3]) & propval.is_in((2, 3, 4))
+    simplified = validator.simplify()
+    self.assertIsInstance(simplified, propval.IsInValidator)
+    self.assertEqual(frozenset([2, 3]), simplified.constant)
+
+  def testFoldIsInOr(self):
+    validator = propval.is_in([1, 2]) | (propval.is_in({3}) | propval.is_in([4]))
+    simplified = validator.simplify()
+    self.assertEqual(frozenset([1, 2, 3, 4]), simplified.constant)
+
+  def testDoNotFoldStrings(self):
+    validator = propval.is_in('abc') | propval.is_in('xyz')
+    simplified = validator.simplify()
+    self.assertIsInstance(simplified, propval.OrValidator)
+    self.assertTrue(simplified('ab'))
+
+  def testFilterIsInByRange(self):
+    validator = (propval.is_in([-1, 0, 5, 100, 101]) & (propval.CMP >= 0) &
+                 (propval.CMP <= 100))
+    simplified = validator.simplify()
+    self.assertIsInstance(simplified, propval.IsInValidator)
+    self.assertEqual(frozenset([0, 5, 100]), simplified.constant)
+
+  def testDoNotFilterIsInByPrecedingRange(self):
+    validator = (propval.CMP >= 0) & propval.is_in([-1, 0, 5, 'a'])
+    simplified = validator.simplify()
+    self.assertEqual(2, len(simplified.operands))
+    self.assertRaises(TypeError, validator.compile(), 'a')
+
+  def testFoldKeepsExceptionOrder(self):
+    validator = (propval.is_in([1]) | propval.type_validator(int) |
+                 propval.is_in(['a']))
+    self.assertEqual(3, len(validator.simplify().operands))
+    self.assertRaises(TypeError, validator.compile(), 'a')
+
+  def testFoldedUnhashableValues(self):
+    validator = propval.is_in([(1, 2), 3]) & propval.is_in([(1, 2)])
+    simplified = validator.simplify()
+    self.assertEqual(frozenset([(1, 2)]), simplified.constant)
+    compiled = validator.compile()
+    self.assertTrue(compiled((1, 2)))
+    self.assertFalse(compiled(([1],)))
+    self.assertFalse(compiled([1, 2]))
+
+  def testDoNotFoldUnhashable(self):
+    validator = propval.is_in([[1], [2]]) | propval.is_in([[3]])
+    self.assertIsInstance(validator.simplify(), propval.OrValidator)
+
+  def testDoNotExpandRanges(self):
+    members = range(10 ** 12)
+    validator = propval.is_in(members) & propval.type_validator(int)
+    simplified = validator.simplify()
+    self.assertIs(members, simplified.operands[0].constant)
+    compiled = validator.compile()
+    self.assertTrue(compiled(10 ** 11))
+    self.assertFalse(compiled(-1))
+
+  def testRedundantNoneAndEmpty(self):
+    self.assertIs(propval.NONE, (propval.NONE & propval.EMPTY).simplify())
+    self.assertIs(propval.NONE, (propval.EMPTY & propval.NONE).simplify())
+    self.assertIs(propval.EMPTY, (propval.NONE | propval.EMPTY).simplify())
+    self.assertIs(propval.EMPTY, (propval.EMPTY | propval.NONE).simplify())
+    self.assertIs(propval.NONE, (propval.NONE | propval.NONE).simplify())
+
+  def testDoubleNegation(self):
+    self.assertIs(propval.EMPTY, (~~propval.EMPTY).simplify())
+
+  def testNested(self):
+    validator = propval.NONE | ((propval.CMP > 0) & (propval.CMP > 1) &
+                                (propval.CMP < 5))
+    simplified = validator.simplify()
+    self.assertIs(propval.NONE, simplified.operands[0])
+    self.assertIsInstance(simplified.operands[1], propval.RangeValidator)
+    compiled = validator.compile()
+    for value in (None, 1, 2, 4, 5):
+      self.assertEqual(validator(value), compiled(value))
+
+  def testUnchanged(self):
+    validator = propval.type_validator(int)
+    self.assertIs(validator, validator.simplify())
+
+
+@unittest.skipIf(propval.numpy is None, 'Requires NumPy')
+class ValidArrayTest(unittest.TestCase):
+
+  def assertMask(self, validator, values, dtype=None):
+    array = propval.numpy.array(values, dtype=dtype)
+    expected = []
+    for value in values:
+      try:
+        expected.append(bool(validator(value)))
+      except TypeError:
+        expected.append(False)
+    self.assertEqual(expected,
+                     propval.valid_mask(validator, array).tolist())
+
+  def testCmp(self):
+    self.assertMask(propval.CMP >= 2, [1, 2, 3])
+    self.assertMask(propval.CMP < 2.5, [1.0, 2.5, 3.0])
+    self.assertMask(propval.CMP >= 2, ['a', 'b'])
+    self.assertMask(propval.CMP >= 2, [1, None, 3], dtype=object)
+
+  def testRange(self):
+    self.assertMask(propval.RangeValidator(0, 10, False), [0, 5, 10, 11])
+
+  def testIsIn(self):
+    self.assertMask(propval.is_in([1, 3]), [1, 2, 3])
+    self.assertMask(propval.is_in(['a']), ['a', 'b'])
+    self.assertMask(propval.is_in(['a']), [1, 2])
+    self.assertMask(propval.is_in('abc'), ['ab', 'x'])
+    self.assertMask(propval.is_in([1, 2, 3]), [0, 1, 3, 4])
+    self.assertMask(propval.is_in(range(0, 10, 2)), [0, 1, 2])
+    self.assertMask(propval.is_in(range(10 ** 12)),
+                    [0.0, 1.5, -1.0, 2.0, float('nan'), float('inf')])
+    self.assertMask(propval.is_in([1, 2, 3]), [True, False])
+
+  def testIsInMembersNotScalars(self):
+    self.assertMask(propval.is_in([[1, 2], [3]]), [1, 2, 3])
+    self.assertMask(propval.is_in([[1, 2], [3, 4]]), [1, 2, 3])
+    self.assertMask(propval.is_in([(1, 2), 'a']), ['a', 'b'])
+    self.assertMask(propval.is_in([None, 1]), [1, 2])
+
+  def testNone(self):
+    self.assertMask(propval.NONE, [1, 2])
+    self.assertMask(propval.NONE, [1, None], dtype=object)
+
+  def testEmpty(self):
+    self.assertMask(propval.EMPTY, [0, 1])
+    self.assertMask(propval.EMPTY, [0.0, 1.5])
+    self.assertMask(propval.EMPTY, [True, False])
+    self.assertMask(propval.EMPTY, ['', 'a'])
+    self.assertMask(propval.EMPTY, [[], [1], None], dtype=object)
+
+  def testType(self):
+    self.assertMask(propval.type_validator(int), [1, 2])
+    self.assertMask(propval.type_validator(float), [1, 2])
+    self.assertMask(propval.type_validator(str), ['a'])
+    self.assertMask(propval.type_validator(int), [1, 'a', 2.0], dtype=object)
+
+  def testOperators(self):
+    validator = propval.NONE | (propval.type_validator(int) &
+                                ~(propval.CMP > 10))
+    self.assertMask(validator, [None, 1, 11, 'a'], dtype=object)
+    self.assertMask(validator, [1, 11])
+
+  def testFunctionFallback(self):
+    self.assertMask(propval.Validator(lambda v: v % 2 == 0), [1, 2, 3, 4])
+    self.assertMask(lambda v: v % 2 == 0, [1, 2, 3, 4])
+
+
+class ValidateColumnTest(unittest.TestCase):
+
+  def testList(self):
+    validator = propval.ValidatedProperty(
+      (propval.CMP >= 0) & propval.type_validator(int))
+    self.assertEqual([False, True, True],
+                     validator.__validate_column__([1, -1, 'a']))
+
+  @unittest.skipIf(propval.numpy is None, 'Requires NumPy')
+  def testArray(self):
+    validator = propval.ValidatedProperty(propval.CMP >= 0)
+    errors = validator.__validate_column__(propval.numpy.array([1, -1]))
+    self.assertEqual([False, True], errors.tolist())
+
+  @unittest.skipIf(propval.numpy is None, 'Requires NumPy')
+  def testValidateColumns(self):
+    class Reading(proputils.HasProps):
+      sensor = propval.ValidatedProperty(propval.is_in(['a', 'b']))
+      value = propval.ValidatedProperty(
+        propval.type_validator(float) & (propval.CMP >= 0))
+
+    numpy = propval.numpy
+    errors = Reading.validate_columns({
+      'sensor': numpy.array(['a', 'b', 'c', 'a']),
+      'value': numpy.array([1.0, -1.0, 2.0, 0.0]),
+    })
+    self.assertEqual([False, True, True, False], errors.tolist())
+
+  @unittest.skipIf(propval.numpy is None, 'Requires NumPy')
+  def testValidateColumnsRaggedMembers(self):
+    class Reading(proputils.HasProps):
+      shape = propval.ValidatedProperty(propval.is_in([[1, 2], [3]]))
+
+    errors = Reading.validate_columns({
+      'shape': propval.numpy.array([1, 3]),
+    })
+    self.assertEqual([True, True], errors.tolist())
+
+
+class ValidateRowsTest(unittest.TestCase):
+
+  class Reading(proputils.HasProps):
+    sensor = propval.StrictProperty(str)
+    value = propval.ValidatedProperty(
+      (propval.CMP >= 0) & (propval.CMP <= 10))
+
+  def testNonRaisingCheck(self):
+    check = self.Reading.sensor.__compile_check__()
+    self.assertFalse(check(1))
+    self.assertTrue(check('a'))
+    self.assertIs(check, self.Reading.sensor.__compile_check__())
+
+  def testFailures(self):
+    failures = self.Reading.validate_rows([
+      ('a', 1),
+      (1, 11),
+      {'value': 'x'},
+    ])
+    self.assertEqual([(1, 'sensor'), (1, 'value'), (2, 'value')],
+                     [(f.row, f.name) for f in failures])
+
+    type_failure, range_failure, incomparable = failures
+    self.assertIsInstance(type_failure.node, propval.TypeValidator)
+    self.assertIsInstance(type_failure.exception(), TypeError)
+    self.assertEqual('Property must be type str', type_failure.message)
+
+    self.assertIs(self.Reading.value.validator.operands[1],
+                  range_failure.node)
+    self.assertIsInstance(range_failure.exception(), ValueError)
+    self.assertEqual(
+      'Value \'11\' is not valid for property \'value\' on \'Reading\'',
+      range_failure.message)
+
+    self.assertIs(self.Reading.value.validator.operands[0],
+                  incomparable.node)
+    self.assertIsInstance(incomparable.exception(), TypeError)
+
+  def testMessageMatchesAssignment(self):
+    failure, = self.Reading.validate_rows([{'value': -1}])
+    reading = self.Reading()
+    with self.assertRaises(ValueError) as context:
+      reading.value = -1
+    self.assertEqual(str(context.exception), failure.message)
+
+  def testFailingNode(self):
+    in_range = propval.CMP >= 0
+    validator = in_range & (propval.NONE | propval.type_validator(int))
+    self.assertIs(in_range, propval.failing_node(validator, -1))
+    self.assertIs(validator.operands[1], propval.failing_node(validator, 1.5))
+    self.assertIs(in_range, propval.failing_node(in_range, -1))
+
+
+class GeneratedInitTest(unittest.TestCase):
+
+  class Reading(proputils.HasProps, init=True):
+    sensor = propval.StrictProperty(str)
+    value = propval.ValidatedProperty((propval.CMP >= 0) & (propval.CMP <= 10))
+    odd = propval.ValidatedProperty(lambda value: value % 2 == 1)
+
+  def testValid(self):
+    reading = self.Reading(sensor='a', value=1, odd=3)
+    self.assertEqual(('a', 1, 3), (reading.sensor, reading.value, reading.odd))
+
+  def testInvalid(self):
+    self.assertRaises(TypeError, self.Reading, sensor=1)
+    with self.assertRaisesRegex(ValueError,
+                                'Value \'11\' is not valid for property '
+                                '\'value\' on \'Reading\''):
+      self.Reading(value=11)
+    self.assertRaises(ValueError, self.Reading, odd=2)
+
+  def testFromRows(self):
+    readings = list(self.Reading.from_rows([('a', 1, 1), ('b', 2, 3)]))
+    self.assertEqual(['a', 'b'], [r.sensor for r in readings])
+    self.assertRaises(ValueError, list,
+                      self.Reading.from_rows([{'value': -1}]))
+
+
+class MemoizedTest(unittest.TestCase):
+
+  def setUp(self):
+    self.calls = []
+    def is_even(value):
+      self.calls.append(value)
+      return value % 2 == 0
+    self.is_even = is_even
+
+  def testCaches(self):
+    validator = propval.memoized(self.is_even)
+    self.assertTrue(validator(2))
+    self.assertFalse(validator(3))
+    self.assertTrue(validator(2))
+    self.assertEqual([2, 3], self.calls)
+    self.assertEqual(propval.CacheInfo(1, 2, 128, 2), validator.cache_info())
+
+  def testEviction(self):
+    validator = propval.memoized(self.is_even, maxsize=2)
+    validator(1)
+    validator(2)
+    validator(1)
+    validator(3)  # Evicts 2, the least recently used.
+    validator(1)
+    validator(2)
+    self.assertEqual([1, 2, 3, 2], self.calls)
+    self.assertEqual(2, validator.cache_info().currsize)
+
+  def testUnbounded(self):
+    validator = propval.memoized(self.is_even, maxsize=None)
+    for value in range(1000):
+      validator(value)
+    self.assertEqual(1000, validator.cache_info().currsize)
+
+  def testTypesCachedSeparately(self):
+    validator = propval.memoized(propval.type_validator(int))
+    self.assertTrue(validator(1))
+    self.assertRaises(TypeError, validator, 1.0)
+    self.assertEqual(0, validator.cache_info().hits)
+
+  def testUnhashableBypassesCache(self):
+    validator = propval.memoized(propval.EMPTY)
+    self.assertTrue(validator([]))
+    self.assertTrue(validator([]))
+    self.assertEqual(propval.CacheInfo(0, 0, 128, 0), validator.cache_info())
+
+  def testClear(self):
+    validator = propval.memoized(self.is_even)
+    validator(1)
+    validator(1)
+    validator.cache_clear()
+    self.assertEqual(propval.CacheInfo(0, 0, 128, 0), validator.cache_info())
+
+  def testThreads(self):
+    validator = propval.memoized(self.is_even, maxsize=1)
+
+    class Value(int):
+      """Evicts itself from another thread while the cache is moving it."""
+
+      hashes = 0
+
+      def __hash__(self):
+        Value.hashes += 1
+        if Value.hashes == 4:
+          thread = threading.Thread(target=validator, args=(1,))
+          thread.start()
+          thread.join(0.2)
+        return int.__hash__(self)
+
+    value = Value(2)
+    self.assertTrue(validator(value))
+    self.assertTrue(validator(value))
+    self.assertEqual(4, Value.hashes)
+    self.assertEqual(1, validator.cache_info().hits)
+
+  def testOperators(self):
+    memo = propval.memoized(self.is_even)
+    validator = propval.NONE | (memo & (propval.CMP > 0))
+    self.assertTrue(validator(None))
+    self.assertTrue(validator(2))
+    self.assertFalse(validator(-2))
+    self.assertFalse(validator(3))
+    compiled = validator.compile()
+    self.assertTrue(compiled(2))
+    self.assertEqual([2, -2, 3], self.calls)
+
+    class Even(proputils.Propertied):
+      value = propval.ValidatedProperty(~memo)
+
+    even = Even()
+    even.value = 3
+    self.assertRaises(ValueError, setattr, even, 'value', 2)
+    self.assertEqual([2, -2, 3], self.calls)
+
+
+class AdaptiveTest(unittest.TestCase):
+
+  def setUp(self):
+    self.always = propval.Validator(lambda value: True)
+    self.positive = propval.Validator(lambda value: value > 0)
+
+  def train(self, validator, values):
+    for value in values:
+      validator(value)
+
+  def testReordersAnd(self):
+    validator = propval.adaptive(self.always & self.positive,
+                                 sample_interval=1, window=4)
+    self.train(validator, [1, -1, -2, 3])
+    self.assertEqual((self.positive, self.always),
+                     validator.validator.operands)
+
+  def testReordersOr(self):
+    never = propval.Validator(lambda value: False)
+    validator = propval.adaptive(never | self.positive,
+                                 sample_interval=1, window=4)
+    self.train(validator, [1, -1, 2, 3])
+    self.assertEqual((self.positive, never), validator.validator.operands)
+
+  def testResults(self):
+    validator = propval.adaptive(self.always & self.positive,
+                                 sample_interval=2, window=2)
+    results = [validator(value) for value in [1, -1, -2, 3, 0, 5]]
+    self.assertEqual([True, False, False, True, False, True], results)
+
+  def testGuardsNotMoved(self):
+    validator = propval.adaptive(
+      propval.NONE | (propval.CMP >= 0) | self.positive,
+      sample_interval=1, window=4)
+    self.train(validator, [-1, -2, -3, -4])
+    self.assertIs(propval.NONE, validator.validator.operands[0])
+    self.assertTrue(validator(None))
+
+  def testRaisingNotMoved(self):
+    def strict_positive(value):
+      if value is None:
+        raise ValueError('None')
+      return value > 0
+
+    validator = propval.adaptive(self.always & strict_positive,
+                                 sample_interval=1, window=4)
+    self.train(validator, [-1, -2, -3])
+    self.assertRaises(ValueError, validator, None)
+    self.assertIs(self.always, validator.freeze().operands[0])
+
+  def testFreeze(self):
+    validator = propval.adaptive(self.always & self.positive,
+                                 sample_interval=1, window=100)
+    self.train(validator, [-1, -2])
+    self.assertIs(self.always, validator.validator.operands[0])
+    frozen = validator.freeze()
+    self.assertTrue(validator.frozen)
+    self.assertEqual((self.positive, self.always), frozen.operands)
+    self.train(validator, [1] * 200)
+    self.assertIs(frozen, validator.freeze())
+    self.assertIs(frozen, validator.validator)
+
+  def testFrozenCompilesInline(self):
+    validator = propval.adaptive(self.always & self.positive)
+    compiler = propcompile.ValidatorCompiler()
+    self.assertEqual('_c0(value)', compiler.expression(validator))
+    validator.freeze()
+    compiler = propcompile.ValidatorCompiler()
+    self.assertEqual('(_c0(value) and _c1(value))',
+                     compiler.expression(validator))
+
+
+@propval.validator_def
+def multiple_of(factor):
+  return lambda value: value % factor == 0
+
+
+class PicklableReading(proputils.HasProps):
+  value = propval.ValidatedProperty(
+    propval.type_validator(int) & (propval.CMP >= 0))
+
+
+class PickleTest(unittest.TestCase):
+
+  def roundtrip(self, value):
+    return pickle.loads(pickle.dumps(value))
+
+  def testConstants(self):
+    self.assertIs(propval.NONE, self.roundtrip(propval.NONE))
+    self.assertIs(propval.EMPTY, self.roundtrip(propval.EMPTY))
+
+  def testTree(self):
+    validator = propval.NONE | (
+      (propval.CMP >= 0) & propval.type_validator(int) &
+      ~propval.is_in([3, 5]) & propval.RangeValidator(upper=10))
+    copy = self.roundtrip(validator)
+    self.assertIs(propval.NONE, copy.operands[0])
+    for value in [None, 0, 4, 10]:
+      self.assertTrue(copy(value))
+    for value in [-1, 3, 11]:
+      self.assertFalse(copy(value))
+    self.assertRaises(TypeError, copy, 1.5)
+
+  def testIsIn(self):
+    copy = self.roundtrip(propval.is_in(['a', 'b']))
+    self.assertEqual(['a', 'b'], copy.constant)
+    self.assertEqual('set', copy.strategy)
+
+  def testValidatorDef(self):
+    copy = self.roundtrip(multiple_of(3))
+    self.assertTrue(copy(9))
+    self.assertFalse(copy(10))
+    self.assertEqual('multiple_of', multiple_of.__name__)
+
+  def testMemoized(self):
+    validator = propval.memoized(multiple_of(2))
+    validator(2)
+    copy = self.roundtrip(validator)
+    self.assertEqual(0, copy.cache_info().currsize)
+    self.assertTrue(copy(4))
+
+  def testAdaptive(self):
+    validator = propval.adaptive(propval.CMP >= 0)
+    self.assertFalse(self.roundtrip(validator).frozen)
+    validator.freeze()
+    self.assertTrue(self.roundtrip(validator).frozen)
+
+  def testProperty(self):
+    self.assertIs(PicklableReading.value,
+                  self.roundtrip(PicklableReading.value))
+
 
 class ValidatedPropertyDefTest(unittest.TestCase):
 